@@ -0,0 +1,48 @@
+"""
+Response Cache Module
+Redis-backed cache for read-mostly API responses (e.g. project phases).
+Caching is disabled when REDIS_URL is not set, so local development needs no Redis.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return the shared Redis client, or None when caching is disabled"""
+    global _client
+    if _client is None and REDIS_URL:
+        _client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _client
+
+
+def cache_get(key: str) -> Optional[bytes]:
+    """Get a cached value; cache errors are treated as a miss"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except redis.RedisError as e:
+        logger.warning("[CACHE] GET %s failed: %s", key, e)
+        return None
+
+
+def cache_set(key: str, value: bytes, ttl_seconds: int) -> None:
+    """Store a value with a TTL; cache errors are logged and ignored"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl_seconds, value)
+    except redis.RedisError as e:
+        logger.warning("[CACHE] SETEX %s failed: %s", key, e)
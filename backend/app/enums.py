@@ -0,0 +1,55 @@
+"""
+Shared Enums
+Status and type enums used by both the ORM models and the API schemas.
+Kept free of SQLAlchemy imports so the API schema modules do not pull in the ORM layer.
+"""
+
+import enum
+from typing import Literal
+
+class PhaseStatus(str, enum.Enum):
+    NOT_STARTED = "not_started"
+    IN_PROGRESS = "in_progress"
+    PENDING_APPROVAL = "pending_approval"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+    BLOCKED = "blocked"
+
+class ApprovalStatus(str, enum.Enum):
+    PENDING = "pending"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+    CONDITIONAL = "conditional"
+
+class IntegrationType(str, enum.Enum):
+    JIRA = "jira"
+    GITHUB = "github"
+    GITLAB = "gitlab"
+    CONFLUENCE = "confluence"
+    SLACK = "slack"
+    TEAMS = "teams"
+    JENKINS = "jenkins"
+    CIRCLECI = "circleci"
+
+class WorkflowType(str, enum.Enum):
+    CODE_GENERATION = "code_generation"
+    TEST_GENERATION = "test_generation"
+    DEPLOYMENT = "deployment"
+    DOCUMENTATION = "documentation"
+    CODE_REVIEW = "code_review"
+
+# Roles a user can sign up with or be created as (signup form options plus seeded roles).
+# A Literal rather than an Enum so the value stays a plain str on the ORM column.
+UserRole = Literal[
+    "Developer",
+    "Product Owner",
+    "Product Manager",
+    "Project Manager",
+    "Technical Lead",
+    "Architect",
+    "Business Analyst",
+    "QA Engineer",
+    "QA Lead",
+    "Operations Manager",
+    "Stakeholder",
+]
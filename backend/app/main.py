@@ -1,16 +1,51 @@
+import logging
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from app.routers import projects, phases, approvals, ai_copilot, users, integrations, chat, auth, ai_chat, github
 from app.database import engine, Base
 from app import models, models_integrations  # Import all models
+from app.services.ai_service import close_openai_clients
+
+logger = logging.getLogger(__name__)
+
+
+def configure_stdout_utf8() -> None:
+    """Print emoji-laden service logs on Windows consoles; reconfigure() keeps the same stream, so repeat calls are harmless"""
+    if sys.platform == 'win32' and hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+
+
+configure_stdout_utf8()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pydantic validators are already built at import; the remaining lazy work is the OpenAPI
+    # document (JSON schema for every request/response model) and the first pooled DB
+    # connection, so do both before serving instead of on the first request
+    app.openapi()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        logger.warning("[STARTUP] Database warm-up failed: %s", e)
+    yield
+    await integrations.close_jira_client()
+    await close_openai_clients()
+
 app = FastAPI(
     title="TAO SDLC API",
     description="AI-Augmented Software Development Lifecycle Management System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -27,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -1,39 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Boolean
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
-import enum
+from app.enums import PhaseStatus, ApprovalStatus, IntegrationType, WorkflowType  # re-exported
 
-class PhaseStatus(str, enum.Enum):
-    NOT_STARTED = "not_started"
-    IN_PROGRESS = "in_progress"
-    PENDING_APPROVAL = "pending_approval"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-    BLOCKED = "blocked"
-
-class ApprovalStatus(str, enum.Enum):
-    PENDING = "pending"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-    CONDITIONAL = "conditional"
-
-class IntegrationType(str, enum.Enum):
-    JIRA = "jira"
-    GITHUB = "github"
-    GITLAB = "gitlab"
-    CONFLUENCE = "confluence"
-    SLACK = "slack"
-    TEAMS = "teams"
-    JENKINS = "jenkins"
-    CIRCLECI = "circleci"
-
-class WorkflowType(str, enum.Enum):
-    CODE_GENERATION = "code_generation"
-    TEST_GENERATION = "test_generation"
-    DEPLOYMENT = "deployment"
-    DOCUMENTATION = "documentation"
-    CODE_REVIEW = "code_review"
+def _utcnow() -> datetime:
+    """Python-side UTC timestamp; keeps microseconds, unlike SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc)
 
 # Phase configurations
 PHASE_CONFIGS = {
@@ -114,7 +88,11 @@ class Project(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     stakeholders = relationship("ProjectStakeholder", back_populates="project")
-    phases = relationship("Phase", back_populates="project")
+    # Must be eager-loaded explicitly (e.g. joinedload) so accidental N+1 lazy loads fail loudly
+    phases = relationship("Phase", back_populates="project", lazy="raise", order_by="Phase.phase_number")
+    
+    # Keyset pagination of the project list seeks on (created_at, id), newest first
+    __table_args__ = (Index("ix_projects_created_at_id", "created_at", "id"),)
 
 class ProjectStakeholder(Base):
     __tablename__ = "project_stakeholders"
@@ -141,8 +119,9 @@ class Phase(Base):
     end_date = Column(DateTime(timezone=True))
     estimated_hours = Column(Integer)
     actual_hours = Column(Integer)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Microsecond timestamps: the phases ETag/cache version is derived from them (see routers/phases.py)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
     
     project = relationship("Project", back_populates="phases")
     approvals = relationship("Approval", back_populates="phase")
@@ -1,26 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import inspect
 from sqlalchemy.orm.attributes import flag_modified
 from typing import List
 from datetime import datetime
-from app import models, schemas
+from app import models, schemas_in, schemas_out
 from app.database import get_db
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, normalize_risk_analysis
 from app.services.document_parser import DocumentParser
 from app.services.api_spec_parser import APISpecParser
 import tempfile
 import os
 import yaml
 import json
+import orjson
 
 router = APIRouter()
 ai_service = AIService()
 doc_parser = DocumentParser()
 api_spec_parser = APISpecParser()
 
-@router.post("/query", response_model=schemas.AIResponse)
-async def ai_query(query: schemas.AIQuery, db: Session = Depends(get_db)):
+@router.post("/query", response_model=schemas_out.AIResponse)
+async def ai_query(query: schemas_in.AIQuery, db: Session = Depends(get_db)):
     """
     Process AI query for a specific project phase
     """
@@ -48,7 +50,7 @@ async def ai_query(query: schemas.AIQuery, db: Session = Depends(get_db)):
         db.add(interaction)
         db.commit()
         
-        return schemas.AIResponse(
+        return schemas_out.AIResponse(
             response=response["response"],
             confidence_score=response["confidence_score"],
             alternatives=response.get("alternatives", []),
@@ -57,32 +59,16 @@ async def ai_query(query: schemas.AIQuery, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate/{phase_id}")
-async def generate_content(
-    phase_id: int,
-    request_data: dict = Body(...),
-    db: Session = Depends(get_db)
-):
-    """
-    Generate phase-specific content (PRD, FSD, Architecture, etc.)
-    """
-    phase = db.query(models.Phase).filter(models.Phase.id == phase_id).first()
-    if not phase:
-        raise HTTPException(status_code=404, detail="Phase not found")
-    
-    content_type = request_data.get("content_type")
-    if not content_type:
-        raise HTTPException(status_code=400, detail="content_type is required")
-    
-    # Use the data from request (fresh requirements) instead of cached phase data
-    generation_data = {
+def _generation_data(request_data: dict) -> dict:
+    """Use the data from request (fresh requirements) instead of cached phase data"""
+    return {
         "requirements": request_data.get("requirements", []),
         "gherkinRequirements": request_data.get("gherkinRequirements", []),
         "functionalRequirements": request_data.get("functionalRequirements", []),
         "nonFunctionalRequirements": request_data.get("nonFunctionalRequirements", []),
         "businessProposal": request_data.get("businessProposal", {}),
         "extractedStakeholders": request_data.get("extractedStakeholders", []),
-        "extractedRisks": request_data.get("extractedRisks", {}),
+        "extractedRisks": normalize_risk_analysis(request_data.get("extractedRisks", {})),
         "aiNotes": request_data.get("aiNotes", ""),
         "prd": request_data.get("prd"),
         "brd": request_data.get("brd"),
@@ -103,6 +89,8 @@ async def generate_content(
         "lastGeneratedFromPhase1Version": request_data.get("lastGeneratedFromPhase1Version", {}),
         "phase1VersionHistory": request_data.get("phase1VersionHistory", {}),
         "changedContent": request_data.get("changedContent", {}),
+        # Re-generation of existing content: bypass the prompt cache for a fresh draft
+        "regenerate": bool(request_data.get("regenerate", False)),
         # LLD-specific context
         "user_stories": request_data.get("user_stories", []),
         "business_requirements": request_data.get("business_requirements", {}),
@@ -123,6 +111,25 @@ async def generate_content(
         "tech_stack": request_data.get("tech_stack", {}),
         "selected_components": request_data.get("selected_components", []),
     }
+
+@router.post("/generate/{phase_id}")
+async def generate_content(
+    phase_id: int,
+    request_data: dict = Body(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate phase-specific content (PRD, FSD, Architecture, etc.)
+    """
+    phase = db.query(models.Phase).filter(models.Phase.id == phase_id).first()
+    if not phase:
+        raise HTTPException(status_code=404, detail="Phase not found")
+    
+    content_type = request_data.get("content_type")
+    if not content_type:
+        raise HTTPException(status_code=400, detail="content_type is required")
+    
+    generation_data = _generation_data(request_data)
     
     print(f"🔥 [BACKEND] Generate content request for {content_type}:")
     print(f"   - Incremental: {generation_data.get('isIncrementalGeneration')}")
@@ -218,7 +225,7 @@ async def generate_content(
         if content_type in saved_data:
             saved_content = saved_data[content_type]
             if isinstance(saved_content, dict):
-                saved_size = len(json.dumps(saved_content))
+                saved_size = len(orjson.dumps(saved_content))
                 inner_keys = list(saved_content.keys())
                 print(f"   ✅ {content_type} saved! Size: {saved_size} bytes, Keys: {inner_keys}")
             else:
@@ -289,6 +296,33 @@ async def generate_content(
             pass
         raise HTTPException(status_code=500, detail=f"Error generating {content_type}: {str(e)}")
 
+@router.post("/generate/{phase_id}/stream")
+async def stream_generated_document(
+    phase_id: int,
+    request_data: dict = Body(...),
+    by_section: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a generated PRD or BRD as plain text while the model writes it.
+    With ?by_section=true each chunk is a completed document section rather than a raw token delta.
+    Unlike /generate, nothing is persisted here; the client saves the finished document via the phase update.
+    """
+    phase = db.query(models.Phase).filter(models.Phase.id == phase_id).first()
+    if not phase:
+        raise HTTPException(status_code=404, detail="Phase not found")
+    
+    content_type = request_data.get("content_type")
+    if content_type not in ("prd", "brd"):
+        raise HTTPException(status_code=400, detail="content_type must be 'prd' or 'brd'")
+    
+    return StreamingResponse(
+        ai_service.stream_document(content_type, _generation_data(request_data), by_section),
+        media_type="text/plain",
+        # Keep reverse proxies (nginx, ngrok) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/extract-requirements")
 async def extract_requirements(
     files: List[UploadFile] = File(...),
@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
-from app import models, schemas
+from app import models, schemas_in, schemas_out
 from app.database import get_db
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Approval)
-def create_approval(approval: schemas.ApprovalCreate, db: Session = Depends(get_db)):
+def _approvals_response(approvals: List[models.Approval]) -> Response:
+    structs = [
+        schemas_out.ApprovalStruct(
+            id=approval.id,
+            phase_id=approval.phase_id,
+            approver_id=approval.approver_id,
+            status=approval.status,
+            comments=approval.comments,
+            created_at=schemas_out.epoch_ms(approval.created_at)
+        )
+        for approval in approvals
+    ]
+    return Response(content=schemas_out.encode_json(structs), media_type="application/json")
+
+@router.post("/", response_model=schemas_out.Approval)
+def create_approval(approval: schemas_in.ApprovalCreate, db: Session = Depends(get_db)):
     db_approval = models.Approval(
         phase_id=approval.phase_id,
         approver_id=approval.approver_id,
@@ -19,23 +33,23 @@ def create_approval(approval: schemas.ApprovalCreate, db: Session = Depends(get_
     db.refresh(db_approval)
     return db_approval
 
-@router.get("/phase/{phase_id}", response_model=List[schemas.Approval])
+@router.get("/phase/{phase_id}", response_model=List[schemas_out.Approval])
 def get_phase_approvals(phase_id: int, db: Session = Depends(get_db)):
     approvals = db.query(models.Approval).filter(models.Approval.phase_id == phase_id).all()
-    return approvals
+    return _approvals_response(approvals)
 
-@router.get("/pending/{user_id}", response_model=List[schemas.Approval])
+@router.get("/pending/{user_id}", response_model=List[schemas_out.Approval])
 def get_pending_approvals(user_id: int, db: Session = Depends(get_db)):
     approvals = db.query(models.Approval).filter(
         models.Approval.approver_id == user_id,
         models.Approval.status == models.ApprovalStatus.PENDING
     ).all()
-    return approvals
+    return _approvals_response(approvals)
 
-@router.put("/{approval_id}", response_model=schemas.Approval)
+@router.put("/{approval_id}", response_model=schemas_out.Approval)
 def update_approval(
     approval_id: int,
-    approval_update: schemas.ApprovalUpdate,
+    approval_update: schemas_in.ApprovalUpdate,
     db: Session = Depends(get_db)
 ):
     approval = db.query(models.Approval).filter(models.Approval.id == approval_id).first()
@@ -43,7 +57,7 @@ def update_approval(
         raise HTTPException(status_code=404, detail="Approval not found")
     
     approval.status = approval_update.status
-    if approval_update.comments:
+    if "comments" in approval_update.model_fields_set and approval_update.comments is not None:
         approval.comments = approval_update.comments
     approval.approved_at = datetime.now()
     
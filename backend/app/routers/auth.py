@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 import bcrypt
-from app import models, schemas
+import functools
+import logging
+import time
+from app import models, schemas_in, schemas_out
 from app.database import get_db
 import os
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # Security configuration
@@ -22,33 +29,39 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 DEMO_USERNAME = "demo@tao.com"
 DEMO_PASSWORD = "demo123"
 
+# New hashes use argon2id; legacy bcrypt hashes ($2a$/$2b$/$2y$) are still accepted
+# and transparently upgraded on the next successful login
+_PH = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith(BCRYPT_PREFIXES)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password using bcrypt directly"""
+    """Verify a plain password against an argon2id or legacy bcrypt hash"""
     try:
-        # Truncate password to 72 bytes for bcrypt compatibility
-        password_bytes = plain_password.encode('utf-8')
-        if len(password_bytes) > 72:
-            password_bytes = password_bytes[:72]
+        if _is_bcrypt_hash(hashed_password):
+            # Truncate password to 72 bytes for bcrypt compatibility
+            password_bytes = plain_password.encode('utf-8')
+            if len(password_bytes) > 72:
+                password_bytes = password_bytes[:72]
+            return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
         
-        # Convert hashed_password string to bytes
-        hashed_bytes = hashed_password.encode('utf-8')
-        
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        return _PH.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
     except Exception as e:
-        # Handle bcrypt errors gracefully
-        print(f"Password verification error: {e}")
+        # Handle bcrypt/argon2 errors gracefully
+        logger.warning("Password verification error: %s", e)
         return False
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash is legacy bcrypt or uses outdated argon2 parameters"""
+    return _is_bcrypt_hash(hashed_password) or _PH.check_needs_rehash(hashed_password)
+
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly"""
-    # Truncate password to 72 bytes for bcrypt compatibility
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    """Hash a password using argon2id"""
+    return _PH.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -68,10 +81,23 @@ def authenticate_user(db: Session, username: str, password: str):
     ).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not user.hashed_password or not verify_password(password, user.hashed_password):
         return False
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = get_password_hash(password)
+        db.commit()
     return user
 
+@functools.lru_cache(maxsize=1024)
+def _decode_token(token: str) -> Tuple[Optional[str], Optional[float]]:
+    """Verify the token signature once per distinct token and cache its (sub, exp) claims.
+
+    Expiry is deliberately not verified here (the result is cached); callers check exp.
+    Invalid tokens raise JWTError and are not cached.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+    return payload.get("sub"), payload.get("exp")
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Get the current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -80,10 +106,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+        username, expires_at = _decode_token(token)
         if username is None:
             raise credentials_exception
+        if expires_at is not None and expires_at < time.time():
+            raise credentials_exception
     except JWTError:
         raise credentials_exception
     
@@ -92,8 +119,31 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return user
 
-@router.post("/signup", response_model=schemas.AuthResponse)
-def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
+def _to_user_struct(user: models.User) -> schemas_out.UserStruct:
+    return schemas_out.UserStruct(
+        email=user.email,
+        username=user.username,
+        full_name=user.full_name,
+        role=user.role,
+        id=user.id,
+        created_at=schemas_out.epoch_ms(user.created_at)
+    )
+
+def _auth_response(user: models.User) -> Response:
+    """Issue an access token for user and encode the AuthResponse body directly with msgspec"""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username}, expires_delta=access_token_expires
+    )
+    body = schemas_out.AuthResponseStruct(
+        access_token=access_token,
+        token_type="bearer",
+        user=_to_user_struct(user),
+    )
+    return Response(content=schemas_out.encode_json(body), media_type="application/json")
+
+@router.post("/signup", response_model=schemas_out.AuthResponse)
+def signup(user_data: schemas_in.UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
     existing_user = db.query(models.User).filter(
@@ -118,7 +168,7 @@ def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        role=user_data.role or "Developer",
+        role=user_data.role,
         hashed_password=hashed_password
     )
     db.add(db_user)
@@ -126,18 +176,9 @@ def signup(user_data: schemas.UserSignup, db: Session = Depends(get_db)):
     db.refresh(db_user)
     
     # Create access token
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": db_user
-    }
+    return _auth_response(db_user)
 
-@router.post("/login", response_model=schemas.AuthResponse)
+@router.post("/login", response_model=schemas_out.AuthResponse)
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login with username/email and password"""
     user = authenticate_user(db, form_data.username, form_data.password)
@@ -148,19 +189,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
-
-@router.post("/login/json", response_model=schemas.AuthResponse)
-def login_json(credentials: schemas.LoginRequest, db: Session = Depends(get_db)):
+    return _auth_response(user)
+
+@router.post("/login/json", response_model=schemas_out.AuthResponse)
+def login_json(credentials: schemas_in.LoginRequest, db: Session = Depends(get_db)):
     """Login with JSON payload (username/email and password)"""
     user = authenticate_user(db, credentials.username, credentials.password)
     if not user:
@@ -169,18 +201,9 @@ def login_json(credentials: schemas.LoginRequest, db: Session = Depends(get_db))
             detail="Incorrect username or password",
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return _auth_response(user)
 
-@router.post("/demo", response_model=schemas.AuthResponse)
+@router.post("/demo", response_model=schemas_out.AuthResponse)
 def demo_login(db: Session = Depends(get_db)):
     """Login with demo account"""
     user = authenticate_user(db, DEMO_USERNAME, DEMO_PASSWORD)
@@ -190,18 +213,9 @@ def demo_login(db: Session = Depends(get_db)):
             detail="Demo account not found. Please run the seed script."
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return _auth_response(user)
 
-@router.get("/me", response_model=schemas.User)
+@router.get("/me", response_model=schemas_out.User)
 async def get_me(current_user: models.User = Depends(get_current_user)):
     """Get current user information"""
     return current_user
@@ -5,16 +5,108 @@ Handles export of epics and user stories to JIRA
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import requests
-import base64
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import functools
+import logging
+import re
+import time
+import httpx
 from datetime import datetime
 
 from ..database import get_db
 from ..models import Phase, Project
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["integrations"])
 
+# Shared async HTTP/2 client for Atlassian calls: pooled TLS connections per host for the
+# process lifetime; requests awaited concurrently (asyncio.gather) are multiplexed over them
+_JIRA = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+    timeout=15,
+    follow_redirects=True
+)
+
+
+async def close_jira_client() -> None:
+    """Close the pooled JIRA connections; called from the app lifespan on shutdown"""
+    await _JIRA.aclose()
+
+JIRA_JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Accept': 'application/json'
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _jira_auth(email: str, api_token: str) -> httpx.BasicAuth:
+    """Basic auth for a JIRA credential pair; the base64 header is built once per pair"""
+    return httpx.BasicAuth(email, api_token)
+
+
+# Negative cache for JIRA sites whose connection probe failed recently, so dashboard
+# polling does not keep hammering a dead or overloaded Atlassian site. Only site-level
+# failures (410 Gone, 5xx, connection errors) are cached, so entries are keyed by URL alone;
+# auth failures (401/403) depend on the credential and are never cached
+DEAD_SITE_TTL_SECONDS = 30
+DEAD_SITE_MAX_ENTRIES = 1024
+_dead_sites: Dict[str, Tuple[float, str]] = {}
+
+
+def _get_dead_site_error(jira_url: str) -> Optional[str]:
+    """Return the cached failure reason for a site, or None if it is not marked dead"""
+    entry = _dead_sites.get(jira_url)
+    if entry is None:
+        return None
+    expires_at, error = entry
+    if time.monotonic() >= expires_at:
+        _dead_sites.pop(jira_url, None)
+        return None
+    return error
+
+
+def _is_site_failure(error: httpx.HTTPError) -> bool:
+    """True for failures of the site itself rather than of the request or credential"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 410 or status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _mark_dead_site(jira_url: str, error: str) -> None:
+    if len(_dead_sites) >= DEAD_SITE_MAX_ENTRIES:
+        _dead_sites.clear()
+    _dead_sites[jira_url] = (time.monotonic() + DEAD_SITE_TTL_SECONDS, error)
+
+
+async def _jira_search_total(jira_url: str, auth: httpx.BasicAuth, jql: str, timeout: float) -> int:
+    """Issue count for a JQL query; maxResults=0 makes JIRA return only the total"""
+    response = await _JIRA.get(
+        f"{jira_url}/rest/api/3/search",
+        headers=JIRA_JSON_HEADERS,
+        auth=auth,
+        params={
+            "jql": jql,
+            "maxResults": 0,
+            "fields": "key"
+        },
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json().get('total', 0)
+
+
+def _count_or_zero(result, label: str) -> int:
+    """Unwrap a gathered issue count; failures are reported and count as 0 (410s are handled by the caller)"""
+    if isinstance(result, BaseException):
+        if not (isinstance(result, httpx.HTTPStatusError) and result.response.status_code == 410):
+            logger.warning("Error fetching %s: %s", label, result)
+        return 0
+    return result
+
 
 class JiraConfig(BaseModel):
     url: str
@@ -73,6 +165,10 @@ class JiraProjectsResponse(BaseModel):
     error: Optional[str] = None
 
 
+# Runs of characters that are not letters or digits (\W plus underscore)
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+
 def sanitize_project_key(key: str) -> str:
     """
     Sanitize a project key to meet JIRA requirements:
@@ -81,7 +177,7 @@ def sanitize_project_key(key: str) -> str:
     - No spaces or special characters
     """
     # Remove all non-alphanumeric characters
-    key = ''.join(c for c in key if c.isalnum())
+    key = _NON_ALNUM_RE.sub('', key)
     
     # Convert to uppercase
     key = key.upper()
@@ -110,7 +206,7 @@ def generate_project_key(project_name: str) -> str:
     - "TEST PROJECT" -> "TP"
     """
     # Remove special characters and split into words
-    words = ''.join(c if c.isalnum() or c.isspace() else ' ' for c in project_name).split()
+    words = _NON_ALNUM_RE.sub(' ', project_name).split()
     
     if not words:
         return "PROJ"
@@ -164,26 +260,19 @@ async def export_to_jira(
         
         # Setup JIRA authentication
         jira_url = request.jira_config.url.rstrip('/')
-        auth_string = f"{request.jira_config.email}:{request.jira_config.api_token}"
-        auth_bytes = auth_string.encode('ascii')
-        base64_bytes = base64.b64encode(auth_bytes)
-        base64_auth = base64_bytes.decode('ascii')
-        
-        headers = {
-            'Authorization': f'Basic {base64_auth}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
+        auth = _jira_auth(request.jira_config.email, request.jira_config.api_token)
         
         # Test JIRA connection
         try:
-            test_response = requests.get(
+            test_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/myself",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 timeout=10
             )
             test_response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+            _dead_sites.pop(jira_url, None)  # The site answered, so it is not dead
+        except httpx.HTTPError as e:
             return JiraExportResponse(
                 success=False,
                 message="Failed to connect to JIRA",
@@ -208,9 +297,10 @@ async def export_to_jira(
         
         # Check if project exists
         try:
-            project_check_response = requests.get(
+            project_check_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/project/{project_key_to_use}",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 timeout=10
             )
             
@@ -227,9 +317,10 @@ async def export_to_jira(
                     "leadAccountId": test_response.json().get('accountId')  # Use current user as lead
                 }
                 
-                create_response = requests.post(
+                create_response = await _JIRA.post(
                     f"{jira_url}/rest/api/3/project",
-                    headers=headers,
+                    headers=JIRA_JSON_HEADERS,
+                    auth=auth,
                     json=create_project_data,
                     timeout=30
                 )
@@ -268,9 +359,10 @@ async def export_to_jira(
         
         try:
             # Use the createmeta API - this shows exactly what can be created
-            createmeta_response = requests.get(
+            createmeta_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/issue/createmeta",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 params={
                     'projectKeys': project_key_to_use,
                     'expand': 'projects.issuetypes'
@@ -372,9 +464,10 @@ async def export_to_jira(
                 # Try to add priority - but don't fail if it's not available
                 # Priority is optional and may not be on all JIRA screens
                 
-                response = requests.post(
+                response = await _JIRA.post(
                     f"{jira_url}/rest/api/3/issue",
-                    headers=headers,
+                    headers=JIRA_JSON_HEADERS,
+                    auth=auth,
                     json=epic_data,
                     timeout=30
                 )
@@ -455,9 +548,10 @@ async def export_to_jira(
                 if epic_id and epic_id in epic_mapping:
                     story_data["fields"]["parent"] = {"key": epic_mapping[epic_id]}
                 
-                response = requests.post(
+                response = await _JIRA.post(
                     f"{jira_url}/rest/api/3/issue",
-                    headers=headers,
+                    headers=JIRA_JSON_HEADERS,
+                    auth=auth,
                     json=story_data,
                     timeout=30
                 )
@@ -570,26 +664,19 @@ async def get_jira_projects(request: JiraStatsRequest):
     try:
         # Setup JIRA authentication
         jira_url = request.url.rstrip('/')
-        auth_string = f"{request.email}:{request.api_token}"
-        auth_bytes = auth_string.encode('ascii')
-        base64_bytes = base64.b64encode(auth_bytes)
-        base64_auth = base64_bytes.decode('ascii')
-        
-        headers = {
-            'Authorization': f'Basic {base64_auth}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
+        auth = _jira_auth(request.email, request.api_token)
         
         # Test JIRA connection first
         try:
-            test_response = requests.get(
+            test_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/myself",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 timeout=10
             )
             test_response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+            _dead_sites.pop(jira_url, None)  # The site answered, so it is not dead
+        except httpx.HTTPError as e:
             return JiraProjectsResponse(
                 success=False,
                 projects=[],
@@ -598,9 +685,10 @@ async def get_jira_projects(request: JiraStatsRequest):
         
         # Get all accessible projects
         try:
-            projects_response = requests.get(
+            projects_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/project/search",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 params={"expand": "description,lead"},
                 timeout=15
             )
@@ -624,95 +712,20 @@ async def get_jira_projects(request: JiraStatsRequest):
             if request.project_key and project_key != request.project_key:
                 continue
             
-            # Get total issues
-            total_issues = 0
-            try:
-                issues_response = requests.get(
-                    f"{jira_url}/rest/api/3/search",
-                    headers=headers,
-                    params={
-                        "jql": f"project = {project_key}",
-                        "maxResults": 0,
-                        "fields": "key"
-                    },
-                    timeout=10
-                )
-                issues_response.raise_for_status()
-                total_issues = issues_response.json().get('total', 0)
-            except:
-                pass
-            
-            # Get in-progress issues
-            in_progress = 0
-            try:
-                in_progress_response = requests.get(
-                    f"{jira_url}/rest/api/3/search",
-                    headers=headers,
-                    params={
-                        "jql": f"project = {project_key} AND status IN ('In Progress', 'In Development', 'In Review')",
-                        "maxResults": 0,
-                        "fields": "key"
-                    },
-                    timeout=10
-                )
-                in_progress_response.raise_for_status()
-                in_progress = in_progress_response.json().get('total', 0)
-            except:
-                pass
-            
-            # Get completed issues
-            completed = 0
-            try:
-                completed_response = requests.get(
-                    f"{jira_url}/rest/api/3/search",
-                    headers=headers,
-                    params={
-                        "jql": f"project = {project_key} AND status IN ('Done', 'Closed', 'Resolved', 'Complete')",
-                        "maxResults": 0,
-                        "fields": "key"
-                    },
-                    timeout=10
-                )
-                completed_response.raise_for_status()
-                completed = completed_response.json().get('total', 0)
-            except:
-                pass
-            
-            # Get epic count
-            epic_count = 0
-            try:
-                epic_response = requests.get(
-                    f"{jira_url}/rest/api/3/search",
-                    headers=headers,
-                    params={
-                        "jql": f"project = {project_key} AND type = Epic",
-                        "maxResults": 0,
-                        "fields": "key"
-                    },
-                    timeout=10
-                )
-                epic_response.raise_for_status()
-                epic_count = epic_response.json().get('total', 0)
-            except:
-                pass
-            
-            # Get story count
-            story_count = 0
-            try:
-                story_response = requests.get(
-                    f"{jira_url}/rest/api/3/search",
-                    headers=headers,
-                    params={
-                        "jql": f"project = {project_key} AND type = Story",
-                        "maxResults": 0,
-                        "fields": "key"
-                    },
-                    timeout=10
-                )
-                story_response.raise_for_status()
-                story_count = story_response.json().get('total', 0)
-            except:
-                pass
+            # Issue counts are independent queries, so run them concurrently; a failed one counts as 0
+            total_issues, in_progress, completed, epic_count, story_count = await asyncio.gather(
+                _jira_search_total(jira_url, auth, f"project = {project_key}", 10),
+                _jira_search_total(jira_url, auth, f"project = {project_key} AND status IN ('In Progress', 'In Development', 'In Review')", 10),
+                _jira_search_total(jira_url, auth, f"project = {project_key} AND status IN ('Done', 'Closed', 'Resolved', 'Complete')", 10),
+                _jira_search_total(jira_url, auth, f"project = {project_key} AND type = Epic", 10),
+                _jira_search_total(jira_url, auth, f"project = {project_key} AND type = Story", 10),
+                return_exceptions=True
+            )
+            total_issues = _count_or_zero(total_issues, f"{project_key} total issues")
+            in_progress = _count_or_zero(in_progress, f"{project_key} in-progress issues")
+            completed = _count_or_zero(completed, f"{project_key} completed issues")
+            epic_count = _count_or_zero(epic_count, f"{project_key} epics")
+            story_count = _count_or_zero(story_count, f"{project_key} stories")
             
             detailed_projects.append(JiraProjectDetail(
                 key=project_key,
@@ -750,58 +763,64 @@ async def get_jira_stats(request: JiraStatsRequest):
     try:
         # Setup JIRA authentication
         jira_url = request.url.rstrip('/')
-        auth_string = f"{request.email}:{request.api_token}"
-        auth_bytes = auth_string.encode('ascii')
-        base64_bytes = base64.b64encode(auth_bytes)
-        base64_auth = base64_bytes.decode('ascii')
+        auth = _jira_auth(request.email, request.api_token)
         
-        headers = {
-            'Authorization': f'Basic {base64_auth}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
+        # Short-circuit sites that failed the connection probe within the last few seconds
+        dead_site_error = _get_dead_site_error(jira_url)
+        if dead_site_error:
+            return JiraStatsResponse(
+                success=False,
+                projects=0,
+                issues=0,
+                in_progress=0,
+                completed=0,
+                error=f"{dead_site_error} (cached)"
+            )
         
         # Test JIRA connection first
         try:
-            test_response = requests.get(
+            test_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/myself",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 timeout=10
             )
             test_response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+            _dead_sites.pop(jira_url, None)  # The site answered, so it is not dead
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 410:
-                return JiraStatsResponse(
-                    success=False,
-                    projects=0,
-                    issues=0,
-                    in_progress=0,
-                    completed=0,
-                    error=f"Jira site is no longer available (410 Gone). The Atlassian site '{jira_url}' may have been deleted or moved. Please verify your Jira URL and ensure the site is still active."
-                )
+                error = f"Jira site is no longer available (410 Gone). The Atlassian site '{jira_url}' may have been deleted or moved. Please verify your Jira URL and ensure the site is still active."
+            else:
+                error = f"JIRA connection error ({e.response.status_code}): {str(e)}"
+            if _is_site_failure(e):
+                _mark_dead_site(jira_url, error)
             return JiraStatsResponse(
                 success=False,
                 projects=0,
                 issues=0,
                 in_progress=0,
                 completed=0,
-                error=f"JIRA connection error ({e.response.status_code}): {str(e)}"
+                error=error
             )
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
+            error = f"JIRA connection error: {str(e)}"
+            if _is_site_failure(e):
+                _mark_dead_site(jira_url, error)
             return JiraStatsResponse(
                 success=False,
                 projects=0,
                 issues=0,
                 in_progress=0,
                 completed=0,
-                error=f"JIRA connection error: {str(e)}"
+                error=error
             )
         
         # Get all accessible projects
         try:
-            projects_response = requests.get(
+            projects_response = await _JIRA.get(
                 f"{jira_url}/rest/api/3/project/search",
-                headers=headers,
+                headers=JIRA_JSON_HEADERS,
+                auth=auth,
                 timeout=10
             )
             projects_response.raise_for_status()
@@ -817,86 +836,32 @@ async def get_jira_stats(request: JiraStatsRequest):
         else:
             jql_base = ""
         
-        # Get total issues
-        total_issues = 0
-        try:
-            issues_jql = jql_base if jql_base else "ORDER BY created DESC"
-            issues_response = requests.get(
-                f"{jira_url}/rest/api/3/search",
-                headers=headers,
-                params={
-                    "jql": issues_jql,
-                    "maxResults": 0,  # We only need the count
-                    "fields": "key"
-                },
-                timeout=15
-            )
-            issues_response.raise_for_status()
-            total_issues = issues_response.json().get('total', 0)
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 410:
-                print(f"⚠️ Jira site appears to be deleted or unavailable (410 Gone): {jira_url}")
-                return JiraStatsResponse(
-                    success=False,
-                    projects=0,
-                    issues=0,
-                    in_progress=0,
-                    completed=0,
-                    error="Jira site is no longer available (410 Gone). The site may have been deleted or moved. Please verify your Jira URL."
-                )
-            print(f"Error fetching total issues: {str(e)}")
-        except Exception as e:
-            print(f"Error fetching total issues: {str(e)}")
-        
-        # Get in-progress issues
-        in_progress = 0
-        try:
-            in_progress_jql = f"{jql_base} AND status IN ('In Progress', 'In Development', 'In Review')" if jql_base else "status IN ('In Progress', 'In Development', 'In Review')"
-            in_progress_response = requests.get(
-                f"{jira_url}/rest/api/3/search",
-                headers=headers,
-                params={
-                    "jql": in_progress_jql,
-                    "maxResults": 0,
-                    "fields": "key"
-                },
-                timeout=15
-            )
-            in_progress_response.raise_for_status()
-            in_progress = in_progress_response.json().get('total', 0)
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 410:
-                # Already handled above, skip
-                pass
-            else:
-                print(f"Error fetching in-progress issues: {str(e)}")
-        except Exception as e:
-            print(f"Error fetching in-progress issues: {str(e)}")
+        # The three issue counts are independent queries, so run them concurrently
+        issues_jql = jql_base if jql_base else "ORDER BY created DESC"
+        in_progress_jql = f"{jql_base} AND status IN ('In Progress', 'In Development', 'In Review')" if jql_base else "status IN ('In Progress', 'In Development', 'In Review')"
+        completed_jql = f"{jql_base} AND status IN ('Done', 'Closed', 'Resolved', 'Complete')" if jql_base else "status IN ('Done', 'Closed', 'Resolved', 'Complete')"
+        total_issues, in_progress, completed = await asyncio.gather(
+            _jira_search_total(jira_url, auth, issues_jql, 15),
+            _jira_search_total(jira_url, auth, in_progress_jql, 15),
+            _jira_search_total(jira_url, auth, completed_jql, 15),
+            return_exceptions=True
+        )
         
-        # Get completed issues
-        completed = 0
-        try:
-            completed_jql = f"{jql_base} AND status IN ('Done', 'Closed', 'Resolved', 'Complete')" if jql_base else "status IN ('Done', 'Closed', 'Resolved', 'Complete')"
-            completed_response = requests.get(
-                f"{jira_url}/rest/api/3/search",
-                headers=headers,
-                params={
-                    "jql": completed_jql,
-                    "maxResults": 0,
-                    "fields": "key"
-                },
-                timeout=15
+        if isinstance(total_issues, httpx.HTTPStatusError) and total_issues.response.status_code == 410:
+            print(f"⚠️ Jira site appears to be deleted or unavailable (410 Gone): {jira_url}")
+            error = "Jira site is no longer available (410 Gone). The site may have been deleted or moved. Please verify your Jira URL."
+            _mark_dead_site(jira_url, error)
+            return JiraStatsResponse(
+                success=False,
+                projects=0,
+                issues=0,
+                in_progress=0,
+                completed=0,
+                error=error
             )
-            completed_response.raise_for_status()
-            completed = completed_response.json().get('total', 0)
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 410:
-                # Already handled above, skip
-                pass
-            else:
-                print(f"Error fetching completed issues: {str(e)}")
-        except Exception as e:
-            print(f"Error fetching completed issues: {str(e)}")
+        total_issues = _count_or_zero(total_issues, "total issues")
+        in_progress = _count_or_zero(in_progress, "in-progress issues")
+        completed = _count_or_zero(completed, "completed issues")
         
         return JiraStatsResponse(
             success=True,
@@ -1,52 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import hashlib
+import logging
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import JSON, cast, func, literal, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, joinedload
 from typing import List
-from app import models, schemas
+from app import models, schemas_in, schemas_out
+from app.cache import cache_get, cache_set
 from app.database import get_db
 from app.services.ai_service import AIService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+PHASES_CACHE_TTL_SECONDS = 600
+# Browsers must revalidate (cheap 304 via ETag) because pages re-fetch right after update_phase
+PHASES_CACHE_CONTROL = "private, no-cache"
+
+def _json_response(payload, headers=None) -> Response:
+    """Encode payload with orjson directly, skipping FastAPI's jsonable_encoder walk over phase.data"""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _phase_response(phase: models.Phase) -> Response:
+    return _json_response({
+        "id": phase.id,
+        "project_id": phase.project_id,
+        "phase_number": phase.phase_number,
+        "phase_name": phase.phase_name,
+        "status": phase.status,
+        "data": phase.data or {},
+        "ai_confidence_score": phase.ai_confidence_score or 0,
+        "created_at": schemas_out.epoch_ms(phase.created_at)
+    })
+
+def _phase_metadata(db: Session, project_id: int, project_name: str) -> List[dict]:
+    """Phase rows for a project without the (potentially large) phase.data blobs"""
+    rows = db.query(
+        models.Phase.id,
+        models.Phase.project_id,
+        models.Phase.phase_number,
+        models.Phase.phase_name,
+        models.Phase.status,
+        models.Phase.ai_confidence_score,
+        models.Phase.created_at
+    ).filter(
+        models.Phase.project_id == project_id
+    ).order_by(models.Phase.phase_number).all()
+    return [
+        {
+            "id": row.id,
+            "project_id": row.project_id,
+            "project_name": project_name,
+            "phase_number": row.phase_number,
+            "phase_name": row.phase_name,
+            "status": row.status,
+            "ai_confidence_score": row.ai_confidence_score or 0,
+            "created_at": schemas_out.epoch_ms(row.created_at)
+        }
+        for row in rows
+    ]
+
 @router.get("/project/{project_id}")
-def get_project_phases(project_id: int, db: Session = Depends(get_db)):
-    import json
-    print(f"\n📥 [GET_PHASES] Querying phases for project_id={project_id}")
+def get_project_phases(project_id: int, request: Request, include_data: bool = True, db: Session = Depends(get_db)):
+    logger.debug("[GET_PHASES] Querying phases for project_id=%s include_data=%s", project_id, include_data)
     
-    # Get project details
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    project_name = project.name if project else f"Project {project_id}"
+    if not include_data:
+        # Metadata only: skip loading and re-encoding the (potentially large) phase.data blobs
+        project_name = db.query(models.Project.name).filter(models.Project.id == project_id).scalar()
+        project_name = project_name or f"Project {project_id}"
+        return _json_response(_phase_metadata(db, project_id, project_name))
     
-    phases = db.query(models.Phase).filter(
-        models.Phase.project_id == project_id
-    ).order_by(models.Phase.phase_number).all()
+    # Cheap version probe: any phase insert/update changes the count or the latest (microsecond)
+    # timestamp and a rename changes the project name, so the cache key and ETag invalidate
+    # themselves without relying on the TTL
+    project_name_subquery = db.query(models.Project.name).filter(
+        models.Project.id == project_id
+    ).scalar_subquery()
+    phase_count, last_modified, current_name = db.query(
+        func.count(models.Phase.id),
+        func.max(func.coalesce(models.Phase.updated_at, models.Phase.created_at)),
+        project_name_subquery
+    ).filter(models.Phase.project_id == project_id).one()
+    version = f"{project_id}:{phase_count}:{last_modified.isoformat() if last_modified else ''}:{current_name or ''}"
+    version_hash = hashlib.sha1(version.encode()).hexdigest()
+    cache_key = f"phases:{project_id}:{version_hash}"
+    etag = '"%s"' % version_hash
+    headers = {"ETag": etag, "Cache-Control": PHASES_CACHE_CONTROL}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.debug("[GET_PHASES] Cache hit for %s", cache_key)
+        return Response(content=cached, media_type="application/json", headers=headers)
+    
+    # Get project details and its phases (ordered by phase_number) in a single round trip
+    project = db.query(models.Project).options(
+        joinedload(models.Project.phases)
+    ).filter(models.Project.id == project_id).first()
+    project_name = project.name if project else f"Project {project_id}"
+    phases = project.phases if project else []
     
-    print(f"📥 [GET_PHASES] Found {len(phases)} phases")
+    logger.debug("[GET_PHASES] Found %d phases", len(phases))
 
     # Convert to dicts to ensure proper JSON serialization
     result = []
     for phase in phases:
-        print(f"📥 [GET_PHASES] Processing phase_id={phase.id}, phase_number={phase.phase_number}")
-        
         # Convert string JSON to dict if needed
         phase_data = phase.data
         if isinstance(phase_data, str):
             try:
-                phase_data = json.loads(phase_data)
-                print(f"✅ [GET_PHASES] Converted phase {phase.id} data from string to dict")
+                phase_data = orjson.loads(phase_data)
             except Exception as e:
-                print(f"❌ [GET_PHASES] Failed to parse phase.data: {e}")
+                logger.warning("[GET_PHASES] Failed to parse phase.data for phase %s: %s", phase.id, e)
                 phase_data = {}
         
         if phase_data is None:
             phase_data = {}
         
         # Debug Phase 3
-        if phase.phase_number == 3:
-            print(f"🔍 [GET_PHASES] Phase 3 data keys: {list(phase_data.keys())}")
-            print(f"🔍 [GET_PHASES] Phase 3 has architecture: {'architecture' in phase_data}")
+        if phase.phase_number == 3 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[GET_PHASES] Phase 3 data keys: %s", list(phase_data.keys()))
             if 'architecture' in phase_data:
                 arch = phase_data.get('architecture', {})
-                print(f"🔍 [GET_PHASES] Phase 3 architecture keys: {list(arch.keys()) if isinstance(arch, dict) else 'NOT_DICT'}")
+                logger.debug("[GET_PHASES] Phase 3 architecture keys: %s", list(arch.keys()) if isinstance(arch, dict) else 'NOT_DICT')
         
         # Create response dict
         phase_dict = {
@@ -58,12 +139,28 @@ def get_project_phases(project_id: int, db: Session = Depends(get_db)):
             "status": phase.status,
             "data": phase_data,
             "ai_confidence_score": phase.ai_confidence_score or 0,
-            "created_at": phase.created_at.isoformat() if phase.created_at else None
+            "created_at": schemas_out.epoch_ms(phase.created_at)
         }
         result.append(phase_dict)
 
-    print(f"✅ [GET_PHASES] Returning {len(result)} phases with project_name='{project_name}'\n")
-    return result
+    logger.debug("[GET_PHASES] Returning %d phases with project_name=%r", len(result), project_name)
+    response = _json_response(result, headers)
+    cache_set(cache_key, response.body, PHASES_CACHE_TTL_SECONDS)
+    return response
+
+def _apply_data_patch(db: Session, phase: models.Phase, patch: dict) -> None:
+    """Shallow-merge patch keys into phase.data without rewriting the whole blob from Python"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Server-side jsonb || merge: only the patch keys travel over the wire
+        merged = func.coalesce(cast(models.Phase.data, JSONB), cast("{}", JSONB)).op("||")(literal(patch, JSONB))
+        db.execute(
+            update(models.Phase)
+            .where(models.Phase.id == phase.id)
+            .values(data=cast(merged, JSON))
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        phase.data = {**(phase.data or {}), **patch}
 
 @router.get("/{phase_id}")
 def get_phase(phase_id: int, db: Session = Depends(get_db)):
@@ -71,54 +168,46 @@ def get_phase(phase_id: int, db: Session = Depends(get_db)):
     if not phase:
         raise HTTPException(status_code=404, detail="Phase not found")
     
-    # Return as dict to ensure proper JSON serialization
-    return {
-        "id": phase.id,
-        "project_id": phase.project_id,
-        "phase_number": phase.phase_number,
-        "phase_name": phase.phase_name,
-        "status": phase.status,
-        "data": phase.data or {},
-        "ai_confidence_score": phase.ai_confidence_score or 0,
-        "created_at": phase.created_at.isoformat() if phase.created_at else None
-    }
+    return _phase_response(phase)
 
 @router.put("/{phase_id}")
 def update_phase(
     phase_id: int,
-    phase_update: schemas.PhaseUpdate,
+    phase_update: schemas_in.PhaseUpdate,
     db: Session = Depends(get_db)
 ):
-    import json
-    
     phase = db.query(models.Phase).filter(models.Phase.id == phase_id).first()
     if not phase:
         raise HTTPException(status_code=404, detail="Phase not found")
     
-    print(f"\n🔄 [UPDATE_PHASE] ============ UPDATE STARTED ============")
-    print(f"🔄 [UPDATE_PHASE] phase_id={phase_id}, status={phase.status}")
+    logger.debug("[UPDATE_PHASE] phase_id=%s, status=%s", phase_id, phase.status)
+    
+    # Partial update: only fields present (and non-null) in the request body are applied
+    updates = {field: value for field in phase_update.model_fields_set if (value := getattr(phase_update, field)) is not None}
+    new_status = updates.get("status")
     
     # Track if this phase is being approved
-    is_being_approved = phase_update.status == models.PhaseStatus.APPROVED and phase.status != models.PhaseStatus.APPROVED
+    is_being_approved = new_status == models.PhaseStatus.APPROVED and phase.status != models.PhaseStatus.APPROVED
     
-    if phase_update.status:
-        print(f"🔄 [UPDATE_PHASE] Setting status: {phase.status} → {phase_update.status}")
-        phase.status = phase_update.status
+    if new_status:
+        logger.debug("[UPDATE_PHASE] Setting status: %s -> %s", phase.status, new_status)
+        phase.status = new_status
     
-    if phase_update.data:
-        print(f"🔄 [UPDATE_PHASE] Updating phase data with keys: {list(phase_update.data.keys())}")
-        print(f"🔄 [UPDATE_PHASE] Incoming data has 'architecture'? {'architecture' in phase_update.data}")
-        print(f"🔄 [UPDATE_PHASE] Incoming architecture type: {type(phase_update.data.get('architecture'))}")
+    if "data" in updates:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[UPDATE_PHASE] Updating phase data with keys: %s", list(updates["data"].keys()))
         
         # IMPORTANT: Always replace the entire data dict to ensure clean state
-        phase.data = dict(phase_update.data)  # Create a copy
-        
-        print(f"✅ [UPDATE_PHASE] After set - phase.data has 'architecture': {'architecture' in phase.data if phase.data else False}")
-        print(f"✅ [UPDATE_PHASE] After set - phase.data keys: {list(phase.data.keys()) if phase.data else 'NULL'}")
+        # (the validated request body is already a fresh dict, no copy needed)
+        phase.data = updates["data"]
+    elif updates.get("data_patch"):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[UPDATE_PHASE] Patching phase data keys: %s", list(updates["data_patch"].keys()))
+        _apply_data_patch(db, phase, updates["data_patch"])
     
-    if phase_update.ai_confidence_score is not None:
-        print(f"🔄 [UPDATE_PHASE] Setting ai_confidence_score: {phase_update.ai_confidence_score}")
-        phase.ai_confidence_score = phase_update.ai_confidence_score
+    if "ai_confidence_score" in updates:
+        logger.debug("[UPDATE_PHASE] Setting ai_confidence_score: %s", updates["ai_confidence_score"])
+        phase.ai_confidence_score = updates["ai_confidence_score"]
     
     # If this phase is being approved, unlock the next phase
     if is_being_approved:
@@ -129,26 +218,12 @@ def update_phase(
         
         if next_phase and next_phase.status == models.PhaseStatus.NOT_STARTED:
             next_phase.status = models.PhaseStatus.IN_PROGRESS
-            print(f"✅ Phase {phase.phase_number} approved, unlocking Phase {next_phase.phase_number}")
+            logger.info("Phase %s approved, unlocking Phase %s", phase.phase_number, next_phase.phase_number)
     
-    print(f"💾 [UPDATE_PHASE] Committing to database...")
     db.commit()
     db.refresh(phase)
     
-    print(f"✅ [UPDATE_PHASE] After commit - phase.data has 'architecture': {'architecture' in phase.data if phase.data else False}")
-    print(f"🔄 [UPDATE_PHASE] ============ UPDATE COMPLETED ============\n")
-    
-    # Return as dict to ensure proper JSON serialization
-    return {
-        "id": phase.id,
-        "project_id": phase.project_id,
-        "phase_number": phase.phase_number,
-        "phase_name": phase.phase_name,
-        "status": phase.status,
-        "data": phase.data or {},
-        "ai_confidence_score": phase.ai_confidence_score or 0,
-        "created_at": phase.created_at
-    }
+    return _phase_response(phase)
 
 
 @router.post("/generate/{project_id}/epics-and-stories")
@@ -156,7 +231,7 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
     """
     Generate epics and user stories using EPICS_STORIES_PROMPT
     """
-    print(f"\n[PHASE2] Starting epic generation for project_id={project_id}")
+    logger.info("[PHASE2] Starting epic generation for project_id=%s", project_id)
     
     try:
         # Get project
@@ -164,7 +239,7 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        print(f"[PROJECT] {project.name}")
+        logger.debug("[PROJECT] %s", project.name)
         
         # Get Phase 1 data
         phase1 = db.query(models.Phase).filter(
@@ -173,14 +248,13 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
         ).first()
         
         # Parse Phase 1 data
-        import json
         phase1_data = {}
         if phase1 and phase1.data:
             if isinstance(phase1.data, str):
                 try:
-                    phase1_data = json.loads(phase1.data)
+                    phase1_data = orjson.loads(phase1.data)
                 except Exception as e:
-                    print(f"[WARN] Failed to parse Phase 1 data: {e}")
+                    logger.warning("[PHASE2] Failed to parse Phase 1 data: %s", e)
                     phase1_data = {}
             else:
                 phase1_data = phase1.data
@@ -189,7 +263,7 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
         requirements_text = phase1_data.get("requirements", [])
         brd_text = phase1_data.get("brd", "")
         
-        print(f"[DATA] Phase 1: {len(requirements_text)} requirements, BRD: {len(str(brd_text))} chars")
+        logger.debug("[DATA] Phase 1: %d requirements, BRD: %d chars", len(requirements_text), len(str(brd_text)))
         
         # Format requirements as string
         if isinstance(requirements_text, list):
@@ -204,7 +278,7 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
             "project_name": project.name,
         }
         
-        print(f"[AI] Calling AI Service with EPICS_STORIES_PROMPT...")
+        logger.debug("[AI] Calling AI Service with EPICS_STORIES_PROMPT...")
         
         # Call AI service
         ai_service = AIService()
@@ -221,10 +295,9 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
                 epics = content_data.get("epics", [])
                 user_stories = content_data.get("user_stories", []) or content_data.get("userStories", [])
         
-        print(f"[RESULT] Generated: {len(epics)} epics, {len(user_stories)} stories")
+        logger.info("[RESULT] Generated: %d epics, %d stories", len(epics), len(user_stories))
         
         # Analyze execution flow
-        print(f"[FLOW] Analyzing dependencies & execution flow...")
         epic_dict = {epic.get('id'): epic for epic in epics}
         execution_order = []
         visited = set()
@@ -251,31 +324,25 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
                 epic_dict[epic_id]['stories'].append(story)
         
         # VALIDATION: Ensure minimum 2 stories per epic
-        print(f"[VALIDATION] Checking minimum 2 stories per epic requirement...")
         validation_errors = []
         for epic in epics:
             epic_id = epic.get('id')
             story_count = len(epic.get('stories', []))
-            print(f"[VALIDATION] Epic {epic_id} ({epic.get('title')}): {story_count} stories")
+            logger.debug("[VALIDATION] Epic %s (%s): %d stories", epic_id, epic.get('title'), story_count)
             if story_count < 2:
                 validation_errors.append(f"Epic {epic_id} has only {story_count} stories (minimum: 2)")
         
         if validation_errors:
-            print(f"[VALIDATION FAILED] Issues found:")
-            for error in validation_errors:
-                print(f"  - {error}")
-            print(f"[VALIDATION] Total epics: {len(epics)}, Total stories: {len(user_stories)}")
-            print(f"[VALIDATION] Average stories per epic: {len(user_stories) / len(epics):.1f}")
-            print(f"[VALIDATION] Requirement: Total stories should be 2-3x number of epics")
-            print(f"[VALIDATION] Requirement: {len(epics)} epics × 2-3 = {len(epics)*2}-{len(epics)*3} stories")
+            logger.warning(
+                "[VALIDATION FAILED] %d epics, %d stories (target: %d-%d stories): %s",
+                len(epics), len(user_stories), len(epics) * 2, len(epics) * 3, "; ".join(validation_errors)
+            )
             # Log but continue - frontend will see incomplete data
             # In production, you might want to re-request from AI until this passes
         else:
-            print(f"[VALIDATION PASSED] All {len(epics)} epics have minimum 2 stories")
-            print(f"[VALIDATION] Total: {len(user_stories)} stories across {len(epics)} epics")
-            print(f"[VALIDATION] Ratio: {len(user_stories) / len(epics):.1f} stories per epic (target: 2-3)")
+            logger.debug("[VALIDATION PASSED] %d stories across %d epics", len(user_stories), len(epics))
         
-        print(f"[ORDER] Execution order: {execution_order}")
+        logger.debug("[ORDER] Execution order: %s", execution_order)
         
         # Save to database
         from datetime import datetime
@@ -304,7 +371,7 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
             phase2.data = phase2_data
         
         db.commit()
-        print(f"[SUCCESS] Saved to database\n")
+        logger.debug("[SUCCESS] Saved to database")
         
         return {
             "success": True,
@@ -318,8 +385,6 @@ async def generate_epics_and_stories(project_id: int, db: Session = Depends(get_
         }
         
     except Exception as e:
-        print(f"[ERROR] {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[PHASE2] Epic generation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
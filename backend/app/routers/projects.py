@@ -1,15 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import logging
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import String, func, insert, literal, text, tuple_
 from sqlalchemy.orm import Session
-from typing import List
-from app import models, schemas
+from typing import List, Optional, Tuple, Union
+from app import models, schemas_in, schemas_out
 from app.database import get_db
 from app.routers.auth import get_current_user
+from app.routers.phases import _phase_metadata
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Project)
+# Deletes a project and its approvals, AI interactions, phases and stakeholders in one statement
+_DELETE_PROJECT_CTE = """
+WITH del_phases AS (
+    DELETE FROM phases WHERE project_id = :pid RETURNING id
+), del_approvals AS (
+    DELETE FROM approvals WHERE phase_id IN (SELECT id FROM del_phases)
+), del_ai AS (
+    DELETE FROM ai_interactions WHERE project_id = :pid
+), del_stakeholders AS (
+    DELETE FROM project_stakeholders WHERE project_id = :pid
+)
+DELETE FROM projects WHERE id = :pid
+"""
+
+def _projects_with_completed_count(db: Session):
+    """Query yielding (Project, approved phase count) rows; the count is aggregated in SQL"""
+    approved = db.query(
+        models.Phase.project_id,
+        func.count(models.Phase.id).label("completed")
+    ).filter(
+        models.Phase.status == models.PhaseStatus.APPROVED.value
+    ).group_by(models.Phase.project_id).subquery()
+    
+    return db.query(
+        models.Project,
+        func.coalesce(approved.c.completed, 0)
+    ).outerjoin(approved, approved.c.project_id == models.Project.id)
+
+def _to_project_struct(
+    project: models.Project, completed_count: int, phases: Optional[List[dict]] = None
+) -> schemas_out.ProjectStruct:
+    fields = dict(
+        id=project.id,
+        name=project.name,
+        description=project.description,
+        current_phase=project.current_phase,
+        status=project.status,
+        created_at=schemas_out.epoch_ms(project.created_at),
+        completed_phases=completed_count,
+        total_phases=6
+    )
+    if phases is None:
+        return schemas_out.ProjectStruct(**fields)
+    return schemas_out.ProjectDetailStruct(**fields, phases=phases)
+
+def _encode_cursor(created_at: datetime, project_id: int) -> str:
+    # isoformat(" ") is SQLite's stored text form ("YYYY-MM-DD HH:MM:SS[.ffffff]"), so the decoded
+    # string can be compared against the column as-is there
+    raw = f"{created_at.isoformat(' ')}|{project_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[str, datetime, int]:
+    """Return the encoded timestamp text, the parsed timestamp and the project id"""
+    try:
+        created_at, project_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return created_at, datetime.fromisoformat(created_at), int(project_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+@router.post("/", response_model=schemas_out.Project)
 def create_project(
-    project: schemas.ProjectCreate, 
+    project: schemas_in.ProjectCreate, 
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -25,110 +91,100 @@ def create_project(
         # Create initial 6 phases with improved structure
         from app.models import PHASE_CONFIGS
         
-        for phase_num, config in PHASE_CONFIGS.items():
-            phase = models.Phase(
-                project_id=db_project.id,
-                phase_number=phase_num,
-                phase_name=config["name"],
-                status=models.PhaseStatus.NOT_STARTED if phase_num > 1 else models.PhaseStatus.IN_PROGRESS,
-                data={
+        # Single multi-row INSERT instead of one ORM flush per phase
+        db.bulk_insert_mappings(models.Phase, [
+            {
+                "project_id": db_project.id,
+                "phase_number": phase_num,
+                "phase_name": config["name"],
+                "status": models.PhaseStatus.NOT_STARTED if phase_num > 1 else models.PhaseStatus.IN_PROGRESS,
+                "data": {
                     "description": config["description"],
                     "key_activities": config["key_activities"],
                     "deliverables": config["deliverables"],
                     "approvers": config["approvers"]
                 }
-            )
-            db.add(phase)
+            }
+            for phase_num, config in PHASE_CONFIGS.items()
+        ])
         
         db.commit()
-        print(f"✅ Project created successfully: {db_project.id} - {db_project.name}")
-        return db_project
+        logger.info("Project created successfully: %s - %s", db_project.id, db_project.name)
+        # A new project has no approved phases yet, so the count is known without a query
+        return Response(content=schemas_out.encode_json(_to_project_struct(db_project, 0)), media_type="application/json")
     except Exception as e:
         db.rollback()
-        print(f"❌ Error creating project: {str(e)}")
+        logger.error("Error creating project: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create project: {str(e)}")
 
-@router.get("/", response_model=List[schemas.Project])
+@router.get("/", response_model=List[schemas_out.Project])
 def get_projects(
+    cursor: Optional[str] = None,
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    projects = db.query(models.Project).offset(skip).limit(limit).all()
-    print(f"📋 Fetching projects for user {current_user.username}: Found {len(projects)} projects")
+    """
+    List projects newest first using keyset pagination on (created_at, id).
+    Pass the X-Next-Cursor response header back as ?cursor= to fetch the next page;
+    the legacy ?skip= offset is still honoured when no cursor is given.
+    """
+    query = _projects_with_completed_count(db).order_by(
+        models.Project.created_at.desc(), models.Project.id.desc()
+    )
+    if cursor:
+        cursor_text, cursor_ts, cursor_id = _decode_cursor(cursor)
+        # SQLite keeps DATETIME as text and orders it textually, while SQLAlchemy binds datetimes with
+        # a ".ffffff" suffix that CURRENT_TIMESTAMP rows lack; binding the stored text form keeps the
+        # seek consistent with ORDER BY. Either way the bound value is a constant, so the
+        # (created_at, id) index serves the row-value range seek
+        if db.get_bind().dialect.name == "sqlite":
+            cursor_created_at = literal(cursor_text, String)
+        else:
+            cursor_created_at = literal(cursor_ts, models.Project.created_at.type)
+        query = query.filter(
+            tuple_(models.Project.created_at, models.Project.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    elif skip:
+        query = query.offset(skip)
     
-    # Enrich projects with computed phase counts
-    enriched_projects = []
-    for project in projects:
-        # Query phases for this project
-        phases = db.query(models.Phase).filter(
-            models.Phase.project_id == project.id
-        ).all()
-        
-        # Count completed/approved phases (normalize enum/string safely for linters)
-        def _is_approved(status_val):
-            sv = getattr(status_val, "value", status_val)
-            return str(sv) == str(models.PhaseStatus.APPROVED.value)
-
-        completed_count = 0
-        for p in phases:
-            if _is_approved(p.status):
-                completed_count += 1
-        
-        # Create enriched project dict
-        project_dict = {
-            "id": project.id,
-            "name": project.name,
-            "description": project.description,
-            "current_phase": project.current_phase,
-            "status": project.status,
-            "created_at": project.created_at,
-            "completed_phases": completed_count,
-            "total_phases": 6
-        }
-        enriched_projects.append(schemas.Project(**project_dict))
+    rows = query.limit(limit).all()
+    logger.debug("Fetching projects for user %s: Found %d projects", current_user.username, len(rows))
     
-    return enriched_projects
+    headers = {}
+    last_project = rows[-1][0] if len(rows) == limit else None
+    # Rows without a timestamp have no keyset position; clients fall back to ?skip= past them
+    if last_project is not None and last_project.created_at is not None:
+        headers["X-Next-Cursor"] = _encode_cursor(last_project.created_at, last_project.id)
+    
+    projects = [_to_project_struct(project, completed_count) for project, completed_count in rows]
+    return Response(content=schemas_out.encode_json(projects), media_type="application/json", headers=headers)
 
-@router.get("/{project_id}", response_model=schemas.Project)
+@router.get("/{project_id}", response_model=schemas_out.ProjectDetail)
 def get_project(
     project_id: int, 
+    include_phases: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Query phases for this project
-    phases = db.query(models.Phase).filter(
-        models.Phase.project_id == project.id
-    ).all()
-    
-    # Count completed/approved phases (normalize enum/string safely for linters)
-    def _is_approved(status_val):
-        sv = getattr(status_val, "value", status_val)
-        return str(sv) == str(models.PhaseStatus.APPROVED.value)
-
-    completed_count = 0
-    for p in phases:
-        if _is_approved(p.status):
-            completed_count += 1
+    """Get a project; with include_phases=true the phase metadata is embedded in the same response"""
+    if include_phases:
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        # The phase rows are loaded anyway, so count approved phases from them instead of a SQL aggregate
+        phases = _phase_metadata(db, project_id, project.name)
+        completed_count = sum(1 for phase in phases if phase["status"] == models.PhaseStatus.APPROVED)
+        body = _to_project_struct(project, completed_count, phases)
+        return Response(content=schemas_out.encode_json(body), media_type="application/json")
     
-    # Create enriched project dict
-    project_dict = {
-        "id": project.id,
-        "name": project.name,
-        "description": project.description,
-        "current_phase": project.current_phase,
-        "status": project.status,
-        "created_at": project.created_at,
-        "completed_phases": completed_count,
-        "total_phases": 6
-    }
+    row = _projects_with_completed_count(db).filter(models.Project.id == project_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    return schemas.Project(**project_dict)
+    project, completed_count = row
+    return Response(content=schemas_out.encode_json(_to_project_struct(project, completed_count)), media_type="application/json")
 
 @router.delete("/{project_id}")
 def delete_project(
@@ -142,7 +198,13 @@ def delete_project(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        # Delete in correct order to avoid foreign key constraints
+        if db.get_bind().dialect.name == "postgresql":
+            # One round trip: data-modifying CTEs delete all dependent rows in a single statement
+            db.execute(text(_DELETE_PROJECT_CTE), {"pid": project_id})
+            db.commit()
+            return {"message": "Project deleted successfully", "project_id": project_id}
+        
+        # SQLite has no data-modifying CTEs, so delete in correct order to avoid foreign key constraints
         # 1. Delete approvals first (approvals are linked to phases, not directly to projects)
         phases = db.query(models.Phase).filter(models.Phase.project_id == project_id).all()
         phase_ids = [phase.id for phase in phases]
@@ -170,26 +232,37 @@ def delete_project(
         return {"message": "Project deleted successfully", "project_id": project_id}
     except Exception as e:
         db.rollback()
-        print(f"Error deleting project: {e}")
+        logger.error("Error deleting project %s: %s", project_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}")
 
 @router.post("/{project_id}/stakeholders")
 def add_stakeholder(
     project_id: int,
-    stakeholder: schemas.ProjectStakeholderCreate,
+    stakeholders: Union[schemas_in.ProjectStakeholderCreate, List[schemas_in.ProjectStakeholderCreate]],
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    """Add one stakeholder or a list of stakeholders to a project"""
+    project_exists = db.query(models.Project.id).filter(models.Project.id == project_id).first()
+    if not project_exists:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db_stakeholder = models.ProjectStakeholder(
-        project_id=project_id,
-        user_id=stakeholder.user_id,
-        role=stakeholder.role
+    if not isinstance(stakeholders, list):
+        stakeholders = [stakeholders]
+    if not stakeholders:
+        return {"message": "No stakeholders to add", "stakeholder_ids": []}
+    
+    # Single multi-row INSERT ... RETURNING id instead of one ORM flush per stakeholder
+    rows = [
+        {"project_id": project_id, "user_id": s.user_id, "role": s.role}
+        for s in stakeholders
+    ]
+    result = db.execute(
+        insert(models.ProjectStakeholder).returning(models.ProjectStakeholder.id),
+        rows
     )
-    db.add(db_stakeholder)
+    stakeholder_ids = list(result.scalars())
     db.commit()
-    return {"message": "Stakeholder added successfully"}
-
+    
+    message = "Stakeholder added successfully" if len(rows) == 1 else f"{len(rows)} stakeholders added successfully"
+    return {"message": message, "stakeholder_ids": stakeholder_ids}
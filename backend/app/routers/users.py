@@ -1,28 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app import models, schemas
+from app import models, schemas_in, schemas_out
 from app.database import get_db
-import bcrypt
+from app.routers.auth import _to_user_struct, get_password_hash
 
 router = APIRouter()
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly"""
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
-@router.post("/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=schemas_out.User)
+def create_user(user: schemas_in.UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Hash password with bcrypt
+    # Hash password with argon2id
     hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
@@ -36,7 +27,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
-@router.get("/", response_model=List[schemas.User])
+@router.get("/", response_model=List[schemas_out.User])
 def get_users(
     skip: int = 0, 
     limit: int = 100, 
@@ -50,7 +41,7 @@ def get_users(
         query = query.filter(models.User.role == role)
     
     users = query.offset(skip).limit(limit).all()
-    return users
+    return Response(content=schemas_out.encode_json([_to_user_struct(user) for user in users]), media_type="application/json")
 
 @router.get("/roles/list", response_model=List[str])
 def get_user_roles(db: Session = Depends(get_db)):
@@ -58,7 +49,7 @@ def get_user_roles(db: Session = Depends(get_db)):
     roles = db.query(models.User.role).distinct().all()
     return [role[0] for role in roles if role[0]]
 
-@router.get("/{user_id}", response_model=schemas.User)
+@router.get("/{user_id}", response_model=schemas_out.User)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
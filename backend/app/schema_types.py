@@ -0,0 +1,20 @@
+"""
+Shared Schema Types
+Annotated field types used by both request (app.schemas_in) and response (app.schemas_out) models.
+"""
+
+from pydantic import PlainValidator, WithJsonSchema, conint
+from typing import Annotated, Dict, Any
+
+def _require_json_object(value: Any) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ValueError("expected a JSON object")
+    return value
+
+# Opaque JSON object (phase data, AI context): only the top-level type is checked, so large
+# blobs are passed through as-is instead of pydantic walking and copying every key/value
+JsonObject = Annotated[Dict[str, Any], PlainValidator(_require_json_object), WithJsonSchema({"type": "object"})]
+
+# Strict ints skip pydantic's lax float/str coercion paths
+ConfidenceScore = conint(ge=0, le=100, strict=True)
+PhaseNumber = conint(ge=1, le=7, strict=True)
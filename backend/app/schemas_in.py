@@ -0,0 +1,77 @@
+"""
+Request Schemas
+Pydantic models for request bodies. Response models live in app.schemas_out.
+"""
+
+import re
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+from typing import Annotated, Optional
+from app.enums import PhaseStatus, ApprovalStatus, UserRole
+from app.schema_types import ConfidenceScore, JsonObject, PhaseNumber
+
+# Cheap structural email check (replaces EmailStr / email-validator)
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def _validate_email(value: str) -> str:
+    if not EMAIL_RE.match(value):
+        raise ValueError("invalid email address")
+    return value
+
+EmailAddress = Annotated[str, AfterValidator(_validate_email)]
+
+# Request bodies accept either the snake_case field name or a stable camelCase alias.
+# Aliases are validation-only so responses keep their snake_case wire names.
+class RequestModel(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+# User Schemas
+class UserCreate(RequestModel):
+    """Used by both admin user creation and self-service signup"""
+    email: EmailAddress
+    username: str
+    full_name: str = Field(validation_alias="fullName")
+    role: UserRole = "Developer"
+    password: str
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+# Project Schemas
+class ProjectCreate(BaseModel):
+    name: str
+    description: str
+
+class ProjectStakeholderCreate(BaseModel):
+    user_id: int
+    role: str
+
+# Phase Schemas
+class PhaseCreate(RequestModel):
+    phase_number: PhaseNumber = Field(validation_alias="phaseNumber")
+    phase_name: str
+    data: JsonObject = Field(default_factory=dict)
+
+# Partial-update bodies: routes apply only the fields the client sent (model_fields_set);
+# an explicit null is accepted and treated the same as an omitted field
+class PhaseUpdate(RequestModel):
+    status: Optional[PhaseStatus] = None
+    data: Optional[JsonObject] = None  # Replaces the whole phase data
+    data_patch: Optional[JsonObject] = None  # Shallow-merged into existing data; ignored if data is set
+    ai_confidence_score: Optional[ConfidenceScore] = Field(None, validation_alias="aiConfidenceScore")
+
+# Approval Schemas
+class ApprovalCreate(BaseModel):
+    phase_id: int
+    approver_id: int
+
+class ApprovalUpdate(BaseModel):
+    status: ApprovalStatus
+    comments: Optional[str] = None  # Omitted or null -> existing comments are kept
+
+# AI Copilot Schemas
+class AIQuery(BaseModel):
+    project_id: int
+    phase_id: int
+    query: str
+    context: JsonObject = Field(default_factory=dict)
@@ -0,0 +1,145 @@
+"""
+Response Schemas
+Pydantic response models plus the msgspec structs used to encode hot read endpoints.
+Request bodies live in app.schemas_in.
+"""
+
+import msgspec
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from datetime import datetime, timezone
+from typing import Annotated, Optional, List, Dict, Tuple, Any
+from app.enums import PhaseStatus, ApprovalStatus
+from app.schema_types import ConfidenceScore, JsonObject, PhaseNumber
+
+def epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    """Milliseconds since the UNIX epoch; naive datetimes (SQLite) are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def _datetime_to_epoch_ms(value: Any) -> Any:
+    return epoch_ms(value) if isinstance(value, datetime) else value
+
+# Timestamps go over the wire as integer epoch milliseconds (frontend: new Date(ms))
+EpochMillis = Annotated[int, BeforeValidator(_datetime_to_epoch_ms)]
+
+# Shared base for response models read from ORM objects (one config instead of a nested Config per class)
+class ORMModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True, extra="ignore", populate_by_name=True)
+
+# User Schemas
+class User(ORMModel):
+    email: str
+    username: str
+    full_name: str
+    role: str
+    id: int
+    created_at: EpochMillis
+
+class AuthResponse(BaseModel):
+    access_token: str
+    token_type: str
+    user: User
+
+# Project Schemas
+class Project(ORMModel):
+    id: int
+    name: str
+    description: str
+    current_phase: int = Field(strict=True, ge=1, le=7)
+    status: str
+    created_at: EpochMillis
+    completed_phases: int = Field(strict=True, ge=0)  # Always computed with the query, never defaulted
+    total_phases: int = Field(6, strict=True, ge=1)
+
+# Phase metadata (no phase.data) embedded by GET /projects/{id}?include_phases=true
+class PhaseSummary(ORMModel):
+    id: int
+    project_id: int
+    project_name: str
+    phase_number: PhaseNumber
+    phase_name: str
+    status: PhaseStatus
+    ai_confidence_score: ConfidenceScore = 0
+    created_at: EpochMillis
+
+class ProjectDetail(Project):
+    phases: List[PhaseSummary] = []  # Only populated with include_phases=true
+
+# Phase Schemas
+class Phase(ORMModel):
+    id: int
+    project_id: int
+    phase_number: PhaseNumber
+    phase_name: str
+    status: PhaseStatus
+    data: JsonObject = Field(default_factory=dict)
+    ai_confidence_score: Optional[ConfidenceScore] = 0
+    created_at: EpochMillis
+
+# Approval Schemas
+class Approval(ORMModel):
+    id: int
+    phase_id: int
+    approver_id: int
+    status: ApprovalStatus
+    comments: Optional[str]
+    created_at: EpochMillis
+
+# AI Copilot Schemas
+class AIResponse(BaseModel):
+    response: str
+    confidence_score: ConfidenceScore
+    alternatives: Tuple[str, ...] = ()  # Built once and only serialized; immutable default needs no factory
+    explanation: Optional[str] = None
+
+# Read-only serialization structs (msgspec)
+# Hot listing endpoints encode these directly instead of running pydantic validation +
+# serialization on trusted DB rows; the pydantic models above remain the documented
+# response_model for OpenAPI.
+class UserStruct(msgspec.Struct, frozen=True):
+    email: str
+    username: str
+    full_name: str
+    role: str
+    id: int
+    created_at: int
+
+class ProjectStruct(msgspec.Struct, frozen=True):
+    id: int
+    name: str
+    description: str
+    current_phase: int
+    status: str
+    created_at: int
+    completed_phases: int
+    total_phases: int = 6
+
+class ProjectDetailStruct(ProjectStruct, frozen=True):
+    # Phase metadata dicts (no phase.data), embedded by GET /projects/{id}?include_phases=true
+    phases: List[Dict[str, Any]] = []
+
+class AuthResponseStruct(msgspec.Struct, frozen=True):
+    access_token: str
+    token_type: str
+    user: UserStruct
+
+class ApprovalStruct(msgspec.Struct, frozen=True):
+    id: int
+    phase_id: int
+    approver_id: int
+    status: str
+    comments: Optional[str]
+    created_at: int
+
+# The one reusable encoder for every struct response. There are no per-list-type adapters to
+# precompile: routers build the structs directly from ORM rows (created_at goes through epoch_ms,
+# which msgspec.convert cannot do from a datetime attribute), and msgspec encodes lists of
+# structs without a type-specific encoder
+_json_encoder = msgspec.json.Encoder()
+
+def encode_json(obj: Any) -> bytes:
+    """Encode msgspec structs (or lists of them) to JSON bytes"""
+    return _json_encoder.encode(obj)
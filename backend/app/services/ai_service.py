@@ -1,111 +1,96 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
 import os
-import json
-import sys
-from typing import Dict, Any, List, Tuple
+import re
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from enum import IntEnum
+from itertools import islice, repeat
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, Final, List, Literal, Optional, Tuple
+import httpx
+import orjson
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
-
-# Fix encoding issue for emojis
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+from pydantic import BaseModel, ConfigDict
 
 load_dotenv()
 
-class AIService:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.client = AsyncOpenAI(api_key=self.api_key)
-    
-    def _extract_technologies_from_text(self, text: str) -> set:
-        """
-        DYNAMIC technology extraction - NO HARDCODED LISTS.
-        Extract ANY technology/tool/platform mentioned in text using pattern recognition.
-        This ONLY finds what's explicitly mentioned, nothing else.
-        
-        Strategy: Look for words that typically indicate technologies/tools:
-        - ALL-CAPS words (SQL, API, etc.)
-        - Words followed by version numbers (Node v14, Python 3.11, etc.)
-        - Known technology naming patterns (service names, product names in quotes)
-        - Capitalized tech names (PostgreSQL, MongoDB, Redis, etc.)
-        """
-        if not text or not isinstance(text, str):
-            return set()
-        
-        found_tech = set()
-        words = text.split()
-        
-        for i, word in enumerate(words):
-            word_clean = word.strip('.,;:!?()-[]{}"\'"')
-            word_lower = word_clean.lower()
-            
-            # Pattern 1: Capitalized words that look like tech products
-            # Examples: PostgreSQL, MongoDB, Node.js, React, Docker, Kubernetes
-            if word_clean and word_clean[0].isupper() and len(word_clean) > 2:
-                # Check if it looks like a technology product name
-                if any(indicator in word_lower for indicator in [
-                    'sql', 'db', 'api', 'server', 'service', 'framework', 
-                    'language', 'platform', 'cache', 'queue', 'messaging',
-                    'auth', 'gateway', 'monitor', 'log', 'storage', 'cloud',
-                    'container', 'orchestr', 'deploy', 'ci/', 'cd', 'broker',
-                    'search', 'stream', 'queue', 'store'
-                ]):
-                    found_tech.add(word_clean)
-            
-            # Pattern 2: ALL CAPS abbreviations (longer than 2 chars to avoid FI, OR, etc.)
-            if word_clean.isupper() and len(word_clean) > 2 and len(word_clean) < 10:
-                found_tech.add(word_clean)
-            
-            # Pattern 3: Words with version numbers (indicates a specific tech)
-            # Examples: Node.js, Python 3.11, Java8, etc.
-            if any(char.isdigit() for char in word_clean):
-                if word_lower not in ['2024', '2023', '2022', '2021', '2020', '2019']:  # Exclude years
-                    if len(word_clean) > 2:
-                        found_tech.add(word_clean)
-            
-            # Pattern 4: Check next word - if current word is "technology" or similar
-            # and next word is capitalized, extract the next word
-            if i < len(words) - 1:
-                if word_lower in ['technology:', 'tech:', 'use', 'uses', 'using', 'with', 'based', 'on']:
-                    next_word = words[i + 1].strip('.,;:!?()-[]{}"\'"')
-                    if next_word and next_word[0].isupper():
-                        found_tech.add(next_word)
-        
-        # Filter out common non-tech words
-        non_tech_words = {
-            'The', 'This', 'That', 'These', 'Those', 'A', 'An', 'And', 'Or', 'But',
-            'For', 'From', 'To', 'In', 'On', 'At', 'Is', 'Are', 'Was', 'Were',
-            'System', 'Application', 'Component', 'Service', 'Layer', 'Module', 'Package',
-            'We', 'Our', 'Their', 'It', 'Its', 'I', 'You', 'Your'
-        }
-        
-        found_tech = {t for t in found_tech if t not in non_tech_words and len(t) > 1}
-        
-        return found_tech
+logger = logging.getLogger(__name__)
+
+# Technology extraction (used by AIService._extract_technologies_from_text)
+TECH_INDICATORS = (
+    'sql', 'db', 'api', 'server', 'service', 'framework',
+    'language', 'platform', 'cache', 'queue', 'messaging',
+    'auth', 'gateway', 'monitor', 'log', 'storage', 'cloud',
+    'container', 'orchestr', 'deploy', 'ci/', 'cd', 'broker',
+    'search', 'stream', 'store'
+)
+# One scan for all indicators instead of a substring test per indicator
+_INDICATOR_RE = re.compile("|".join(map(re.escape, TECH_INDICATORS)))
+# Punctuation trimmed from both ends of each whitespace-separated word. Kept as a per-word strip():
+# deleting it from the whole text with one str.translate pass would also drop inner punctuation
+# ('Node.js', '1.1', '10,000') and change the extracted set
+_TECH_STRIP_CHARS = '.,;:!?()-[]{}"\''
+# A capitalized word right after one of these is taken as a technology ("using Redis")
+_TECH_LEAD_INS = frozenset({'technology:', 'tech:', 'use', 'uses', 'using', 'with', 'based', 'on'})
+_TECH_YEARS = frozenset({'2024', '2023', '2022', '2021', '2020', '2019'})
+
+# Common words that the patterns above pick up but are not technologies
+NON_TECH_WORDS = frozenset({
+    'The', 'This', 'That', 'These', 'Those', 'A', 'An', 'And', 'Or', 'But',
+    'For', 'From', 'To', 'In', 'On', 'At', 'Is', 'Are', 'Was', 'Were',
+    'System', 'Application', 'Component', 'Service', 'Layer', 'Module', 'Package',
+    'We', 'Our', 'Their', 'It', 'Its', 'I', 'You', 'Your'
+})
+
+# Texts longer than this bypass the memo cache so a few huge documents can't pin memory
+_TECH_CACHE_MAX_TEXT_LEN = 32_768
+
+# Hyphens and underscores split words for the identifier case converters
+_WORD_SEPARATOR_TRANS = str.maketrans('-_', '  ')
+
+def _extract_technologies_uncached(text: str) -> frozenset:
+    """
+    Strategy: Look for words that typically indicate technologies/tools:
+    - ALL-CAPS words, 3-9 chars (SQL, API, etc.)
+    - Words with version numbers (Node v14, Python 3.11, Java8, etc.)
+    - Capitalized tech names (PostgreSQL, MongoDB, etc.)
+    - Capitalized words right after "using"/"with"/"based on" (using Redis, etc.)
+    """
+    found_tech = set()
+    after_lead_in = False
+    # text.split() beats streaming words with re.finditer(r'\S+'): the words are built either way and
+    # the match objects cost more than the list (~2.8x slower loop on repo docs); texts over
+    # _TECH_CACHE_MAX_TEXT_LEN are the only large inputs and the list is dropped after the scan
+    for word in text.split():
+        word_clean = word.strip(_TECH_STRIP_CHARS)
+        if after_lead_in and word_clean and word_clean[0].isupper():
+            found_tech.add(word_clean)
+        word_lower = word_clean.lower()
+        after_lead_in = word_lower in _TECH_LEAD_INS
+        if len(word_clean) < 3 or word_clean in found_tech:
+            continue
+        if (
+            (word_clean[0].isupper() and _INDICATOR_RE.search(word_lower))
+            or (word_clean.isupper() and len(word_clean) < 10)
+            # isalpha() is one C-level check and alphabetic words cannot hold a digit, so most
+            # words skip the per-character digit scan
+            or (not word_clean.isalpha() and word_lower not in _TECH_YEARS and any(map(str.isdigit, word_clean)))
+        ):
+            found_tech.add(word_clean)
     
-    def _generate_fallback_e2e_flows(self, epics: list, user_stories: list, execution_order: list) -> list:
-        """
-        Generate fallback E2E flow diagrams if AI didn't generate them
-        Creates basic but complete flow diagrams based on available data
-        """
-        try:
-            flows = []
-            
-            # Get first 2-3 user stories for flows
-            if user_stories:
-                # Flow 1: First story (PRIMARY)
-                story1 = user_stories[0] if len(user_stories) > 0 else None
-                if story1:
-                    flow1_title = f"Foundation: {story1.get('title', 'Primary Flow')[:50]}"
-                    flow1_story = story1.get('title', 'N/A')
-                    epic_id = story1.get('epic_id', 1)
-                    epic_name = "Unknown Epic"
-                    for epic in epics:
-                        if epic.get('id') == epic_id:
-                            epic_name = epic.get('title', 'Unknown')
-                            break
-                    
-                    flow1_mermaid = """graph TD
+    found_tech.difference_update(NON_TECH_WORDS)
+    return frozenset(t for t in found_tech if len(t) > 1)
+
+# The same epic/story/requirement texts are re-scanned across generation passes
+extract_technologies = functools.lru_cache(maxsize=2048)(_extract_technologies_uncached)
+
+# Static mermaid diagrams for the fallback E2E flows
+_MERMAID_FOUNDATION: Final[str] = """graph TD
     U[User] -->|Request| FE[Frontend]
     FE -->|Submit| API[API Gateway]
     API -->|Authenticate| Auth[Auth Service]
@@ -115,28 +100,8 @@ class AIService:
     Logic -->|Response| API
     API -->|Data| FE
     FE -->|Display| U"""
-                    
-                    flows.append({
-                        'title': flow1_title,
-                        'user_story': flow1_story,
-                        'epic': epic_name,
-                        'description': f'Request-Response flow for {flow1_story}',
-                        'mermaid': flow1_mermaid
-                    })
-                
-                # Flow 2: Second story (SECONDARY) if available
-                if len(user_stories) > 1:
-                    story2 = user_stories[1]
-                    flow2_title = f"Core Process: {story2.get('title', 'Secondary Flow')[:50]}"
-                    flow2_story = story2.get('title', 'N/A')
-                    epic_id = story2.get('epic_id', 1)
-                    epic_name = "Unknown Epic"
-                    for epic in epics:
-                        if epic.get('id') == epic_id:
-                            epic_name = epic.get('title', 'Unknown')
-                            break
-                    
-                    flow2_mermaid = """graph TD
+
+_MERMAID_CORE: Final[str] = """graph TD
     U[User Action] -->|Trigger| Service[Service]
     Service -->|Queue Job| Queue[Message Queue]
     Queue -->|Process| Worker[Background Worker]
@@ -144,28 +109,8 @@ class AIService:
     DB -->|Notify| Queue
     Queue -->|Event| WebSocket[WebSocket Server]
     WebSocket -->|Broadcast| U"""
-                    
-                    flows.append({
-                        'title': flow2_title,
-                        'user_story': flow2_story,
-                        'epic': epic_name,
-                        'description': f'Async flow for {flow2_story}',
-                        'mermaid': flow2_mermaid
-                    })
-                
-                # Flow 3: If more stories, add one more
-                if len(user_stories) > 2:
-                    story3 = user_stories[2]
-                    flow3_title = f"Advanced: {story3.get('title', 'Advanced Flow')[:50]}"
-                    flow3_story = story3.get('title', 'N/A')
-                    epic_id = story3.get('epic_id', 1)
-                    epic_name = "Unknown Epic"
-                    for epic in epics:
-                        if epic.get('id') == epic_id:
-                            epic_name = epic.get('title', 'Unknown')
-                            break
-                    
-                    flow3_mermaid = """graph TD
+
+_MERMAID_ADVANCED: Final[str] = """graph TD
     System[System] -->|Data Stream| Processor[Stream Processor]
     Processor -->|Transform| Cache[Cache Layer]
     Cache -->|Check| DB[(Database)]
@@ -173,256 +118,78 @@ class AIService:
     Cache -->|Latest| Client[Client]
     Client -->|Subscribe| WebSocket[WebSocket]
     WebSocket -->|Updates| Client"""
-                    
-                    flows.append({
-                        'title': flow3_title,
-                        'user_story': flow3_story,
-                        'epic': epic_name,
-                        'description': f'Real-time flow for {flow3_story}',
-                        'mermaid': flow3_mermaid
-                    })
-            
-            if not flows:
-                # Create a generic flow if no stories available
-                print("[WARNING] No user stories available for fallback E2E flow generation")
-                flows.append({
-                    'title': 'Generic Flow',
-                    'user_story': 'N/A',
-                    'epic': 'N/A',
-                    'description': 'Generic system flow',
-                    'mermaid': """graph TD
+
+_MERMAID_GENERIC: Final[str] = """graph TD
     U[User] -->|Request| API[API]
     API -->|Process| Service[Service]
     Service -->|Data| DB[(Database)]
     DB -->|Result| Service
     Service -->|Response| API
     API -->|Response| U"""
-                })
-            
-            print(f"[OK] Generated {len(flows)} fallback E2E flow diagrams")
-            return flows
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to generate fallback E2E flows: {str(e)}")
-            # Return at least one flow even if there's an error
-            return [{
-                'title': 'Default Flow',
-                'user_story': 'Default',
-                'epic': 'Default',
-                'description': 'Default system flow',
-                'mermaid': 'graph TD\n    A[Start] --> B[Process]\n    B --> C[End]'
-            }]
-        
-    async def process_query(self, query: str, phase_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process user query with AI assistance
-        """
-        # Mock response for now - integrate with actual LLM in production
-        return {
-            "response": f"AI response for '{query}' in phase '{phase_name}'. Context: {context}",
-            "confidence_score": 85,
-            "alternatives": [
-                "Alternative approach 1",
-                "Alternative approach 2"
-            ],
-            "explanation": "This is the recommended approach based on best practices."
-        }
-    
-    async def generate_content(self, phase_name: str, content_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Generate phase-specific content
-        """
-        print(f"🔍 generate_content called with phase_name='{phase_name}', content_type='{content_type}'")
-        
-        # Log phase name analysis
-        has_development = "Development" in phase_name
-        has_phase5 = "Phase 5" in phase_name
-        print(f"   DEBUG: 'Development' in phase_name = {has_development}")
-        print(f"   DEBUG: 'Phase 5' in phase_name = {has_phase5}")
-        print(f"   DEBUG: content_type == 'user_story_dev_delivery' = {content_type == 'user_story_dev_delivery'}")
-        
-        # Generate content based on phase and type
-        # Check for Planning phase (Phase 2)
-        if "Planning" in phase_name or "Backlog" in phase_name or phase_name == "Phase 2: Planning & Product Backlog":
-            if content_type == "epics":
-                content = await self._generate_epics(data)
-            elif content_type == "user_stories":
-                content = await self._generate_user_stories(data)
-            elif content_type == "epics_and_stories":
-                print(f"✅ Calling _generate_epics_and_stories for content_type={content_type}")
-                content = await self._generate_epics_and_stories(data)
-            else:
-                content = "Generated planning content"
-        elif "Requirements" in phase_name:
-            if content_type == "prd":
-                content = await self._generate_prd(data)
-            elif content_type == "brd":
-                content = await self._generate_brd(data)
-            elif content_type == "requirements":
-                content = self._generate_requirements(data)
-            else:
-                content = "Generated content for " + content_type
-        elif "Architecture" in phase_name:
-            if content_type == "architecture":
-                content = await self._generate_architecture(data)
-            else:
-                content = "Generated architecture content"
-        elif "LLD" in phase_name or "Detailed Technical Design" in phase_name:
-            if content_type == "component_wise_lld":
-                # Component-Wise LLD returns its own structured format, pass it through directly
-                return await self._generate_component_wise_lld(data)
-            else:
-                content = f"Generated LLD content for {content_type}"
-        elif "Development" in phase_name or "Phase 5" in phase_name:
-            # Phase 5: Development - generate code, tests, API docs, README
-            print(f"   ✅ Matched Development/Phase5 condition")
-            if content_type == "user_story_dev_delivery":
-                print(f"✅ Calling _generate_user_story_dev_delivery for Phase 5")
-                try:
-                    result = await self._generate_user_story_dev_delivery(data)
-                    print(f"✅ _generate_user_story_dev_delivery returned successfully")
-                    print(f"   Result type: {type(result)}")
-                    print(f"   Result keys: {list(result.keys()) if isinstance(result, dict) else 'N/A'}")
-                    return result
-                except Exception as e:
-                    print(f"❌ ERROR in _generate_user_story_dev_delivery: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    raise
-            else:
-                content = f"Generated development content for {content_type}"
-        else:
-            print(f"⚠️ Phase name '{phase_name}' doesn't match any known patterns! content_type={content_type}")
-            # Try to handle specific content types even if phase name is unexpected
-            if content_type == "epics_and_stories":
-                print(f"⚠️ Attempting fallback: calling _generate_epics_and_stories anyway")
-                content = await self._generate_epics_and_stories(data)
-            elif content_type == "user_story_dev_delivery":
-                print(f"⚠️ Attempting fallback: calling _generate_user_story_dev_delivery for Phase 5 content")
-                try:
-                    result = await self._generate_user_story_dev_delivery(data)
-                    print(f"✅ Fallback _generate_user_story_dev_delivery returned successfully")
-                    return result
-                except Exception as e:
-                    print(f"❌ ERROR in fallback _generate_user_story_dev_delivery: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    raise
-            else:
-                content = f"Generated {content_type} for {phase_name}"
-        
-        return {
-            "content": content,
-            "confidence_score": 85
-        }
-    
-    async def _generate_prd(self, data: Dict[str, Any]) -> str:
-        """
-        Generate Product Requirements Document using the comprehensive PRD prompt.
-        Input: All extracted requirements output + user input
-        Output: Complete, professional PRD with 13 sections
-        """
-        # Extract all necessary data
-        requirements = data.get('requirements', [])
-        functional_reqs = data.get('functionalRequirements', [])
-        non_functional_reqs = data.get('nonFunctionalRequirements', [])
-        gherkin_reqs = data.get('gherkinRequirements', [])
-        business_proposal = data.get('businessProposal', {})
-        stakeholders = data.get('extractedStakeholders', [])
-        extracted_risks = data.get('extractedRisks', {})
-        technology_and_tools = data.get('technologyAndTools', {})
-        tech_stack = data.get('extractedTechStack', {})
-        scope = business_proposal.get('Scope', {})
-        success_metrics = business_proposal.get('SuccessMetrics', [])
-        user_input = data.get('userInput', '')  # Original user input
-        project_info = data.get('project', {})
-        
-        print(f"[INFO] Generating PRD using comprehensive prompt for project: {project_info.get('name', 'Project')}")
-        
-        # Prepare comprehensive requirement context
-        fr_context = ""
-        if functional_reqs:
-            fr_context += "\nFunctional Requirements:\n"
-            for idx, fr in enumerate(functional_reqs, 1):
-                service = fr.get('Service', 'General')
-                req = fr.get('Requirement', fr.get('requirement', 'N/A'))
-                priority = fr.get('Priority', 'Medium')
-                category = fr.get('Category', 'Feature')
-                fr_context += f"  {idx}. [{service}] {req} (Priority: {priority}, Category: {category})\n"
-        
-        nfr_context = ""
-        if non_functional_reqs:
-            nfr_context += "\nNon-Functional Requirements:\n"
-            for idx, nfr in enumerate(non_functional_reqs, 1):
-                category = nfr.get('Category', 'Performance')
-                req = nfr.get('Requirement', nfr.get('requirement', 'N/A'))
-                description = nfr.get('Description', '')
-                nfr_context += f"  {idx}. [{category}] {req}"
-                if description:
-                    nfr_context += f" - {description}"
-                nfr_context += "\n"
-        
-        scope_context = ""
-        if scope:
-            scope_context += "\nProject Scope:\n"
-            in_scope = scope.get('InScope', [])
-            out_scope = scope.get('OutOfScope', [])
-            if in_scope:
-                scope_context += "  In Scope:\n"
-                for item in in_scope:
-                    scope_context += f"    - {item}\n"
-            if out_scope:
-                scope_context += "  Out of Scope:\n"
-                for item in out_scope:
-                    scope_context += f"    - {item}\n"
-        
-        stakeholder_context = ""
-        if stakeholders:
-            stakeholder_context += "\nStakeholders:\n"
-            for sh in stakeholders:
-                if isinstance(sh, str):
-                    stakeholder_context += f"  - {sh}\n"
-                elif isinstance(sh, dict):
-                    role = sh.get('Role', sh.get('role', 'N/A'))
-                    stakeholder_context += f"  - {role}\n"
-        
-        tech_context = ""
-        if tech_stack or technology_and_tools:
-            tech_context += "\nTechnology Stack:\n"
-            # Extracted tech
-            extracted = tech_stack.get('Extracted', {}) or technology_and_tools.get('Extracted', {})
-            if extracted:
-                tech_context += "  Extracted (Mentioned by user):\n"
-                for category, items in extracted.items():
-                    if items:
-                        tech_context += f"    {category}: {', '.join(items)}\n"
-            # Suggested tech
-            suggested = tech_stack.get('Suggested', {}) or technology_and_tools.get('Suggested', {})
-            if suggested:
-                tech_context += "  Suggested (Recommended):\n"
-                for category, items in suggested.items():
-                    if items:
-                        tech_context += f"    {category}: {', '.join(items)}\n"
-        
-        metrics_context = ""
-        if success_metrics:
-            metrics_context += "\nSuccess Metrics:\n"
-            for metric in success_metrics:
-                metrics_context += f"  - {metric}\n"
-        
-        risks_context = ""
-        if extracted_risks:
-            risks_context += "\nRisks Identified:\n"
-            for risk_type, risk_list in extracted_risks.items():
-                risks_context += f"  {risk_type}:\n"
-                if isinstance(risk_list, list):
-                    for risk in risk_list:
-                        risks_context += f"    - {risk}\n"
-                else:
-                    risks_context += f"    - {risk_list}\n"
-        
-        # Build the system prompt with PRD instructions
-        prd_system_prompt = """You are a Product Manager AI assistant.
+
+_MERMAID_DEFAULT: Final[str] = 'graph TD\n    A[Start] --> B[Process]\n    B --> C[End]'
+
+# (title prefix, default story title, description prefix, mermaid) for the fallback E2E flows,
+# applied to the first three user stories in order
+_FALLBACK_FLOW_SPECS = (
+    ("Foundation", "Primary Flow", "Request-Response", _MERMAID_FOUNDATION),
+    ("Core Process", "Secondary Flow", "Async", _MERMAID_CORE),
+    ("Advanced", "Advanced Flow", "Real-time", _MERMAID_ADVANCED),
+)
+
+# Values for fields a generated user story is missing. acceptance_criteria is left out because
+# each story needs its own list
+_STORY_DEFAULTS: Final[MappingProxyType] = MappingProxyType({
+    'epic': "Unknown Epic",
+    'epic_id': 1,
+    'title': "User Story",
+    'description': "Story description",
+    'points': 5,
+    'priority': "Medium",
+    'sprint': None,
+    'status': "backlog",
+})
+
+# Story point estimate by scenario count (0, 1, 2, 3, 4+), and the keywords that add complexity points
+_SCENARIO_STORY_POINTS: Final[Tuple[int, ...]] = (2, 2, 3, 5, 8)
+_COMPLEXITY_KEYWORD_RE = re.compile(r"integrate|api|payment|security|authentication|sync|complex", re.IGNORECASE)
+
+# Placeholder requirements returned for the Phase 1 "requirements" content type
+_STATIC_REQUIREMENTS: Final[Tuple[MappingProxyType, ...]] = tuple(MappingProxyType(req) for req in (
+    {
+        "title": "User Authentication & Authorization",
+        "priority": "High",
+        "status": "documented",
+        "description": "Implement secure login system with role-based access control"
+    },
+    {
+        "title": "AI-Powered Document Generation",
+        "priority": "High",
+        "status": "documented",
+        "description": "Generate PRD, BRD, and other documents using AI"
+    },
+    {
+        "title": "Multi-Level Approval Workflow",
+        "priority": "High",
+        "status": "in_review",
+        "description": "Configurable approval chains for each phase"
+    },
+    {
+        "title": "Real-Time Collaboration",
+        "priority": "Medium",
+        "status": "draft",
+        "description": "Enable team members to collaborate in real-time"
+    },
+    {
+        "title": "Integration Hub",
+        "priority": "Medium",
+        "status": "documented",
+        "description": "Connect with Jira, GitHub, Confluence, and CI/CD tools"
+    }
+))
+
+# System prompt for PRD generation
+_PRD_SYSTEM_PROMPT: Final[str] = """You are a Product Manager AI assistant.
 Your task is to generate a complete, professional, industry-standard Product Requirements Document (PRD)
 using ONLY the extracted requirements provided by the user.
 
@@ -539,141 +306,8 @@ RULES (Strict)
 
 Format the PRD with clear markdown headers and structure."""
 
-        # Build user prompt with all extracted data
-        user_prompt = f"""Generate a complete Product Requirements Document using the following extracted requirements and inputs:
-
-PROJECT INFORMATION
-===================
-Project Name: {business_proposal.get('Title', project_info.get('name', 'Project'))}
-Problem to Solve: {business_proposal.get('ProblemToSolve', 'Not specified')}
-Vision: {business_proposal.get('Vision', 'Not specified')}
-
-{scope_context}
-{fr_context}
-{nfr_context}
-{stakeholder_context}
-{metrics_context}
-{tech_context}
-{risks_context}
-
-ORIGINAL USER INPUT
-===================
-{user_input[:3000] if user_input else 'Not provided'}
-
-Generate the complete 13-section PRD now, adhering strictly to the instructions provided."""
-
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": prd_system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Low temperature for consistent, precise output
-                max_tokens=6000
-            )
-            prd_content = response.choices[0].message.content.strip()
-            print(f"[OK] PRD generated successfully using comprehensive prompt ({len(prd_content)} characters)")
-            return prd_content
-        except Exception as e:
-            print(f"[ERROR] PRD generation failed: {str(e)}")
-            return self._generate_fallback_prd(project_info, functional_reqs or requirements)
-
-    async def _generate_brd(self, data: Dict[str, Any]) -> str:
-        """
-        Generate Business Requirements Document using the comprehensive BRD prompt.
-        Input: All extracted requirements output + user input
-        Output: Complete, professional BRD with 14 sections focused on business value
-        """
-        # Extract all necessary data
-        requirements = data.get('requirements', [])
-        functional_reqs = data.get('functionalRequirements', [])
-        non_functional_reqs = data.get('nonFunctionalRequirements', [])
-        gherkin_reqs = data.get('gherkinRequirements', [])
-        business_proposal = data.get('businessProposal', {})
-        stakeholders = data.get('extractedStakeholders', [])
-        extracted_risks = data.get('extractedRisks', {})
-        technology_and_tools = data.get('technologyAndTools', {})
-        tech_stack = data.get('extractedTechStack', {})
-        scope = business_proposal.get('Scope', {})
-        success_metrics = business_proposal.get('SuccessMetrics', [])
-        user_input = data.get('userInput', '')  # Original user input
-        ai_notes = data.get('aiNotes', '')
-        project_info = data.get('project', {})
-        
-        print(f"[INFO] Generating BRD using comprehensive prompt for project: {project_info.get('name', 'Project')}")
-        
-        # Prepare comprehensive requirement context for business focus
-        fr_business_context = ""
-        if functional_reqs:
-            fr_business_context += "\nFunctional Requirements (Business Capabilities Needed):\n"
-            for idx, fr in enumerate(functional_reqs, 1):
-                service = fr.get('Service', 'General')
-                req = fr.get('Requirement', fr.get('requirement', 'N/A'))
-                priority = fr.get('Priority', 'Medium')
-                fr_business_context += f"  {idx}. [{service}] {req} (Priority: {priority})\n"
-        
-        nfr_business_context = ""
-        if non_functional_reqs:
-            nfr_business_context += "\nNon-Functional Requirements (Quality Expectations):\n"
-            for idx, nfr in enumerate(non_functional_reqs, 1):
-                category = nfr.get('Category', 'Quality')
-                req = nfr.get('Requirement', nfr.get('requirement', 'N/A'))
-                nfr_business_context += f"  {idx}. [{category}] {req}\n"
-        
-        scope_context = ""
-        if scope:
-            scope_context += "\nProject Scope:\n"
-            in_scope = scope.get('InScope', [])
-            out_scope = scope.get('OutOfScope', [])
-            if in_scope:
-                scope_context += "  In Scope:\n"
-                for item in in_scope:
-                    scope_context += f"    - {item}\n"
-            if out_scope:
-                scope_context += "  Out of Scope:\n"
-                for item in out_scope:
-                    scope_context += f"    - {item}\n"
-        
-        stakeholder_context = ""
-        if stakeholders:
-            stakeholder_context += "\nStakeholders:\n"
-            for sh in stakeholders:
-                if isinstance(sh, str):
-                    stakeholder_context += f"  - {sh}\n"
-                elif isinstance(sh, dict):
-                    role = sh.get('Role', sh.get('role', 'N/A'))
-                    stakeholder_context += f"  - {role}\n"
-        
-        tech_constraints = ""
-        if tech_stack or technology_and_tools:
-            tech_constraints += "\nTechnology Constraints:\n"
-            extracted = tech_stack.get('Extracted', {}) or technology_and_tools.get('Extracted', {})
-            if extracted:
-                tech_constraints += "  Required/Mentioned Technologies:\n"
-                for category, items in extracted.items():
-                    if items:
-                        tech_constraints += f"    - {category}: {', '.join(items)}\n"
-        
-        metrics_context = ""
-        if success_metrics:
-            metrics_context += "\nBusiness Success Metrics:\n"
-            for metric in success_metrics:
-                metrics_context += f"  - {metric}\n"
-        
-        risks_context = ""
-        if extracted_risks:
-            risks_context += "\nBusiness Risks:\n"
-            for risk_type, risk_list in extracted_risks.items():
-                risks_context += f"  {risk_type}:\n"
-                if isinstance(risk_list, list):
-                    for risk in risk_list:
-                        risks_context += f"    - {risk}\n"
-                else:
-                    risks_context += f"    - {risk_list}\n"
-        
-        # Build the system prompt with comprehensive BRD instructions
-        brd_system_prompt = """You are a Business Analyst AI assistant.
+# System prompt for BRD generation
+_BRD_SYSTEM_PROMPT: Final[str] = """You are a Business Analyst AI assistant.
 Your task is to generate a complete, professional, industry-standard Business Requirements Document (BRD)
 using ONLY the extracted requirements provided by the user.
 
@@ -798,168 +432,1121 @@ RULES (Strict)
 
 Format the BRD with clear markdown headers and structure."""
 
-        # Build user prompt with all extracted data
-        user_prompt = f"""Generate a complete Business Requirements Document using the following extracted requirements and inputs:
+# User prompt templates for PRD/BRD generation, filled with str.format_map; substituted values are
+# not re-parsed, so braces in user input are safe
+_PRD_USER_PROMPT_TEMPLATE: Final[str] = """Generate a complete Product Requirements Document using the following extracted requirements and inputs:
+
+PROJECT INFORMATION
+===================
+Project Name: {project_name}
+Problem to Solve: {problem_to_solve}
+Vision: {vision}
+
+{scope_context}
+{fr_context}
+{nfr_context}
+{stakeholder_context}
+{metrics_context}
+{tech_context}
+{risks_context}
+
+ORIGINAL USER INPUT
+===================
+{user_input}
+
+Generate the complete 13-section PRD now, adhering strictly to the instructions provided."""
+
+_BRD_USER_PROMPT_TEMPLATE: Final[str] = """Generate a complete Business Requirements Document using the following extracted requirements and inputs:
 
 PROJECT INFORMATION
 ===================
-Project Name: {business_proposal.get('Title', project_info.get('name', 'Project'))}
-Problem to Solve: {business_proposal.get('ProblemToSolve', 'Not specified')}
-Vision: {business_proposal.get('Vision', 'Not specified')}
+Project Name: {project_name}
+Problem to Solve: {problem_to_solve}
+Vision: {vision}
 
 {scope_context}
-{fr_business_context}
-{nfr_business_context}
+{fr_context}
+{nfr_context}
 {stakeholder_context}
 {metrics_context}
-{tech_constraints}
+{tech_context}
 {risks_context}
 
 ORIGINAL USER INPUT
 ===================
-{user_input[:3000] if user_input else 'Not provided'}
+{user_input}
 
 Generate the complete 14-section BRD now, adhering strictly to the instructions provided. Focus on BUSINESS VALUE and BUSINESS NEEDS, not technical implementation."""
 
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": brd_system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Low temperature for consistent, precise output
-                max_tokens=6000
-            )
-            brd_content = response.choices[0].message.content.strip()
-            print(f"[OK] BRD generated successfully using comprehensive prompt ({len(brd_content)} characters)")
-            return brd_content
-        except Exception as e:
-            print(f"[ERROR] BRD generation failed: {str(e)}")
-            return self._generate_fallback_brd(project_info, functional_reqs or requirements)
+# User story prompts (format_map templates): API projects get a story per endpoint, other projects
+# derive stories from the Phase 1 requirements
+_API_USER_STORY_PROMPT_TEMPLATE: Final[str] = """You are an expert Agile Scrum Master and API Developer. Based on the Epics and API specifications, generate detailed User Stories for API development.
 
-    def _generate_requirements(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate extracted requirements"""
-        return [
-            {
-                "title": "User Authentication & Authorization",
-                "priority": "High",
-                "status": "documented",
-                "description": "Implement secure login system with role-based access control"
-            },
-            {
-                "title": "AI-Powered Document Generation",
-                "priority": "High",
-                "status": "documented",
-                "description": "Generate PRD, BRD, and other documents using AI"
-            },
-            {
-                "title": "Multi-Level Approval Workflow",
-                "priority": "High",
-                "status": "in_review",
-                "description": "Configurable approval chains for each phase"
-            },
-            {
-                "title": "Real-Time Collaboration",
-                "priority": "Medium",
-                "status": "draft",
-                "description": "Enable team members to collaborate in real-time"
-            },
-            {
-                "title": "Integration Hub",
-                "priority": "Medium",
-                "status": "documented",
-                "description": "Connect with Jira, GitHub, Confluence, and CI/CD tools"
-            }
-        ]
-    
-    async def _generate_epics(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Generate epics based on Phase 1 requirements, PRD, BRD, and API specifications using OpenAI
-        
-        Intelligently analyzes requirements and groups them into high-level epics.
-        For API-based projects, creates epics based on API endpoint groups.
-        Uses ALL extracted data from Phase 1 for comprehensive epic generation.
-        """
-        # Extract ALL Phase 1 data
-        requirements = data.get('requirements', [])
-        gherkin_reqs = data.get('gherkinRequirements', [])
-        functional_reqs = data.get('functionalRequirements', [])
-        non_functional_reqs = data.get('nonFunctionalRequirements', [])
-        business_proposal = data.get('businessProposal', {})
-        stakeholders = data.get('extractedStakeholders', [])
-        risks_data = data.get('extractedRisks', {})
-        ai_notes = data.get('aiNotes', '')
-        prd = data.get('prd', '')
-        brd = data.get('brd', '')
-        risks = data.get('risks', [])
-        project_info = data.get('project', {})
-        
-        # Check for API specifications
-        api_spec = data.get('apiSpec')
-        api_summary = data.get('apiSummary', '')
-        
-        print(f"[INFO] Generating epics for project: {project_info.get('name', 'Project')}")
-        print(f"[DEBUG] Functional requirements: {len(functional_reqs)}")
-        print(f"[DEBUG] Non-Functional requirements: {len(non_functional_reqs)}")
-        print(f"[DEBUG] Gherkin requirements: {len(gherkin_reqs)}")
-        print(f"[DEBUG] Has Business Proposal: {bool(business_proposal)}")
-        print(f"[DEBUG] Has API Spec: {bool(api_spec)}")
-        print(f"[DEBUG] API Endpoints: {len(api_spec.get('paths', {})) if api_spec else 0}")
-        
-        # Combine all requirements
-        all_reqs = []
-        if functional_reqs:
-            all_reqs.extend(functional_reqs)
-        if non_functional_reqs:
-            all_reqs.extend(non_functional_reqs)
-        if gherkin_reqs:
-            all_reqs.extend(gherkin_reqs)
-        if requirements:
-            all_reqs.extend(requirements)
-        
-        # If no requirements and no API specs, don't generate dummy epics
-        if not all_reqs and not api_spec and not business_proposal:
-            print("[WARNING] No requirements or API specs found - cannot generate meaningful epics")
-            return []
-        
-        # Prepare requirements context for OpenAI
-        requirements_context = ""
-        
-        # Add Functional Requirements
-        if functional_reqs:
-            requirements_context += "\n### Functional Requirements:\n"
-            for idx, req in enumerate(functional_reqs, 1):
-                requirements_context += f"\n{idx}. **{req.get('requirement', 'N/A')}**\n"
-                requirements_context += f"   - Priority: {req.get('priority', 'Medium')}\n"
-                requirements_context += f"   - Stakeholder/Actor: {req.get('stakeholder_actor', 'N/A')}\n"
-                requirements_context += f"   - Category: {req.get('category', 'N/A')}\n"
-                if req.get('derived_from'):
-                    requirements_context += f"   - Derived From: {req.get('derived_from')}\n"
-        
-        # Add Non-Functional Requirements
-        if non_functional_reqs:
-            requirements_context += "\n### Non-Functional Requirements:\n"
-            for idx, req in enumerate(non_functional_reqs, 1):
-                requirements_context += f"\n{idx}. **{req.get('requirement', 'N/A')}**\n"
-                requirements_context += f"   - Category: {req.get('category', 'N/A')}\n"
-                requirements_context += f"   - Priority: {req.get('priority', 'Medium')}\n"
-                requirements_context += f"   - Description: {req.get('description', 'N/A')}\n"
-        
-        # Add Gherkin Requirements
-        if gherkin_reqs:
-            requirements_context += "\n### Gherkin Requirements:\n"
+**Project**: {project_name}
+
+## Epics Generated:
+{epics_context}{batch_scope}
+
+{api_context}
+
+{risks_context}
+
+{requirements_context}
+
+**JIRA Compatibility Requirements**:
+- User story titles must follow format: "As a [role], I want [goal], so that [benefit]"
+- Include detailed acceptance criteria as array of strings
+- Support optional subtasks for complex stories (implementation steps)
+- Use Fibonacci story points: 1, 2, 3, 5, 8, 13, 21
+- All stories start in "backlog" status, null sprint
+
+**Instructions for API User Stories**:
+1. For EACH API endpoint{endpoint_scope}, create AT LEAST ONE user story
+2. Each story should follow the format: "As a [API consumer/developer], I want [endpoint functionality], so that [business value]"
+3. Include detailed acceptance criteria covering:
+   - Request/response format
+   - Authentication/authorization
+   - Error handling (400, 401, 404, 500 responses)
+   - Data validation
+   - Performance requirements
+4. For complex stories (8+ points), add subtasks array with implementation steps
+5. Estimate story points: Simple CRUD: 3-5, Complex logic: 8-13
+6. Additional stories for: authentication, error handling, documentation, testing
+7. Assign priority based on epic priority and dependencies
+
+**Output Format** (JIRA-compatible JSON array):
+[
+  {{
+    "id": 1,
+    "epic": "Epic Title",
+    "epic_id": 1,
+    "title": "As an API consumer, I want to call GET /users endpoint, so that I can retrieve user list",
+    "description": "Implement GET /users endpoint with pagination and filtering",
+    "acceptance_criteria": [
+      "Returns 200 with user array on success",
+      "Supports page and limit query parameters",
+      "Returns 401 if not authenticated",
+      "Returns proper error messages"
+    ],
+    "subtasks": [
+      "Create API route handler",
+      "Implement pagination logic",
+      "Add authentication middleware",
+      "Write unit tests"
+    ],
+    "points": 5,
+    "priority": "High",
+    "sprint": null,
+    "status": "backlog"
+  }}
+]
+
+Return ONLY the JSON array with all user stories, no additional text."""
+
+_GENERIC_USER_STORY_PROMPT_TEMPLATE: Final[str] = """You are an expert Agile Scrum Master and Product Owner. Based on the Epics and ALL extracted requirements from Phase 1, generate detailed User Stories with acceptance criteria.
+
+**Project**: {project_name}
+
+{business_context}
+
+{stakeholders_context}
+
+## Epics Generated:
+{epics_context}{batch_scope}
+
+{risks_context}
+
+## Requirements from Phase 1:
+{requirements_context}
+
+**JIRA Compatibility Requirements**:
+- User story titles must follow format: "As a [role], I want [goal], so that [benefit]"
+- Use roles from stakeholders when available
+- Include detailed acceptance criteria as array of strings
+- Support optional subtasks for complex stories (implementation steps)
+- Use Fibonacci story points: 1, 2, 3, 5, 8, 13, 21
+- All stories start in "backlog" status, null sprint
+- Subtasks should be specific, actionable tasks (development, testing, documentation)
+
+**Instructions**:
+1. For EACH Epic, generate user stories that match the "Expected Stories" count
+2. Base stories on ACTUAL requirements (functional, non-functional, gherkin)
+3. Use stakeholder roles when defining "As a [role]" in user stories
+4. Each story should follow: "As a [stakeholder role], I want [capability], so that [business value from proposal]"
+5. Derive acceptance criteria from:
+   - Functional requirement details
+   - Non-functional requirement descriptions
+   - Gherkin scenarios (Given-When-Then)
+   - Success metrics from business proposal
+6. For complex stories (8+ points), add subtasks array with specific implementation steps
+7. Estimate story points using Fibonacci: 1,2,3,5,8,13,21
+8. Assign priority: High (MVP/critical), Medium (important), Low (nice-to-have)
+9. Consider identified risks when defining acceptance criteria
+10. All stories in "backlog" status, no sprint assigned
+
+**Output Format** (JIRA-compatible JSON array):
+[
+  {{
+    "id": 1,
+    "epic": "Epic Title",
+    "epic_id": 1,
+    "title": "As a [stakeholder role], I want [capability], so that [business value]",
+    "description": "Detailed description from requirement",
+    "acceptance_criteria": [
+      "Specific, testable criterion 1",
+      "Specific, testable criterion 2",
+      "Performance/security criterion from NFR"
+    ],
+    "subtasks": [
+      "Design database schema",
+      "Implement backend API",
+      "Create frontend components",
+      "Write unit and integration tests",
+      "Update documentation"
+    ],
+    "points": 8,
+    "priority": "High",
+    "sprint": null,
+    "status": "backlog"
+  }}
+]
+
+**IMPORTANT**: 
+- Use ACTUAL data from requirements, NOT generic placeholders
+- Match story count to epic expectations
+- {coverage_rule}
+- Include subtasks ONLY for stories with 8+ points
+
+Return ONLY the JSON array with all user stories, no additional text."""
+
+# Exact-match cache of chat completion results, keyed on sha256 of model, sampling params and prompts.
+# Module-level so it is shared by every AIService instance (routers create them per request)
+_PROMPT_CACHE_MAX_ENTRIES = 512
+_prompt_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+@functools.lru_cache(maxsize=32)
+def _system_prompt_digest(system_prompt: str) -> str:
+    # System prompts are a handful of module/function constants, so each is hashed once per process
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+
+def _prompt_cache_key(model: str, temperature: float, max_tokens: int, system_prompt: str, user_prompt: str) -> str:
+    payload = "\x00".join((model, repr(temperature), str(max_tokens), _system_prompt_digest(system_prompt), user_prompt))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prompt_cache_get(key: str) -> Optional[str]:
+    cached = _prompt_cache.get(key)
+    if cached is not None:
+        _prompt_cache.move_to_end(key)
+    return cached
+
+
+def _prompt_cache_put(key: str, content: str) -> None:
+    _prompt_cache[key] = content
+    if len(_prompt_cache) > _PROMPT_CACHE_MAX_ENTRIES:
+        _prompt_cache.popitem(last=False)
+
+
+
+
+# A model reply wrapped in a markdown code fence: captures the body up to the closing fence (or the end
+# of the text if the fence is never closed), without an optional "json" language tag
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|\Z)", re.DOTALL)
+
+
+def _strip_code_fence(content: str) -> str:
+    match = _CODE_FENCE_RE.match(content)
+    return match.group(1) if match else content
+
+
+def _pick(d: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """First truthy value among keys (e.g. a snake_case field and its camelCase alias), else default"""
+    for key in keys:
+        value = d.get(key)
+        if value:
+            return value
+    return default
+
+# The word "api" (and the space before it) in an epic title, dropped to leave the resource name
+# that the user story fallback matches against endpoint paths
+_API_WORD_RE = re.compile(r"\s*\bapi\b")
+
+# Start of a document section: the "=====" banner opening a numbered section title, or a markdown heading
+_SECTION_START_RE = re.compile(r"^(?:={10,}\n(?=\d{1,2}\.)|#{1,3} )", re.MULTILINE)
+
+
+async def _iter_completed_sections(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Regroup streamed text so each yielded piece ends where the next section starts"""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        boundary = 0
+        for match in _SECTION_START_RE.finditer(buffer, 1):
+            boundary = match.start()
+        if boundary:
+            yield buffer[:boundary]
+            buffer = buffer[boundary:]
+    if buffer:
+        yield buffer
+
+# generate_content dispatch: phase-name substrings checked in order, first match wins
+_PHASE_MARKERS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("Planning", "planning"),
+    ("Backlog", "planning"),
+    ("Requirements", "requirements"),
+    ("Architecture", "architecture"),
+    ("LLD", "lld"),
+    ("Detailed Technical Design", "lld"),
+    ("Development", "development"),
+    ("Phase 5", "development"),
+)
+
+# Placeholder content when a phase has no handler for the requested content_type
+_DEFAULT_PHASE_CONTENT: Final[Dict[Optional[str], str]] = {
+    "planning": "Generated planning content",
+    "requirements": "Generated content for {content_type}",
+    "architecture": "Generated architecture content",
+    "lld": "Generated LLD content for {content_type}",
+    "development": "Generated development content for {content_type}",
+    None: "Generated {content_type} for {phase_name}",
+}
+
+
+@functools.lru_cache(maxsize=128)
+def _phase_kind(phase_name: str) -> Optional[str]:
+    """Map a phase name to its dispatch key; phase names come from a small fixed set, so this is cached"""
+    return next((kind for marker, kind in _PHASE_MARKERS if marker in phase_name), None)
+
+
+# PRD/BRD output budget: completion length drives latency, so scale the cap with the input size.
+# The floor leaves room for every mandatory section on a small spec
+_DOCUMENT_MIN_TOKENS = 2500
+_DOCUMENT_MAX_TOKENS = 6000
+_DOCUMENT_TOKENS_PER_ITEM = 60
+
+
+def _document_max_tokens(data: Dict[str, Any]) -> int:
+    items = (
+        len(data.get('functionalRequirements') or data.get('requirements') or [])
+        + len(data.get('nonFunctionalRequirements') or [])
+        + len(data.get('extractedStakeholders') or [])
+    )
+    return min(_DOCUMENT_MAX_TOKENS, max(_DOCUMENT_MIN_TOKENS, 200 + _DOCUMENT_TOKENS_PER_ITEM * items))
+
+
+
+# PRD/BRD text longer than this is condensed to a feature summary before going into the epics prompt
+_DOC_SUMMARY_MIN_CHARS = 2000
+_DOC_SUMMARY_MAX_TOKENS = 400
+_DOC_SUMMARY_SYSTEM_PROMPT: Final[str] = (
+    "You condense product documents for backlog planning. Extract the key features, capabilities and "
+    "constraints as a concise bullet list. Do not add anything that is not in the document."
+)
+
+# Functional requirements listed individually in the epics prompt; High priority ones are always kept
+_EPIC_PROMPT_MAX_REQUIREMENTS = 60
+
+
+class _Priority(IntEnum):
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+_PRIORITY_BY_NAME: Final[Dict[str, _Priority]] = {priority.name.lower(): priority for priority in _Priority}
+
+
+def _priority_rank(item: dict) -> _Priority:
+    """Rank of an item's 'priority' string (any case); missing or unknown priorities count as Medium"""
+    priority = item.get('priority')
+    if not isinstance(priority, str):
+        return _Priority.MEDIUM
+    return _PRIORITY_BY_NAME.get(priority.lower(), _Priority.MEDIUM)
+
+
+def _select_prompt_requirements(reqs: list, limit: int) -> Tuple[List[Tuple[int, dict]], int]:
+    """
+    Pick at most `limit` requirements for a prompt as (1-based index, requirement) pairs in original order:
+    every High priority requirement, then Medium before Low, earliest first. Returns the pairs and the omitted count.
+    """
+    if len(reqs) <= limit:
+        return list(enumerate(reqs, 1)), 0
+    # sort is stable, so requirements of equal priority keep their original order
+    ranked = sorted(((_priority_rank(req), idx, req) for idx, req in enumerate(reqs, 1)), key=lambda item: item[0], reverse=True)
+    keep = max(limit, sum(1 for rank, _, _ in ranked if rank is _Priority.HIGH))
+    selected = sorted((idx, req) for _, idx, req in ranked[:keep])
+    return selected, len(reqs) - len(selected)
+
+
+# Prompt context builders for the PRD/BRD generators: pure functions of the extracted data
+# Only the head of the original user input goes into the PRD/BRD prompts
+_USER_INPUT_PROMPT_CHARS = 3000
+
+
+def _user_input_excerpt(data: Dict[str, Any]) -> str:
+    user_input = data.get('userInput')
+    if not user_input:
+        return 'Not provided'
+    return user_input if len(user_input) <= _USER_INPUT_PROMPT_CHARS else user_input[:_USER_INPUT_PROMPT_CHARS]
+
+
+def _req_text(req: dict) -> str:
+    return req.get('Requirement') or req.get('requirement') or 'N/A'
+
+
+def _build_fr_context(functional_reqs: list) -> str:
+    if not functional_reqs:
+        return ""
+    parts = ["\nFunctional Requirements:\n"]
+    for idx, fr in enumerate(functional_reqs, 1):
+        service = fr.get('Service', 'General')
+        req = _req_text(fr)
+        priority = fr.get('Priority', 'Medium')
+        category = fr.get('Category', 'Feature')
+        parts.append(f"  {idx}. [{service}] {req} (Priority: {priority}, Category: {category})\n")
+    return "".join(parts)
+
+
+def _build_fr_business_context(functional_reqs: list) -> str:
+    if not functional_reqs:
+        return ""
+    parts = ["\nFunctional Requirements (Business Capabilities Needed):\n"]
+    for idx, fr in enumerate(functional_reqs, 1):
+        service = fr.get('Service', 'General')
+        req = _req_text(fr)
+        priority = fr.get('Priority', 'Medium')
+        parts.append(f"  {idx}. [{service}] {req} (Priority: {priority})\n")
+    return "".join(parts)
+
+
+def _build_nfr_context(non_functional_reqs: list) -> str:
+    if not non_functional_reqs:
+        return ""
+    parts = ["\nNon-Functional Requirements:\n"]
+    for idx, nfr in enumerate(non_functional_reqs, 1):
+        category = nfr.get('Category', 'Performance')
+        req = _req_text(nfr)
+        description = nfr.get('Description', '')
+        parts.append(f"  {idx}. [{category}] {req}")
+        if description:
+            parts.append(f" - {description}")
+        parts.append("\n")
+    return "".join(parts)
+
+
+def _build_nfr_business_context(non_functional_reqs: list) -> str:
+    if not non_functional_reqs:
+        return ""
+    parts = ["\nNon-Functional Requirements (Quality Expectations):\n"]
+    for idx, nfr in enumerate(non_functional_reqs, 1):
+        category = nfr.get('Category', 'Quality')
+        req = _req_text(nfr)
+        parts.append(f"  {idx}. [{category}] {req}\n")
+    return "".join(parts)
+
+
+def _build_scope_context(scope: dict) -> str:
+    if not scope:
+        return ""
+    parts = ["\nProject Scope:\n"]
+    in_scope = scope.get('InScope', [])
+    out_scope = scope.get('OutOfScope', [])
+    if in_scope:
+        parts.append("  In Scope:\n")
+        parts.extend(f"    - {item}\n" for item in in_scope)
+    if out_scope:
+        parts.append("  Out of Scope:\n")
+        parts.extend(f"    - {item}\n" for item in out_scope)
+    return "".join(parts)
+
+
+def _build_stakeholder_context(stakeholders: list) -> str:
+    if not stakeholders:
+        return ""
+    parts = ["\nStakeholders:\n"]
+    for sh in stakeholders:
+        if isinstance(sh, str):
+            parts.append(f"  - {sh}\n")
+        elif isinstance(sh, dict):
+            role = sh.get('Role', sh.get('role', 'N/A'))
+            parts.append(f"  - {role}\n")
+    return "".join(parts)
+
+
+def _tech_categories(tech_stack: dict, technology_and_tools: dict, key: str) -> dict:
+    """Category -> technologies for 'Extracted' or 'Suggested', preferring the extracted tech stack"""
+    return tech_stack.get(key) or technology_and_tools.get(key) or {}
+
+
+def _build_tech_context(tech_stack: dict, technology_and_tools: dict) -> str:
+    if not (tech_stack or technology_and_tools):
+        return ""
+    parts = ["\nTechnology Stack:\n"]
+    # Extracted tech
+    extracted = _tech_categories(tech_stack, technology_and_tools, 'Extracted')
+    if extracted:
+        parts.append("  Extracted (Mentioned by user):\n")
+        parts.extend(f"    {category}: {', '.join(items)}\n" for category, items in extracted.items() if items)
+    # Suggested tech
+    suggested = _tech_categories(tech_stack, technology_and_tools, 'Suggested')
+    if suggested:
+        parts.append("  Suggested (Recommended):\n")
+        parts.extend(f"    {category}: {', '.join(items)}\n" for category, items in suggested.items() if items)
+    return "".join(parts)
+
+
+def _build_tech_constraints(tech_stack: dict, technology_and_tools: dict) -> str:
+    if not (tech_stack or technology_and_tools):
+        return ""
+    parts = ["\nTechnology Constraints:\n"]
+    extracted = _tech_categories(tech_stack, technology_and_tools, 'Extracted')
+    if extracted:
+        parts.append("  Required/Mentioned Technologies:\n")
+        parts.extend(f"    - {category}: {', '.join(items)}\n" for category, items in extracted.items() if items)
+    return "".join(parts)
+
+
+def _build_metrics_context(success_metrics: list, heading: str) -> str:
+    if not success_metrics:
+        return ""
+    parts = [f"\n{heading}:\n"]
+    parts.extend(f"  - {metric}\n" for metric in success_metrics)
+    return "".join(parts)
+
+
+def normalize_risk_analysis(risk_analysis: Any) -> Dict[str, list]:
+    """
+    Normalize a categorized risk analysis ({"TechnicalRisks": [...], ...}) so every category maps to a list.
+    The model occasionally returns a single risk as a bare string, and older phase data may hold those.
+    """
+    if not isinstance(risk_analysis, dict):
+        return {}
+    return {
+        risk_type: risks if isinstance(risks, list) else ([] if risks is None else [risks])
+        for risk_type, risks in risk_analysis.items()
+    }
+
+
+def _build_risks_context(extracted_risks: Dict[str, list], heading: str) -> str:
+    if not extracted_risks:
+        return ""
+    parts = [f"\n{heading}:\n"]
+    for risk_type, risk_list in extracted_risks.items():
+        parts.append(f"  {risk_type}:\n")
+        parts.extend(f"    - {risk}\n" for risk in risk_list)
+    return "".join(parts)
+
+
+
+@dataclass(frozen=True, slots=True)
+class _Phase1Context:
+    """Phase 1 inputs read by the backlog generators, with the prompt sections they render identically"""
+    requirements: list
+    gherkin_reqs: list
+    functional_reqs: list
+    non_functional_reqs: list
+    business_proposal: dict
+    stakeholders: list
+    risks_data: dict
+    ai_notes: str
+    prd: str
+    brd: str
+    risks: list
+    project_info: dict
+    api_spec: Optional[dict]
+    api_summary: str
+    nfr_context: str
+    risks_context: str
+
+
+def _build_phase1_context(data: Dict[str, Any]) -> _Phase1Context:
+    non_functional_reqs = data.get('nonFunctionalRequirements', [])
+    risks_data = data.get('extractedRisks', {})
+    risks = data.get('risks', [])
+    
+    nfr_parts: List[str] = []
+    if non_functional_reqs:
+        nfr_parts.append("\n### Non-Functional Requirements:\n")
+        for idx, req in enumerate(non_functional_reqs, 1):
+            get = req.get
+            nfr_parts.append(
+                f"\n{idx}. **{get('requirement', 'N/A')}**\n"
+                f"   - Category: {get('category', 'N/A')}\n"
+                f"   - Priority: {get('priority', 'Medium')}\n"
+                f"   - Description: {get('description', 'N/A')}\n"
+            )
+    
+    risks_context = ""
+    if risks_data:
+        risks_context = "\n### Identified Risks:\n" + "".join(
+            f"- **{category}**: {'; '.join(map(str, category_risks))}\n" for category, category_risks in risks_data.items()
+        )
+    elif risks:
+        risks_context = "\n### Identified Risks:\n" + "".join(
+            f"{idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n"
+            for idx, risk in enumerate(risks[:5], 1)  # Top 5 risks
+        )
+    
+    return _Phase1Context(
+        requirements=data.get('requirements', []),
+        gherkin_reqs=data.get('gherkinRequirements', []),
+        functional_reqs=data.get('functionalRequirements', []),
+        non_functional_reqs=non_functional_reqs,
+        business_proposal=data.get('businessProposal', {}),
+        stakeholders=data.get('extractedStakeholders', []),
+        risks_data=risks_data,
+        ai_notes=data.get('aiNotes', ''),
+        prd=data.get('prd', ''),
+        brd=data.get('brd', ''),
+        risks=risks,
+        project_info=data.get('project', {}),
+        api_spec=data.get('apiSpec'),
+        api_summary=data.get('apiSummary', ''),
+        nfr_context="".join(nfr_parts),
+        risks_context=risks_context
+    )
+
+
+def _group_endpoints_by_resource(api_endpoints: dict) -> Dict[str, List[str]]:
+    """Group API paths by resource, the first path segment (e.g. /users/{id} -> users)"""
+    endpoint_groups: Dict[str, List[str]] = defaultdict(list)
+    for path in api_endpoints:
+        endpoint_groups[path.strip('/').partition('/')[0]].append(path)
+    return dict(endpoint_groups)
+
+
+# User stories are requested for at most this many epics per OpenAI call; larger epic sets fan out
+# into concurrent calls, each with the shared requirements context and its own share of the 4000
+# token output budget
+_USER_STORY_EPICS_PER_CALL = 5
+_USER_STORY_SYSTEM_PROMPT: Final[str] = (
+    "You are an expert Scrum Master who creates detailed user stories from epics and requirements. "
+    "Always respond with valid JSON."
+)
+# Batched requests see the full requirements/API context, so the prompt limits each batch to its own
+# epics; otherwise every batch writes stories for every endpoint and requirement and the merge duplicates them
+_USER_STORY_BATCH_SCOPE: Final[str] = (
+    "\n\n**Scope of this request**: these are epics {first}-{last} of {total}. Generate user stories ONLY for "
+    "the epics listed above; the other epics are handled in separate requests. Skip API endpoints and "
+    "requirements that belong to other epics."
+)
+# Shared by every user story request; the SDK copies messages while building the request body
+_USER_STORY_SYSTEM_MESSAGE: Final[Dict[str, str]] = {"role": "system", "content": _USER_STORY_SYSTEM_PROMPT}
+
+
+def _build_epics_context(epics: list) -> str:
+    epic_parts: List[str] = []
+    for epic in epics:
+        epic_parts.append(f"\n**Epic {epic.get('id')}**: {epic.get('title')}\n")
+        epic_parts.append(f"  - Description: {epic.get('description')}\n")
+        epic_parts.append(f"  - Priority: {epic.get('priority')}\n")
+        epic_parts.append(f"  - Expected Stories: {epic.get('stories')}\n")
+        epic_parts.append(f"  - Story Points: {epic.get('points')}\n")
+        epic_parts.append(f"  - Requirements Mapped: {', '.join(epic.get('requirements_mapped', []))}\n")
+    return "".join(epic_parts)
+
+
+class _Epic(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    id: int
+    title: str
+    description: str
+    stories: int
+    points: int
+    priority: Literal["High", "Medium", "Low"]
+    requirements_mapped: List[str]
+
+
+class _EpicList(BaseModel):
+    """Structured-output envelope for epic generation (strict schemas need an object at the top level)"""
+    model_config = ConfigDict(extra="forbid")
+    
+    epics: List[_Epic]
+
+
+_EPICS_RESPONSE_FORMAT: Final[Dict[str, Any]] = {
+    "type": "json_schema",
+    "json_schema": {"name": "epic_list", "strict": True, "schema": _EpicList.model_json_schema()},
+}
+
+# OpenAI requests in flight per process; further calls wait for a pooled connection instead of
+# bursting past the account's rate limits. The client stays on HTTP/1.1: HTTP/2 would multiplex
+# any number of requests over one pooled connection, so the pool size would no longer cap them
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "10"))
+# Attempts after the first for transient failures (429, 5xx, timeouts, dropped connections); the SDK
+# backs off exponentially with jitter and honours Retry-After before callers fall back to templates
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+
+# Per-attempt timeouts (seconds): a stalled request is abandoned and retried instead of holding the
+# caller for the SDK's 10 minute default
+_DOCUMENT_TIMEOUT_SECONDS = 180.0
+_EPICS_TIMEOUT_SECONDS = 60.0
+_DOC_SUMMARY_TIMEOUT_SECONDS = 30.0
+
+
+_openai_clients: Dict[Optional[str], AsyncOpenAI] = {}
+
+
+def _openai_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """One pooled client per API key, shared by every AIService instance (routers create them per request)"""
+    client = _openai_clients.get(api_key)
+    if client is None:
+        client = _openai_clients[api_key] = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=OPENAI_MAX_CONCURRENCY, max_keepalive_connections=OPENAI_MAX_CONCURRENCY)
+            )
+        )
+    return client
+
+
+async def close_openai_clients() -> None:
+    """Close the pooled OpenAI clients; called from the app lifespan on shutdown"""
+    clients = list(_openai_clients.values())
+    _openai_clients.clear()
+    for client in clients:
+        await client.close()
+
+
+class AIService:
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.client = _openai_client(self.api_key)
+        # Per-task model overrides, so ops can move a task to another model without a code change
+        self.model_prd = os.getenv("OPENAI_PRD_MODEL", "gpt-4o-mini")
+        self.model_brd = os.getenv("OPENAI_BRD_MODEL", "gpt-4o-mini")
+        self.model_epics = os.getenv("OPENAI_EPICS_MODEL", "gpt-4o-mini")
+        # (phase kind, content_type) -> (handler, passthrough). Passthrough handlers return their own
+        # structured result; the others are wrapped as {"content": ..., "confidence_score": 85}.
+        # Kind None covers phase names that match no marker.
+        self._content_handlers: Dict[Tuple[Optional[str], str], Tuple[Callable[[Dict[str, Any]], Any], bool]] = {
+            ("planning", "epics"): (self._generate_epics, False),
+            ("planning", "user_stories"): (self._generate_user_stories, False),
+            ("planning", "epics_and_stories"): (self._generate_epics_and_stories, False),
+            ("requirements", "prd"): (self._generate_prd, False),
+            ("requirements", "brd"): (self._generate_brd, False),
+            ("requirements", "requirements"): (self._generate_requirements, False),
+            ("architecture", "architecture"): (self._generate_architecture, False),
+            ("lld", "component_wise_lld"): (self._generate_component_wise_lld, True),
+            ("development", "user_story_dev_delivery"): (self._generate_user_story_dev_delivery, True),
+            (None, "epics_and_stories"): (self._generate_epics_and_stories, False),
+            (None, "user_story_dev_delivery"): (self._generate_user_story_dev_delivery, True),
+        }
+    
+    async def _cached_chat_completion(self, system_prompt: str, user_prompt: str, model: str = "gpt-4o-mini",
+                                      temperature: float = 0.3, max_tokens: int = 6000,
+                                      timeout: float = _DOCUMENT_TIMEOUT_SECONDS, regenerate: bool = False) -> str:
+        """
+        Run a system + user chat completion and return the stripped message content.
+        Identical prompts with identical parameters are answered from an in-process LRU cache;
+        errors propagate and are never cached. regenerate skips the lookup (the user asked for a
+        fresh draft) but still caches the new result.
+        """
+        key = _prompt_cache_key(model, temperature, max_tokens, system_prompt, user_prompt)
+        cached = None if regenerate else _prompt_cache_get(key)
+        if cached is not None:
+            return cached
+        
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        content = response.choices[0].message.content.strip()
+        _prompt_cache_put(key, content)
+        return content
+    
+    async def _summarize_doc(self, text: str, max_tokens: int = _DOC_SUMMARY_MAX_TOKENS) -> str:
+        """
+        Condense a long PRD/BRD into a feature bullet list for prompts that only need its gist.
+        Short text is returned as-is; summaries go through the prompt cache, so a given document is
+        summarized once. If the call fails, the first _DOC_SUMMARY_MIN_CHARS characters are used instead.
+        """
+        if len(text) <= _DOC_SUMMARY_MIN_CHARS:
+            return text
+        try:
+            return await self._cached_chat_completion(
+                _DOC_SUMMARY_SYSTEM_PROMPT, text, temperature=0, max_tokens=max_tokens,
+                timeout=_DOC_SUMMARY_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning("Document summary failed, truncating instead: %s", e)
+            return text[:_DOC_SUMMARY_MIN_CHARS] + "..."
+    
+    async def _stream_chat_completion(self, system_prompt: str, user_prompt: str, model: str = "gpt-4o-mini",
+                                      temperature: float = 0.3, max_tokens: int = 6000,
+                                      timeout: float = _DOCUMENT_TIMEOUT_SECONDS, regenerate: bool = False) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of _cached_chat_completion: yields content deltas as the model produces them.
+        A cache hit is yielded as a single chunk; a completed stream is stored in the same prompt cache.
+        """
+        key = _prompt_cache_key(model, temperature, max_tokens, system_prompt, user_prompt)
+        cached = None if regenerate else _prompt_cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            timeout=timeout
+        )
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        _prompt_cache_put(key, "".join(parts).strip())
+    
+    async def stream_document(self, content_type: str, data: Dict[str, Any], by_section: bool = False) -> AsyncIterator[str]:
+        """
+        Stream a PRD or BRD as text chunks while it is generated.
+        With by_section, chunks are regrouped so each one is a completed document section.
+        If the completion fails before any text is sent, the fallback document is sent instead.
+        """
+        if content_type == "prd":
+            system_prompt, user_prompt, fallback = _PRD_SYSTEM_PROMPT, self._prd_user_prompt(data), self._generate_fallback_prd
+            model = self.model_prd
+        elif content_type == "brd":
+            system_prompt, user_prompt, fallback = _BRD_SYSTEM_PROMPT, self._brd_user_prompt(data), self._generate_fallback_brd
+            model = self.model_brd
+        else:
+            raise ValueError(f"Streaming is not supported for content_type '{content_type}'")
+        
+        chunks = self._stream_chat_completion(system_prompt, user_prompt, model=model, temperature=0.3, max_tokens=_document_max_tokens(data),
+                                              regenerate=bool(data.get('regenerate')))
+        if by_section:
+            chunks = _iter_completed_sections(chunks)
+        
+        sent_any = False
+        try:
+            async for chunk in chunks:
+                sent_any = True
+                yield chunk
+        except Exception:
+            logger.exception("%s streaming failed", content_type.upper())
+            if sent_any:
+                raise
+            yield fallback(data.get('project', {}), _pick(data, 'functionalRequirements', 'requirements', default=[]))
+    
+    def _extract_technologies_from_text(self, text: str) -> frozenset:
+        """
+        DYNAMIC technology extraction - NO HARDCODED LISTS.
+        Extract ANY technology/tool/platform mentioned in text using pattern recognition.
+        This ONLY finds what's explicitly mentioned, nothing else.
+        See extract_technologies() for the patterns; results are memoized per text.
+        """
+        if not text or not isinstance(text, str):
+            return frozenset()
+        if len(text) > _TECH_CACHE_MAX_TEXT_LEN:
+            return _extract_technologies_uncached(text)
+        return extract_technologies(text)
+    
+    def _generate_fallback_e2e_flows(self, epics: list, user_stories: list, execution_order: list) -> list:
+        """
+        Generate fallback E2E flow diagrams if AI didn't generate them
+        Creates basic but complete flow diagrams based on available data
+        """
+        try:
+            flows = []
+            
+            # First match wins for duplicate ids, as with the old linear scan
+            epic_by_id = {epic.get('id'): epic.get('title', 'Unknown') for epic in reversed(epics)}
+            
+            # One flow per story for the first 2-3 user stories (primary, secondary, advanced)
+            for story, (title_prefix, default_title, description_prefix, mermaid) in zip(user_stories, _FALLBACK_FLOW_SPECS):
+                if not story:
+                    continue
+                story_title = story.get('title', 'N/A')
+                flows.append({
+                    'title': f"{title_prefix}: {story.get('title', default_title)[:50]}",
+                    'user_story': story_title,
+                    'epic': epic_by_id.get(story.get('epic_id', 1), "Unknown Epic"),
+                    'description': f'{description_prefix} flow for {story_title}',
+                    'mermaid': mermaid
+                })
+            
+            if not flows:
+                # Create a generic flow if no stories available
+                print("[WARNING] No user stories available for fallback E2E flow generation")
+                flows.append({
+                    'title': 'Generic Flow',
+                    'user_story': 'N/A',
+                    'epic': 'N/A',
+                    'description': 'Generic system flow',
+                    'mermaid': _MERMAID_GENERIC
+                })
+            
+            print(f"[OK] Generated {len(flows)} fallback E2E flow diagrams")
+            return flows
+            
+        except Exception as e:
+            print(f"[ERROR] Failed to generate fallback E2E flows: {str(e)}")
+            # Return at least one flow even if there's an error
+            return [{
+                'title': 'Default Flow',
+                'user_story': 'Default',
+                'epic': 'Default',
+                'description': 'Default system flow',
+                'mermaid': _MERMAID_DEFAULT
+            }]
+        
+    async def process_query(self, query: str, phase_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process user query with AI assistance
+        """
+        # Mock response for now - integrate with actual LLM in production
+        return {
+            "response": f"AI response for '{query}' in phase '{phase_name}'. Context: {orjson.dumps(context).decode()}",
+            "confidence_score": 85,
+            "alternatives": [
+                "Alternative approach 1",
+                "Alternative approach 2"
+            ],
+            "explanation": "This is the recommended approach based on best practices."
+        }
+    
+    async def generate_content(self, phase_name: str, content_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate phase-specific content
+        """
+        logger.debug("generate_content called with phase_name=%r, content_type=%r", phase_name, content_type)
+        
+        kind = _phase_kind(phase_name)
+        if kind is None:
+            logger.warning("Phase name %r doesn't match any known patterns (content_type=%s)", phase_name, content_type)
+        
+        handler_entry = self._content_handlers.get((kind, content_type))
+        if handler_entry is None:
+            content = _DEFAULT_PHASE_CONTENT[kind].format(content_type=content_type, phase_name=phase_name)
+        else:
+            handler, passthrough = handler_entry
+            logger.debug("Dispatching %s/%s to %s", kind, content_type, handler.__name__)
+            try:
+                content = handler(data)
+                if inspect.isawaitable(content):
+                    content = await content
+            except Exception:
+                logger.exception("%s failed", handler.__name__)
+                raise
+            if passthrough:
+                # LLD and Phase 5 deliverables return their own structured format
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s returned %s with keys %s", handler.__name__, type(content).__name__,
+                                 list(content.keys()) if isinstance(content, dict) else 'N/A')
+                return content
+        
+        return {
+            "content": content,
+            "confidence_score": 85
+        }
+    
+    async def _generate_prd(self, data: Dict[str, Any]) -> str:
+        """
+        Generate Product Requirements Document using the comprehensive PRD prompt.
+        Input: All extracted requirements output + user input
+        Output: Complete, professional PRD with 13 sections
+        """
+        project_info = data.get('project', {})
+        logger.info("Generating PRD for project: %s", project_info.get('name', 'Project'))
+        user_prompt = self._prd_user_prompt(data)
+        
+        try:
+            # Low temperature for consistent, precise output; repeated identical inputs hit the prompt cache
+            prd_content = await self._cached_chat_completion(_PRD_SYSTEM_PROMPT, user_prompt, model=self.model_prd, temperature=0.3, max_tokens=_document_max_tokens(data),
+                                                               regenerate=bool(data.get('regenerate')))
+            logger.info("PRD generated (%d characters)", len(prd_content))
+            return prd_content
+        except Exception as e:
+            logger.error("PRD generation failed, using fallback template: %s", e)
+            return self._generate_fallback_prd(project_info, _pick(data, 'functionalRequirements', 'requirements', default=[]))
+
+    def _prd_user_prompt(self, data: Dict[str, Any]) -> str:
+        """Build the PRD user prompt from all extracted requirements output + user input"""
+        # Extract all necessary data
+        functional_reqs = data.get('functionalRequirements', [])
+        non_functional_reqs = data.get('nonFunctionalRequirements', [])
+        business_proposal = data.get('businessProposal', {})
+        stakeholders = data.get('extractedStakeholders', [])
+        extracted_risks = data.get('extractedRisks', {})
+        technology_and_tools = data.get('technologyAndTools', {})
+        tech_stack = data.get('extractedTechStack', {})
+        scope = business_proposal.get('Scope', {})
+        success_metrics = business_proposal.get('SuccessMetrics', [])
+        user_input = _user_input_excerpt(data)  # Original user input, clamped for the prompt
+        project_info = data.get('project', {})
+        
+        # Build user prompt with all extracted data and comprehensive requirement context
+        return _PRD_USER_PROMPT_TEMPLATE.format_map({
+            'project_name': business_proposal.get('Title', project_info.get('name', 'Project')),
+            'problem_to_solve': business_proposal.get('ProblemToSolve', 'Not specified'),
+            'vision': business_proposal.get('Vision', 'Not specified'),
+            'scope_context': _build_scope_context(scope),
+            'fr_context': _build_fr_context(functional_reqs),
+            'nfr_context': _build_nfr_context(non_functional_reqs),
+            'stakeholder_context': _build_stakeholder_context(stakeholders),
+            'metrics_context': _build_metrics_context(success_metrics, "Success Metrics"),
+            'tech_context': _build_tech_context(tech_stack, technology_and_tools),
+            'risks_context': _build_risks_context(extracted_risks, "Risks Identified"),
+            'user_input': user_input,
+        })
+
+    async def _generate_brd(self, data: Dict[str, Any]) -> str:
+        """
+        Generate Business Requirements Document using the comprehensive BRD prompt.
+        Input: All extracted requirements output + user input
+        Output: Complete, professional BRD with 14 sections focused on business value
+        """
+        project_info = data.get('project', {})
+        logger.info("Generating BRD for project: %s", project_info.get('name', 'Project'))
+        user_prompt = self._brd_user_prompt(data)
+        
+        try:
+            # Low temperature for consistent, precise output; repeated identical inputs hit the prompt cache
+            brd_content = await self._cached_chat_completion(_BRD_SYSTEM_PROMPT, user_prompt, model=self.model_brd, temperature=0.3, max_tokens=_document_max_tokens(data),
+                                                               regenerate=bool(data.get('regenerate')))
+            logger.info("BRD generated (%d characters)", len(brd_content))
+            return brd_content
+        except Exception as e:
+            logger.error("BRD generation failed, using fallback template: %s", e)
+            return self._generate_fallback_brd(project_info, _pick(data, 'functionalRequirements', 'requirements', default=[]))
+
+    def _brd_user_prompt(self, data: Dict[str, Any]) -> str:
+        """Build the BRD user prompt from all extracted requirements output + user input"""
+        # Extract all necessary data
+        functional_reqs = data.get('functionalRequirements', [])
+        non_functional_reqs = data.get('nonFunctionalRequirements', [])
+        business_proposal = data.get('businessProposal', {})
+        stakeholders = data.get('extractedStakeholders', [])
+        extracted_risks = data.get('extractedRisks', {})
+        technology_and_tools = data.get('technologyAndTools', {})
+        tech_stack = data.get('extractedTechStack', {})
+        scope = business_proposal.get('Scope', {})
+        success_metrics = business_proposal.get('SuccessMetrics', [])
+        user_input = _user_input_excerpt(data)  # Original user input, clamped for the prompt
+        project_info = data.get('project', {})
+        
+        # Build user prompt with all extracted data and requirement context for business focus
+        return _BRD_USER_PROMPT_TEMPLATE.format_map({
+            'project_name': business_proposal.get('Title', project_info.get('name', 'Project')),
+            'problem_to_solve': business_proposal.get('ProblemToSolve', 'Not specified'),
+            'vision': business_proposal.get('Vision', 'Not specified'),
+            'scope_context': _build_scope_context(scope),
+            'fr_context': _build_fr_business_context(functional_reqs),
+            'nfr_context': _build_nfr_business_context(non_functional_reqs),
+            'stakeholder_context': _build_stakeholder_context(stakeholders),
+            'metrics_context': _build_metrics_context(success_metrics, "Business Success Metrics"),
+            'tech_context': _build_tech_constraints(tech_stack, technology_and_tools),
+            'risks_context': _build_risks_context(extracted_risks, "Business Risks"),
+            'user_input': user_input,
+        })
+
+    def _generate_requirements(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Generate extracted requirements"""
+        # Fresh dicts: the result is stored in phase.data and serialized, neither of which accepts mappingproxy
+        return [dict(req) for req in _STATIC_REQUIREMENTS]
+    
+    async def _generate_epics(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Generate epics based on Phase 1 requirements, PRD, BRD, and API specifications using OpenAI
+        
+        Intelligently analyzes requirements and groups them into high-level epics.
+        For API-based projects, creates epics based on API endpoint groups.
+        Uses ALL extracted data from Phase 1 for comprehensive epic generation.
+        """
+        # Extract ALL Phase 1 data
+        phase1 = _build_phase1_context(data)
+        requirements = phase1.requirements
+        gherkin_reqs = phase1.gherkin_reqs
+        functional_reqs = phase1.functional_reqs
+        non_functional_reqs = phase1.non_functional_reqs
+        business_proposal = phase1.business_proposal
+        stakeholders = phase1.stakeholders
+        ai_notes = phase1.ai_notes
+        prd = phase1.prd
+        brd = phase1.brd
+        project_info = phase1.project_info
+        
+        # Check for API specifications
+        api_spec = phase1.api_spec
+        api_summary = phase1.api_summary
+        
+        logger.info("Generating epics for project: %s", project_info.get('name', 'Project'))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Epic inputs: %d functional, %d non-functional, %d gherkin requirements; "
+                "business proposal: %s; API endpoints: %d",
+                len(functional_reqs), len(non_functional_reqs), len(gherkin_reqs),
+                bool(business_proposal), len(api_spec.get('paths', {})) if api_spec else 0
+            )
+        
+        has_reqs = bool(functional_reqs or non_functional_reqs or gherkin_reqs or requirements)
+        
+        # If no requirements and no API specs, don't generate dummy epics
+        if not has_reqs and not api_spec and not business_proposal:
+            logger.warning("No requirements or API specs found - cannot generate meaningful epics")
+            return []
+        
+        # Prepare requirements context for OpenAI
+        req_parts: List[str] = []
+        
+        # Add Functional Requirements
+        if functional_reqs:
+            req_parts.append("\n### Functional Requirements:\n")
+            selected_reqs, omitted_reqs = _select_prompt_requirements(functional_reqs, _EPIC_PROMPT_MAX_REQUIREMENTS)
+            for idx, req in selected_reqs:
+                get = req.get
+                req_parts.append(
+                    f"\n{idx}. **{get('requirement', 'N/A')}**\n"
+                    f"   - Priority: {get('priority', 'Medium')}\n"
+                    f"   - Stakeholder/Actor: {get('stakeholder_actor', 'N/A')}\n"
+                    f"   - Category: {get('category', 'N/A')}\n"
+                )
+                derived_from = get('derived_from')
+                if derived_from:
+                    req_parts.append(f"   - Derived From: {derived_from}\n")
+            if omitted_reqs:
+                req_parts.append(f"\n({omitted_reqs} further Medium/Low priority requirements omitted for brevity; cover them in the closest matching epic)\n")
+        
+        # Add Non-Functional Requirements
+        req_parts.append(phase1.nfr_context)
+        
+        # Add Gherkin Requirements
+        if gherkin_reqs:
+            req_parts.append("\n### Gherkin Requirements:\n")
             for idx, req in enumerate(gherkin_reqs, 1):
-                requirements_context += f"\n{idx}. **{req.get('feature', 'Feature')}** (ID: {req.get('id', '')})\n"
-                requirements_context += f"   - As a {req.get('as_a', 'user')}, I want {req.get('i_want', '')}\n"
-                requirements_context += f"   - So that {req.get('so_that', '')}\n"
-                requirements_context += f"   - Priority: {req.get('priority', 'Medium')}\n"
+                get = req.get
+                req_parts.append(
+                    f"\n{idx}. **{get('feature', 'Feature')}** (ID: {get('id', '')})\n"
+                    f"   - As a {get('as_a', 'user')}, I want {get('i_want', '')}\n"
+                    f"   - So that {get('so_that', '')}\n"
+                    f"   - Priority: {get('priority', 'Medium')}\n"
+                )
                 
-                scenarios = req.get('scenarios', [])
+                scenarios = get('scenarios', [])
                 if scenarios:
-                    requirements_context += f"   - Scenarios: {len(scenarios)}\n"
+                    req_parts.append(f"   - Scenarios: {len(scenarios)}\n")
                     for scenario in scenarios[:2]:  # Include first 2 scenarios as examples
-                        requirements_context += f"     * {scenario.get('title', '')}\n"
+                        req_parts.append(f"     * {scenario.get('title', '')}\n")
+        requirements_context = "".join(req_parts)
         
         # Add Business Proposal
         business_context = ""
@@ -977,67 +1564,45 @@ Generate the complete 14-section BRD now, adhering strictly to the instructions
         # Add Stakeholders
         stakeholders_context = ""
         if stakeholders:
-            stakeholders_context = "\n### Stakeholders:\n"
+            sh_parts = ["\n### Stakeholders:\n"]
             for sh in stakeholders:
                 role = sh.get('Role') or sh.get('role', 'N/A')
                 resp = sh.get('Responsibility') or sh.get('responsibility', 'N/A')
-                stakeholders_context += f"- {role}: {resp}\n"
-        
-        # Extract key sections from PRD and BRD for context
-        prd_summary = ""
-        if prd and len(prd) > 100:
-            # Extract first 2000 characters of PRD for context
-            prd_summary = prd[:2000] + "..."
-        
-        brd_summary = ""
-        if brd and len(brd) > 100:
-            # Extract first 2000 characters of BRD for context
-            brd_summary = brd[:2000] + "..."
-        
-        # Prepare risk context from extracted risks
-        risks_context = ""
-        if risks_data:
-            risks_context = "\n### Identified Risks:\n"
-            for category, description in risks_data.items():
-                risks_context += f"- **{category}**: {description}\n"
-        elif risks:
-            risks_context = "\n### Identified Risks:\n"
-            for idx, risk in enumerate(risks[:5], 1):  # Top 5 risks
-                risks_context += f"{idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n"
+                sh_parts.append(f"- {role}: {resp}\n")
+            stakeholders_context = "".join(sh_parts)
+        
+        # Condense PRD and BRD for context (both summaries run concurrently)
+        prd_summary, brd_summary = await asyncio.gather(
+            self._summarize_doc(prd if prd and len(prd) > 100 else ""),
+            self._summarize_doc(brd if brd and len(brd) > 100 else "")
+        )
+        
+        # Risk context from extracted risks (or the top 5 assessed risks)
+        risks_context = phase1.risks_context
         
         # Add Constraints/Assumptions
         constraints_context = ""
         if ai_notes:
             constraints_context = f"\n### Constraints & Assumptions:\n{ai_notes}\n"
-            for idx, risk in enumerate(risks[:5], 1):  # Top 5 risks
-                risks_context += f"{idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n"
+        
+        # Group endpoints by resource once; used for the prompt and the template fallback
+        api_endpoints = api_spec.get('paths', {}) if api_spec else {}
+        endpoint_groups = _group_endpoints_by_resource(api_endpoints)
         
         # Prepare API context if available
         api_context = ""
         if api_spec:
-            api_endpoints = api_spec.get('paths', {})
             endpoint_count = len(api_endpoints)
-            api_context = f"\n### API Specifications:\n"
-            api_context += f"Total Endpoints: {endpoint_count}\n"
+            api_parts = ["\n### API Specifications:\n", f"Total Endpoints: {endpoint_count}\n"]
             if api_summary:
-                api_context += f"Summary: {api_summary[:500]}\n"
-            api_context += "\nAPI Endpoint Groups:\n"
-            
-            # Group endpoints by resource (first path segment)
-            endpoint_groups = {}
-            for path in api_endpoints.keys():
-                # Extract resource from path (e.g., /users, /orders, etc.)
-                parts = path.strip('/').split('/')
-                resource = parts[0] if parts else 'general'
-                if resource not in endpoint_groups:
-                    endpoint_groups[resource] = []
-                endpoint_groups[resource].append(path)
+                api_parts.append(f"Summary: {api_summary[:500]}\n")
+            api_parts.append("\nAPI Endpoint Groups:\n")
             
             for resource, paths in endpoint_groups.items():
-                api_context += f"- {resource.upper()}: {len(paths)} endpoints\n"
+                api_parts.append(f"- {resource.upper()}: {len(paths)} endpoints\n")
                 for path in paths[:3]:  # Show first 3 endpoints
-                    methods = list(api_endpoints[path].keys())
-                    api_context += f"  * {', '.join([m.upper() for m in methods])} {path}\n"
+                    api_parts.append(f"  * {', '.join(method.upper() for method in api_endpoints[path])} {path}\n")
+            api_context = "".join(api_parts)
         
         # Create prompt for OpenAI to generate epics
         is_api_project = bool(api_spec)
@@ -1070,20 +1635,22 @@ Generate the complete 14-section BRD now, adhering strictly to the instructions
 7. Reference the actual endpoints in the epic description
 8. Map to requirements if provided
 
-**Output Format** (JSON array):
-[
-  {{
-    "id": 1,
-    "title": "API Resource Group Name (e.g., User Management API)",
-    "description": "Implementation of endpoints: GET /users, POST /users, GET /users/{{id}}, etc.",
-    "stories": 5,
-    "points": 25,
-    "priority": "High",
-    "requirements_mapped": ["req-id-1"]
-  }}
-]
+**Output Format** (JSON object with an "epics" array):
+{{
+  "epics": [
+    {{
+      "id": 1,
+      "title": "API Resource Group Name (e.g., User Management API)",
+      "description": "Implementation of endpoints: GET /users, POST /users, GET /users/{{id}}, etc.",
+      "stories": 5,
+      "points": 25,
+      "priority": "High",
+      "requirements_mapped": ["req-id-1"]
+    }}
+  ]
+}}
 
-Return ONLY the JSON array, no additional text."""
+Return ONLY the JSON object, no additional text."""
         else:
             # Regular requirements-based prompt with ALL extracted Phase 1 data
             prompt = f"""You are an expert Product Manager and Agile Coach. Analyze the following requirements from Phase 1 (Requirements Gathering) and generate a comprehensive set of Epics for Phase 2 (Planning & Backlog).
@@ -1126,90 +1693,62 @@ Return ONLY the JSON array, no additional text."""
 10. Consider identified risks and constraints when prioritizing
 11. For non-functional requirements, create dedicated epics (Performance, Security, etc.)
 
-**Output Format** (JIRA-compatible JSON array):
-[
-  {{
-    "id": 1,
-    "title": "Epic Name (max 100 chars)",
-    "description": "Business value and scope description with specific requirement details",
-    "stories": 5,
-    "points": 25,
-    "priority": "High",
-    "requirements_mapped": ["req-id-1", "req-id-2"]
-  }}
-]
+**Output Format** (JIRA-compatible JSON object with an "epics" array):
+{{
+  "epics": [
+    {{
+      "id": 1,
+      "title": "Epic Name (max 100 chars)",
+      "description": "Business value and scope description with specific requirement details",
+      "stories": 5,
+      "points": 25,
+      "priority": "High",
+      "requirements_mapped": ["req-id-1", "req-id-2"]
+    }}
+  ]
+}}
 
-Return ONLY the JSON array, no additional text."""
+Return ONLY the JSON object, no additional text."""
 
+        system_prompt = "You are an expert Product Manager who creates well-structured Epics from requirements. Respond with a JSON object whose \"epics\" field is the epic array."
+        # Only validated epics are cached, so a malformed response is never replayed; an explicit
+        # regenerate skips the lookup so the user gets a fresh draft (which replaces the cached one)
+        cache_key = _prompt_cache_key(self.model_epics, 0.7, 2000, system_prompt, prompt)
+        cached = None if data.get('regenerate') else _prompt_cache_get(cache_key)
+        if cached is not None:
+            logger.info("Reusing epics generated for identical requirements")
+            return orjson.loads(cached)
+        
         try:
-            # Call OpenAI API
+            # Call OpenAI API; the response schema is enforced server-side (structured outputs)
             response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=self.model_epics,
                 messages=[
-                    {"role": "system", "content": "You are an expert Product Manager who creates well-structured Epics from requirements. Always respond with valid JSON."},
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=2000,
+                response_format=_EPICS_RESPONSE_FORMAT,
+                timeout=_EPICS_TIMEOUT_SECONDS
             )
             
-            # Parse the response
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-            
-            epics = json.loads(content)
+            epics = [epic.model_dump() for epic in _EpicList.model_validate_json(response.choices[0].message.content).epics]
+            if not epics:
+                raise ValueError("OpenAI returned no epics")
             
-            # Validate and ensure proper structure
-            if isinstance(epics, list) and len(epics) > 0:
-                # Ensure all epics have required fields
-                for epic in epics:
-                    if 'id' not in epic:
-                        epic['id'] = epics.index(epic) + 1
-                    if 'title' not in epic:
-                        epic['title'] = f"Epic {epic['id']}"
-                    if 'description' not in epic:
-                        epic['description'] = "Epic description"
-                    if 'stories' not in epic:
-                        epic['stories'] = 5
-                    if 'points' not in epic:
-                        epic['points'] = epic['stories'] * 5
-                    if 'priority' not in epic:
-                        epic['priority'] = "Medium"
-                    if 'requirements_mapped' not in epic:
-                        epic['requirements_mapped'] = []
-                
-                print(f"[OK] Generated {len(epics)} epics using OpenAI")
-                return epics
-            else:
-                raise ValueError("Invalid epic structure from OpenAI")
+            logger.info("Generated %d epics using OpenAI", len(epics))
+            _prompt_cache_put(cache_key, orjson.dumps(epics).decode())
+            return epics
                 
         except Exception as e:
-            print(f"[WARNING] Error generating epics with OpenAI: {str(e)}")
-            print(f"Falling back to template-based generation")
+            logger.warning("Error generating epics with OpenAI, falling back to template-based generation: %s", e)
             
             # Fallback: Create simplified epics from requirements or API specs
             epics = []
             epic_id = 1
             
             if api_spec:
-                # Create epics from API endpoint groups
-                api_endpoints = api_spec.get('paths', {})
-                endpoint_groups = {}
-                
-                # Group endpoints by resource
-                for path in api_endpoints.keys():
-                    parts = path.strip('/').split('/')
-                    resource = parts[0] if parts else 'general'
-                    if resource not in endpoint_groups:
-                        endpoint_groups[resource] = []
-                    endpoint_groups[resource].append(path)
-                
                 # Create epic for each resource group
                 for resource, paths in endpoint_groups.items():
                     num_endpoints = len(paths)
@@ -1258,6 +1797,24 @@ Return ONLY the JSON array, no additional text."""
         
             return epics
     
+    async def _request_user_stories(self, prompt: str) -> List[Dict[str, Any]]:
+        """Run one user story prompt and return the parsed story list; raises ValueError unless it is a list of objects"""
+        response = await self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                _USER_STORY_SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=4000
+        )
+        
+        # Remove markdown code blocks if present
+        user_stories = orjson.loads(_strip_code_fence(response.choices[0].message.content.strip()))
+        if not isinstance(user_stories, list) or not all(isinstance(story, dict) for story in user_stories):
+            raise ValueError("Invalid user story structure from OpenAI")
+        return user_stories
+    
     async def _generate_user_stories(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Generate user stories based on epics, requirements, and API specifications using OpenAI
@@ -1265,439 +1822,291 @@ Return ONLY the JSON array, no additional text."""
         Creates detailed user stories with acceptance criteria and optional subtasks from actual requirements.
         For API projects, creates at least one story per endpoint.
         JIRA-compatible format with subtasks support.
+        Epics are sent in batches of _USER_STORY_EPICS_PER_CALL as concurrent requests and the
+        stories are merged and renumbered in epic order; a failed batch falls back to template
+        stories for its own epics only.
         """
         epics = data.get('epics', [])
         
         # Extract ALL Phase 1 data (same as epics generation)
-        gherkin_reqs = data.get('gherkinRequirements', [])
-        requirements = data.get('requirements', [])
-        functional_reqs = data.get('functionalRequirements', [])
-        non_functional_reqs = data.get('nonFunctionalRequirements', [])
-        business_proposal = data.get('businessProposal', {})
-        stakeholders = data.get('extractedStakeholders', [])
-        risks_data = data.get('extractedRisks', {})
-        ai_notes = data.get('aiNotes', '')
-        prd = data.get('prd', '')
-        brd = data.get('brd', '')
-        risks = data.get('risks', [])
-        project_info = data.get('project', {})
-        
-        # Check for API specifications
-        api_spec = data.get('apiSpec')
-        api_summary = data.get('apiSummary', '')
-        
-        print(f"[INFO] Generating user stories for project: {project_info.get('name', 'Project')}")
-        print(f"[DEBUG] Epics count: {len(epics)}")
-        print(f"[DEBUG] Functional requirements: {len(functional_reqs)}")
-        print(f"[DEBUG] Non-Functional requirements: {len(non_functional_reqs)}")
-        print(f"[DEBUG] Gherkin requirements: {len(gherkin_reqs)}")
-        print(f"[DEBUG] Has API Spec: {bool(api_spec)}")
-        print(f"[DEBUG] API Endpoints: {len(api_spec.get('paths', {})) if api_spec else 0}")
-        
-        if not epics:
-            # Need epics first to generate stories
-            print("[WARNING] No epics found - cannot generate user stories")
-            return []
-        
-        # Prepare context for OpenAI
-        epics_context = ""
-        for epic in epics:
-            epics_context += f"\n**Epic {epic.get('id')}**: {epic.get('title')}\n"
-            epics_context += f"  - Description: {epic.get('description')}\n"
-            epics_context += f"  - Priority: {epic.get('priority')}\n"
-            epics_context += f"  - Expected Stories: {epic.get('stories')}\n"
-            epics_context += f"  - Story Points: {epic.get('points')}\n"
-            epics_context += f"  - Requirements Mapped: {', '.join(epic.get('requirements_mapped', []))}\n"
-        
-        # Prepare comprehensive requirements context
-        requirements_context = ""
-        
-        # Add Functional Requirements
-        if functional_reqs:
-            requirements_context += "\n### Functional Requirements:\n"
-            for idx, req in enumerate(functional_reqs, 1):
-                requirements_context += f"\n{idx}. **{req.get('requirement', 'N/A')}**\n"
-                requirements_context += f"   - Priority: {req.get('priority', 'Medium')}\n"
-                requirements_context += f"   - Stakeholder/Actor: {req.get('stakeholder_actor', 'N/A')}\n"
-                requirements_context += f"   - Category: {req.get('category', 'N/A')}\n"
-        
-        # Add Non-Functional Requirements
-        if non_functional_reqs:
-            requirements_context += "\n### Non-Functional Requirements:\n"
-            for idx, req in enumerate(non_functional_reqs, 1):
-                requirements_context += f"\n{idx}. **{req.get('requirement', 'N/A')}**\n"
-                requirements_context += f"   - Category: {req.get('category', 'N/A')}\n"
-                requirements_context += f"   - Priority: {req.get('priority', 'Medium')}\n"
-                requirements_context += f"   - Description: {req.get('description', 'N/A')}\n"
-        
-        # Add Gherkin Requirements
-        if gherkin_reqs:
-            requirements_context += "\n### Gherkin Requirements:\n"
-            for req in gherkin_reqs:
-                requirements_context += f"\n**{req.get('feature')}** (ID: {req.get('id')})\n"
-                requirements_context += f"  - As a {req.get('as_a')}, I want {req.get('i_want')}\n"
-                requirements_context += f"  - So that {req.get('so_that')}\n"
-                
-                scenarios = req.get('scenarios', [])
-                if scenarios:
-                    requirements_context += f"  - Scenarios:\n"
-                    for scenario in scenarios:
-                        requirements_context += f"    * {scenario.get('title')}\n"
-                        if scenario.get('given'):
-                            requirements_context += f"      - Given: {', '.join(scenario.get('given'))}\n"
-                        if scenario.get('when'):
-                            requirements_context += f"      - When: {', '.join(scenario.get('when'))}\n"
-                        if scenario.get('then'):
-                            requirements_context += f"      - Then: {', '.join(scenario.get('then'))}\n"
-        
-        # Add Business Proposal
-        business_context = ""
-        if business_proposal and business_proposal.get('Title'):
-            business_context = f"""
-### Business Context:
-- **Problem**: {business_proposal.get('ProblemToSolve', 'N/A')}
-- **Vision**: {business_proposal.get('Vision', 'N/A')}
-- **Goals**: {', '.join(business_proposal.get('Goals', []))}
-"""
-        
-        # Add Stakeholders
-        stakeholders_context = ""
-        if stakeholders:
-            stakeholders_context = "\n### Stakeholders:\n"
-            for sh in stakeholders:
-                role = sh.get('Role') or sh.get('role', 'N/A')
-                stakeholders_context += f"- {role}\n"
-        
-        # Prepare risk context
-        risks_context = ""
-        if risks_data:
-            risks_context = "\n### Identified Risks:\n"
-            for category, description in risks_data.items():
-                risks_context += f"- **{category}**: {description}\n"
-        elif risks:
-            risks_context = "\n### Identified Risks:\n"
-            for idx, risk in enumerate(risks[:5], 1):
-                risks_context += f"{idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n"
-        
-        # Prepare API context if available
-        api_context = ""
-        if api_spec:
-            api_endpoints = api_spec.get('paths', {})
-            api_context = f"\n### API Endpoints ({len(api_endpoints)} total):\n"
-            
-            # List all endpoints with methods
-            for path, methods in api_endpoints.items():
-                for method, spec in methods.items():
-                    summary = spec.get('summary', 'No description')
-                    api_context += f"- {method.upper()} {path}: {summary}\n"
-                    
-                    # Include parameters if any
-                    params = spec.get('parameters', [])
-                    if params:
-                        api_context += f"  Parameters: {', '.join([p.get('name', '') for p in params])}\n"
+        phase1 = _build_phase1_context(data)
+        gherkin_reqs = phase1.gherkin_reqs
+        requirements = phase1.requirements
+        functional_reqs = phase1.functional_reqs
+        non_functional_reqs = phase1.non_functional_reqs
+        business_proposal = phase1.business_proposal
+        stakeholders = phase1.stakeholders
+        project_info = phase1.project_info
         
-        # Create prompt for OpenAI based on project type
-        is_api_project = bool(api_spec)
-        if is_api_project:
-            prompt = f"""You are an expert Agile Scrum Master and API Developer. Based on the Epics and API specifications, generate detailed User Stories for API development.
-
-**Project**: {project_info.get('name', 'API Project')}
-
-## Epics Generated:
-{epics_context}
-
-{api_context}
-
-{risks_context}
-
-{requirements_context if requirements_context else ""}
-
-**JIRA Compatibility Requirements**:
-- User story titles must follow format: "As a [role], I want [goal], so that [benefit]"
-- Include detailed acceptance criteria as array of strings
-- Support optional subtasks for complex stories (implementation steps)
-- Use Fibonacci story points: 1, 2, 3, 5, 8, 13, 21
-- All stories start in "backlog" status, null sprint
-
-**Instructions for API User Stories**:
-1. For EACH API endpoint, create AT LEAST ONE user story
-2. Each story should follow the format: "As a [API consumer/developer], I want [endpoint functionality], so that [business value]"
-3. Include detailed acceptance criteria covering:
-   - Request/response format
-   - Authentication/authorization
-   - Error handling (400, 401, 404, 500 responses)
-   - Data validation
-   - Performance requirements
-4. For complex stories (8+ points), add subtasks array with implementation steps
-5. Estimate story points: Simple CRUD: 3-5, Complex logic: 8-13
-6. Additional stories for: authentication, error handling, documentation, testing
-7. Assign priority based on epic priority and dependencies
-
-**Output Format** (JIRA-compatible JSON array):
-[
-  {{
-    "id": 1,
-    "epic": "Epic Title",
-    "epic_id": 1,
-    "title": "As an API consumer, I want to call GET /users endpoint, so that I can retrieve user list",
-    "description": "Implement GET /users endpoint with pagination and filtering",
-    "acceptance_criteria": [
-      "Returns 200 with user array on success",
-      "Supports page and limit query parameters",
-      "Returns 401 if not authenticated",
-      "Returns proper error messages"
-    ],
-    "subtasks": [
-      "Create API route handler",
-      "Implement pagination logic",
-      "Add authentication middleware",
-      "Write unit tests"
-    ],
-    "points": 5,
-    "priority": "High",
-    "sprint": null,
-    "status": "backlog"
-  }}
-]
-
-Return ONLY the JSON array with all user stories, no additional text."""
-        else:
-            prompt = f"""You are an expert Agile Scrum Master and Product Owner. Based on the Epics and ALL extracted requirements from Phase 1, generate detailed User Stories with acceptance criteria.
-
-**Project**: {project_info.get('name', 'Software Project')}
-
-{business_context}
-
-{stakeholders_context}
-
-## Epics Generated:
-{epics_context}
-
-{risks_context}
-
-## Requirements from Phase 1:
-{requirements_context}
-
-**JIRA Compatibility Requirements**:
-- User story titles must follow format: "As a [role], I want [goal], so that [benefit]"
-- Use roles from stakeholders when available
-- Include detailed acceptance criteria as array of strings
-- Support optional subtasks for complex stories (implementation steps)
-- Use Fibonacci story points: 1, 2, 3, 5, 8, 13, 21
-- All stories start in "backlog" status, null sprint
-- Subtasks should be specific, actionable tasks (development, testing, documentation)
-
-**Instructions**:
-1. For EACH Epic, generate user stories that match the "Expected Stories" count
-2. Base stories on ACTUAL requirements (functional, non-functional, gherkin)
-3. Use stakeholder roles when defining "As a [role]" in user stories
-4. Each story should follow: "As a [stakeholder role], I want [capability], so that [business value from proposal]"
-5. Derive acceptance criteria from:
-   - Functional requirement details
-   - Non-functional requirement descriptions
-   - Gherkin scenarios (Given-When-Then)
-   - Success metrics from business proposal
-6. For complex stories (8+ points), add subtasks array with specific implementation steps
-7. Estimate story points using Fibonacci: 1,2,3,5,8,13,21
-8. Assign priority: High (MVP/critical), Medium (important), Low (nice-to-have)
-9. Consider identified risks when defining acceptance criteria
-10. All stories in "backlog" status, no sprint assigned
-
-**Output Format** (JIRA-compatible JSON array):
-[
-  {{
-    "id": 1,
-    "epic": "Epic Title",
-    "epic_id": 1,
-    "title": "As a [stakeholder role], I want [capability], so that [business value]",
-    "description": "Detailed description from requirement",
-    "acceptance_criteria": [
-      "Specific, testable criterion 1",
-      "Specific, testable criterion 2",
-      "Performance/security criterion from NFR"
-    ],
-    "subtasks": [
-      "Design database schema",
-      "Implement backend API",
-      "Create frontend components",
-      "Write unit and integration tests",
-      "Update documentation"
-    ],
-    "points": 8,
-    "priority": "High",
-    "sprint": null,
-    "status": "backlog"
-  }}
-]
-
-**IMPORTANT**: 
-- Use ACTUAL data from requirements, NOT generic placeholders
-- Match story count to epic expectations
-- Cover ALL requirements across ALL epics
-- Include subtasks ONLY for stories with 8+ points
-
-Return ONLY the JSON array with all user stories, no additional text."""
-
-
-        try:
-            # Call OpenAI API
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert Scrum Master who creates detailed user stories from epics and requirements. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
+        # Check for API specifications
+        api_spec = phase1.api_spec
+        
+        logger.info("Generating user stories for project: %s", project_info.get('name', 'Project'))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "User story inputs: %d epics; %d functional, %d non-functional, %d gherkin requirements; "
+                "API endpoints: %d",
+                len(epics), len(functional_reqs), len(non_functional_reqs), len(gherkin_reqs),
+                len(api_spec.get('paths', {})) if api_spec else 0
             )
+        
+        if not epics:
+            # Need epics first to generate stories
+            logger.warning("No epics found - cannot generate user stories")
+            return []
+        
+        # Prepare comprehensive requirements context
+        req_parts: List[str] = []
+        
+        # Add Functional Requirements
+        if functional_reqs:
+            req_parts.append("\n### Functional Requirements:\n")
+            for idx, req in enumerate(functional_reqs, 1):
+                get = req.get
+                req_parts.append(
+                    f"\n{idx}. **{get('requirement', 'N/A')}**\n"
+                    f"   - Priority: {get('priority', 'Medium')}\n"
+                    f"   - Stakeholder/Actor: {get('stakeholder_actor', 'N/A')}\n"
+                    f"   - Category: {get('category', 'N/A')}\n"
+                )
+        
+        # Add Non-Functional Requirements
+        req_parts.append(phase1.nfr_context)
+        
+        # Add Gherkin Requirements
+        if gherkin_reqs:
+            req_parts.append("\n### Gherkin Requirements:\n")
+            for req in gherkin_reqs:
+                get = req.get
+                req_parts.append(
+                    f"\n**{get('feature')}** (ID: {get('id')})\n"
+                    f"  - As a {get('as_a')}, I want {get('i_want')}\n"
+                    f"  - So that {get('so_that')}\n"
+                )
+                
+                scenarios = get('scenarios', [])
+                if scenarios:
+                    req_parts.append("  - Scenarios:\n")
+                    for scenario in scenarios:
+                        step = scenario.get
+                        req_parts.append(f"    * {step('title')}\n")
+                        given, when, then = step('given'), step('when'), step('then')
+                        if given:
+                            req_parts.append(f"      - Given: {', '.join(given)}\n")
+                        if when:
+                            req_parts.append(f"      - When: {', '.join(when)}\n")
+                        if then:
+                            req_parts.append(f"      - Then: {', '.join(then)}\n")
+        requirements_context = "".join(req_parts)
+        
+        # Add Business Proposal
+        business_context = ""
+        if business_proposal and business_proposal.get('Title'):
+            business_context = f"""
+### Business Context:
+- **Problem**: {business_proposal.get('ProblemToSolve', 'N/A')}
+- **Vision**: {business_proposal.get('Vision', 'N/A')}
+- **Goals**: {', '.join(business_proposal.get('Goals', []))}
+"""
+        
+        # Add Stakeholders
+        stakeholders_context = ""
+        if stakeholders:
+            stakeholders_context = "\n### Stakeholders:\n" + "".join(
+                f"- {sh.get('Role') or sh.get('role', 'N/A')}\n" for sh in stakeholders
+            )
+        
+        # Prepare risk context
+        risks_context = phase1.risks_context
+        
+        # Prepare API context if available
+        api_context = ""
+        if api_spec:
+            api_endpoints = api_spec.get('paths', {})
+            api_parts = [f"\n### API Endpoints ({len(api_endpoints)} total):\n"]
             
-            # Parse the response
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-            
-            user_stories = json.loads(content)
-            
-            # Validate and ensure proper structure
-            if isinstance(user_stories, list) and len(user_stories) > 0:
-                story_id = 1
-                for story in user_stories:
-                    # Ensure required fields
-                    story['id'] = story_id
-                    story_id += 1
+            # List all endpoints with methods
+            for path, methods in api_endpoints.items():
+                for method, spec in methods.items():
+                    summary = spec.get('summary', 'No description')
+                    api_parts.append(f"- {method.upper()} {path}: {summary}\n")
                     
-                    if 'epic' not in story:
-                        story['epic'] = "Unknown Epic"
-                    if 'epic_id' not in story:
-                        story['epic_id'] = 1
-                    if 'title' not in story:
-                        story['title'] = "User Story"
-                    if 'description' not in story:
-                        story['description'] = "Story description"
-                    if 'acceptance_criteria' not in story:
-                        story['acceptance_criteria'] = []
-                    if 'points' not in story:
-                        story['points'] = 5
-                    if 'priority' not in story:
-                        story['priority'] = "Medium"
-                    if 'sprint' not in story:
-                        story['sprint'] = None
-                    if 'status' not in story:
-                        story['status'] = "backlog"
-                
-                print(f"[OK] Generated {len(user_stories)} user stories using OpenAI")
-                return user_stories
+                    # Include parameters if any
+                    params = spec.get('parameters', [])
+                    if params:
+                        api_parts.append(f"  Parameters: {', '.join(p.get('name', '') for p in params)}\n")
+            api_context = "".join(api_parts)
+        
+        # Create prompt template for OpenAI based on project type; epics are filled in per batch
+        is_api_project = bool(api_spec)
+        if is_api_project:
+            prompt_template = _API_USER_STORY_PROMPT_TEMPLATE
+            prompt_fields = {
+                'project_name': project_info.get('name', 'API Project'),
+                'api_context': api_context,
+                'risks_context': risks_context,
+                'requirements_context': requirements_context,
+                'endpoint_scope': "",
+            }
+        else:
+            prompt_template = _GENERIC_USER_STORY_PROMPT_TEMPLATE
+            prompt_fields = {
+                'project_name': project_info.get('name', 'Software Project'),
+                'business_context': business_context,
+                'stakeholders_context': stakeholders_context,
+                'risks_context': risks_context,
+                'requirements_context': requirements_context,
+                'coverage_rule': "Cover ALL requirements across ALL epics",
+            }
+        epic_batches = [epics[start:start + _USER_STORY_EPICS_PER_CALL] for start in range(0, len(epics), _USER_STORY_EPICS_PER_CALL)]
+        if len(epic_batches) == 1:
+            prompts = [prompt_template.format_map({**prompt_fields, 'epics_context': _build_epics_context(epics), 'batch_scope': ""})]
+        else:
+            batch_fields = {
+                **prompt_fields,
+                'endpoint_scope': " that belongs to the epics listed above",
+                'coverage_rule': "Cover ALL requirements that belong to the epics listed above",
+            }
+            prompts = [
+                prompt_template.format_map({
+                    **batch_fields,
+                    'epics_context': _build_epics_context(epic_batch),
+                    'batch_scope': _USER_STORY_BATCH_SCOPE.format(
+                        first=start + 1, last=start + len(epic_batch), total=len(epics)
+                    ),
+                })
+                for start, epic_batch in zip(range(0, len(epics), _USER_STORY_EPICS_PER_CALL), epic_batches)
+            ]
+        
+        # Call OpenAI API, one concurrent request per epic batch; a failed batch does not discard the others
+        batches = await asyncio.gather(*(self._request_user_stories(prompt) for prompt in prompts), return_exceptions=True)
+        user_stories: List[Dict[str, Any]] = []
+        generated = 0
+        for epic_batch, batch in zip(epic_batches, batches):
+            if isinstance(batch, BaseException) or not batch:
+                logger.warning(
+                    "Error generating user stories with OpenAI for epics %s, falling back to template-based generation: %s",
+                    [epic.get('id') for epic in epic_batch], batch if isinstance(batch, BaseException) else "no stories returned"
+                )
+                user_stories.extend(self._fallback_user_stories(epic_batch, api_spec, gherkin_reqs))
             else:
-                raise ValueError("Invalid user story structure from OpenAI")
-                
-        except Exception as e:
-            print(f"[WARNING] Error generating user stories with OpenAI: {str(e)}")
-            print(f"Falling back to template-based generation")
-            
-            # Fallback: Generate basic stories from epics or API endpoints
-            user_stories = []
-            story_id = 1
+                # Fill missing fields; ids are assigned below
+                user_stories.extend({**_STORY_DEFAULTS, 'acceptance_criteria': [], **story} for story in batch)
+                generated += len(batch)
+        
+        # Number stories in epic order across batches
+        for story_id, story in enumerate(user_stories, 1):
+            story['id'] = story_id
+        
+        if generated:
+            logger.info("Generated %d user stories using OpenAI", generated)
+        return user_stories
+    
+    def _fallback_user_stories(self, epics: list, api_spec: dict, gherkin_reqs: list) -> List[Dict[str, Any]]:
+        """Template-based user stories for epics whose OpenAI request failed"""
+        # Generate basic stories from epics or API endpoints
+        user_stories = []
+        story_id = 1
+        
+        if api_spec:
+            # Generate stories from API endpoints; paths are lowercased once, not once per epic
+            api_endpoints = api_spec.get('paths', {})
+            lowered_endpoints = [(path, path.lower(), methods) for path, methods in api_endpoints.items()]
             
-            if api_spec:
-                # Generate stories from API endpoints
-                api_endpoints = api_spec.get('paths', {})
+            for epic in epics:
+                epic_id = epic.get('id', 0)
+                epic_title = epic.get('title', 'Epic')
+                epic_priority = epic.get('priority', 'Medium')
                 
-                for epic in epics:
-                    epic_id = epic.get('id', 0)
-                    epic_title = epic.get('title', 'Epic')
-                    epic_priority = epic.get('priority', 'Medium')
-                    
-                    # Get endpoints for this epic (by matching resource in title)
-                    resource = epic_title.lower().replace(' api', '').replace('api', '').strip()
-                    
-                    stories_for_epic = 0
-                    for path, methods in api_endpoints.items():
-                        if resource in path.lower():
-                            for method, spec in methods.items():
-                                summary = spec.get('summary', f'{method.upper()} {path}')
-                                
-                                story = {
-                                    "id": story_id,
-                                    "epic": epic_title,
-                                    "epic_id": epic_id,
-                                    "title": f"As an API consumer, I want to call {method.upper()} {path}, so that {summary}",
-                                    "description": f"Implement {method.upper()} {path} endpoint",
-                                    "acceptance_criteria": [
-                                        f"Endpoint responds to {method.upper()} {path}",
-                                        "Returns proper status codes (200, 400, 401, 500)",
-                                        "Request/response follows API specification",
-                                        "Error handling is robust"
-                                    ],
-                                    "points": 5,
-                                    "priority": epic_priority,
-                                    "sprint": None,
-                                    "status": "backlog"
-                                }
-                                user_stories.append(story)
-                                story_id += 1
-                                stories_for_epic += 1
-                    
-                    # Add authentication story if no stories yet
-                    if stories_for_epic == 0:
-                        story = {
-                            "id": story_id,
-                            "epic": epic_title,
-                            "epic_id": epic_id,
-                            "title": f"As a developer, I want to implement {epic_title}",
-                            "description": f"Implement {epic_title} functionality",
-                            "acceptance_criteria": [
-                                "API endpoints are implemented",
-                                "Authentication is handled",
-                                "Error responses are proper"
-                            ],
-                            "points": 8,
-                            "priority": epic_priority,
-                            "sprint": None,
-                            "status": "backlog"
-                        }
-                        user_stories.append(story)
-                        story_id += 1
-            else:
-                # Generate generic stories from epics
-                for epic in epics:
-                    epic_id = epic.get('id', 0)
-                    epic_title = epic.get('title', 'Epic')
-                    num_stories = epic.get('stories', 5)
-                    points_per_story = max(3, epic.get('points', 25) // num_stories)
+                # Get endpoints for this epic (by matching resource in title)
+                resource = _API_WORD_RE.sub('', epic_title.lower()).strip()
+                
+                stories_for_epic = 0
+                for path, lower_path, methods in lowered_endpoints:
+                    if resource in lower_path:
+                        for method, spec in methods.items():
+                            endpoint = f"{method.upper()} {path}"
+                            summary = spec.get('summary', endpoint)
+                            
+                            story = {
+                                "id": story_id,
+                                "epic": epic_title,
+                                "epic_id": epic_id,
+                                "title": f"As an API consumer, I want to call {endpoint}, so that {summary}",
+                                "description": f"Implement {endpoint} endpoint",
+                                "acceptance_criteria": [
+                                    f"Endpoint responds to {endpoint}",
+                                    "Returns proper status codes (200, 400, 401, 500)",
+                                    "Request/response follows API specification",
+                                    "Error handling is robust"
+                                ],
+                                "points": 5,
+                                "priority": epic_priority,
+                                "sprint": None,
+                                "status": "backlog"
+                            }
+                            user_stories.append(story)
+                            story_id += 1
+                            stories_for_epic += 1
+                
+                # Add authentication story if no stories yet
+                if stories_for_epic == 0:
+                    story = {
+                        "id": story_id,
+                        "epic": epic_title,
+                        "epic_id": epic_id,
+                        "title": f"As a developer, I want to implement {epic_title}",
+                        "description": f"Implement {epic_title} functionality",
+                        "acceptance_criteria": [
+                            "API endpoints are implemented",
+                            "Authentication is handled",
+                            "Error responses are proper"
+                        ],
+                        "points": 8,
+                        "priority": epic_priority,
+                        "sprint": None,
+                        "status": "backlog"
+                    }
+                    user_stories.append(story)
+                    story_id += 1
+        else:
+            # Generate generic stories from epics
+            for epic in epics:
+                epic_id = epic.get('id', 0)
+                epic_title = epic.get('title', 'Epic')
+                num_stories = epic.get('stories', 5)
+                points_per_story = max(3, epic.get('points', 25) // num_stories)
+                
+                # Map to gherkin requirements if available, otherwise up to 5 generic stories
+                sources = islice(gherkin_reqs, max(num_stories, 0)) if gherkin_reqs else repeat(None, min(num_stories, 5))
+                generic_title = f"As a user, I want to use {epic_title.lower()} functionality"
+                generic_description = f"Implement core functionality for {epic_title}"
+                for req in sources:
+                    if isinstance(req, dict):
+                        title = f"As a {req.get('as_a', 'user')}, I want {req.get('i_want', 'functionality')}"
+                        description = f"So that {req.get('so_that', 'business value is delivered')}"
+                    else:
+                        title, description = generic_title, generic_description
                     
-                    # Map to gherkin requirements if available
-                    for i, req in enumerate(gherkin_reqs[:num_stories] if gherkin_reqs else range(min(num_stories, 5))):
-                        if isinstance(req, dict):
-                            title = f"As a {req.get('as_a', 'user')}, I want {req.get('i_want', 'functionality')}"
-                            description = f"So that {req.get('so_that', 'business value is delivered')}"
-                        else:
-                            title = f"As a user, I want to use {epic_title.lower()} functionality"
-                            description = f"Implement core functionality for {epic_title}"
-                        
-                        story = {
-                            "id": story_id,
-                            "epic": epic_title,
-                            "epic_id": epic_id,
-                            "title": title,
-                            "description": description,
-                            "acceptance_criteria": [
-                                "Feature is implemented as specified",
-                                "All functionality is accessible",
-                                "Error handling is robust"
-                            ],
-                            "points": min(points_per_story, 8),
-                            "priority": epic.get('priority', 'Medium'),
-                            "sprint": None,
-                            "status": "backlog"
-                        }
-                        user_stories.append(story)
-                        story_id += 1
-        
+                    story = {
+                        "id": story_id,
+                        "epic": epic_title,
+                        "epic_id": epic_id,
+                        "title": title,
+                        "description": description,
+                        "acceptance_criteria": [
+                            "Feature is implemented as specified",
+                            "All functionality is accessible",
+                            "Error handling is robust"
+                        ],
+                        "points": min(points_per_story, 8),
+                        "priority": epic.get('priority', 'Medium'),
+                        "sprint": None,
+                        "status": "backlog"
+                    }
+                    user_stories.append(story)
+                    story_id += 1
+    
         return user_stories
     
     def _estimate_story_points(self, description: str, scenarios: List[Dict]) -> int:
@@ -1706,25 +2115,11 @@ Return ONLY the JSON array with all user stories, no additional text."""
         
         Fibonacci scale: 1, 2, 3, 5, 8, 13
         """
-        # Base points
-        points = 3
-        
-        # Add points based on number of scenarios
-        num_scenarios = len(scenarios)
-        if num_scenarios > 3:
-            points = 8
-        elif num_scenarios > 2:
-            points = 5
-        elif num_scenarios > 1:
-            points = 3
-        else:
-            points = 2
+        # Base points from the number of scenarios
+        points = _SCENARIO_STORY_POINTS[min(len(scenarios), len(_SCENARIO_STORY_POINTS) - 1)]
         
         # Add points for complexity keywords
-        complexity_keywords = ['integrate', 'api', 'payment', 'security', 'authentication', 'sync', 'complex']
-        desc_lower = description.lower()
-        
-        if any(keyword in desc_lower for keyword in complexity_keywords):
+        if _COMPLEXITY_KEYWORD_RE.search(description):
             points += 2
         
         # Cap at 13 (anything larger should be broken down)
@@ -1740,38 +2135,32 @@ Return ONLY the JSON array with all user stories, no additional text."""
         
         # Extract Phase 1 data - support both snake_case and camelCase from frontend
         phase1_data = data.get('phase1_data', {})
-        gherkin_requirements = data.get('gherkin_requirements', []) or data.get('gherkinRequirements', [])
+        gherkin_requirements = _pick(data, 'gherkin_requirements', 'gherkinRequirements', default=[])
         requirements = data.get('requirements', [])
         brd = data.get('brd', '')
-        prd = data.get('prd', '')
-        functional_reqs = data.get('functional_requirements', []) or data.get('functionalRequirements', [])
-        nonfunctional_reqs = data.get('nonfunctional_requirements', []) or data.get('nonFunctionalRequirements', [])
+        functional_reqs = _pick(data, 'functional_requirements', 'functionalRequirements', default=[])
+        nonfunctional_reqs = _pick(data, 'nonfunctional_requirements', 'nonFunctionalRequirements', default=[])
         stakeholders = data.get('stakeholders', [])
         risks = data.get('risks', [])
-        api_spec = data.get('api_spec', {}) or data.get('apiSpec', {})
+        api_spec = _pick(data, 'api_spec', 'apiSpec', default={})
         
         # Existing epics and user stories (for incremental/gap-analysis generation)
-        existing_epics = data.get('existing_epics', []) or data.get('existingEpics', [])
-        existing_stories = data.get('existing_user_stories', []) or data.get('existingStories', [])
+        existing_epics = _pick(data, 'existing_epics', 'existingEpics', default=[])
+        existing_stories = _pick(data, 'existing_user_stories', 'existingStories', default=[])
         
         # Generation mode flags
-        is_incremental = data.get('is_incremental', False) or data.get('isIncrementalGeneration', False)
-        manual_changes_mode = data.get('manual_changes_mode', False) or data.get('manualChangesMode', False)
-        changes_only = data.get('changes_only', False) or data.get('changesOnly', False)
-        changes_summary_from_frontend = data.get('changes_summary', '') or data.get('changesSummary', '')
-        changed_content = data.get('changed_content', {}) or data.get('changedContent', {})
+        is_incremental = _pick(data, 'is_incremental', 'isIncrementalGeneration', default=False)
+        manual_changes_mode = _pick(data, 'manual_changes_mode', 'manualChangesMode', default=False)
+        changes_only = _pick(data, 'changes_only', 'changesOnly', default=False)
+        changes_summary_from_frontend = _pick(data, 'changes_summary', 'changesSummary', default='')
+        changed_content = _pick(data, 'changed_content', 'changedContent', default={})
         
         # Project info - support both direct fields and nested project object
-        project_obj = data.get('project', {})
-        project_name = data.get('project_name', '')
-        if not project_name and isinstance(project_obj, dict):
-            project_name = project_obj.get('name', project_obj.get('project_name', 'Software Project'))
-        if not project_name:
-            project_name = 'Software Project'
-            
-        project_description = data.get('project_description', '')
-        if not project_description and isinstance(project_obj, dict):
-            project_description = project_obj.get('description', project_obj.get('project_description', ''))
+        project_obj = data.get('project')
+        if not isinstance(project_obj, dict):
+            project_obj = {}
+        project_name = data.get('project_name') or _pick(project_obj, 'name', 'project_name', default='Software Project')
+        project_description = data.get('project_description') or _pick(project_obj, 'description', 'project_description', default='')
         
         project_info = {
             'name': project_name,
@@ -1785,162 +2174,179 @@ Return ONLY the JSON array with all user stories, no additional text."""
         print(f"  - Existing Epics: {len(existing_epics)}")
         print(f"  - Existing Stories: {len(existing_stories)}")
         
-        # Build comprehensive context from Requirements + BRD
-        context_parts = []
+        # Build comprehensive context from Requirements + BRD; each section is a list of chunks
+        context_sections: List[List[str]] = []
         
         # 1. BRD Context (primary input)
         if brd:
-            context_parts.append(f"**BUSINESS REQUIREMENTS DOCUMENT (BRD)**:\n{brd}\n")
+            context_sections.append(["**BUSINESS REQUIREMENTS DOCUMENT (BRD)**:\n", brd, "\n"])
         
         # 2. Requirements Context (primary input)
-        requirements_text = ""
+        requirements_text_parts = []
         if gherkin_requirements:
-            requirements_text += f"\n**GHERKIN SCENARIOS** ({len(gherkin_requirements)} scenarios):\n"
-            for idx, scenario in enumerate(gherkin_requirements[:25], 1):
-                requirements_text += f"\nScenario {idx}: {scenario.get('scenario_title', 'Untitled')}\n"
+            requirements_text_parts.append(f"\n**GHERKIN SCENARIOS** ({len(gherkin_requirements)} scenarios):\n")
+            for idx, scenario in enumerate(islice(gherkin_requirements, 25), 1):
+                requirements_text_parts.append(f"\nScenario {idx}: {scenario.get('scenario_title', 'Untitled')}\n")
                 if scenario.get('background'):
-                    requirements_text += f"Background: {scenario['background']}\n"
+                    requirements_text_parts.append(f"Background: {scenario['background']}\n")
                 for step in scenario.get('given_when_then', []):
-                    requirements_text += f"  {step}\n"
+                    requirements_text_parts.append(f"  {step}\n")
             if len(gherkin_requirements) > 25:
-                requirements_text += f"\n... and {len(gherkin_requirements) - 25} more scenarios"
+                requirements_text_parts.append(f"\n... and {len(gherkin_requirements) - 25} more scenarios")
         
         if requirements:
-            requirements_text += f"\n**REQUIREMENTS** ({len(requirements)} items):\n"
-            for idx, req in enumerate(requirements[:30], 1):
+            requirements_text_parts.append(f"\n**REQUIREMENTS** ({len(requirements)} items):\n")
+            for idx, req in enumerate(islice(requirements, 30), 1):
                 if isinstance(req, dict):
                     req_text = req.get('requirement') or req.get('title') or str(req)
                 else:
                     req_text = str(req)
-                requirements_text += f"{idx}. {req_text}\n"
+                requirements_text_parts.append(f"{idx}. {req_text}\n")
             if len(requirements) > 30:
-                requirements_text += f"\n... and {len(requirements) - 30} more requirements"
+                requirements_text_parts.append(f"\n... and {len(requirements) - 30} more requirements")
         
-        if requirements_text:
-            context_parts.append(f"**REQUIREMENTS** (FROM PHASE 1):\n{requirements_text}\n")
+        if requirements_text_parts:
+            context_sections.append(["**REQUIREMENTS** (FROM PHASE 1):\n", *requirements_text_parts, "\n"])
         
         # 3. Functional/Non-Functional Requirements
         if functional_reqs or nonfunctional_reqs:
-            fn_text = "\n**FUNCTIONAL REQUIREMENTS**:\n"
-            for idx, req in enumerate(functional_reqs[:20], 1):
+            fn_text_parts = ["\n**FUNCTIONAL REQUIREMENTS**:\n"]
+            for idx, req in enumerate(islice(functional_reqs, 20), 1):
                 if isinstance(req, dict):
                     req_text = req.get('requirement') or req.get('title') or str(req)
                 else:
                     req_text = str(req)
-                fn_text += f"  {idx}. {req_text}\n"
+                fn_text_parts.append(f"  {idx}. {req_text}\n")
             if len(functional_reqs) > 20:
-                fn_text += f"  ... and {len(functional_reqs) - 20} more\n"
+                fn_text_parts.append(f"  ... and {len(functional_reqs) - 20} more\n")
             
-            fn_text += "\n**NON-FUNCTIONAL REQUIREMENTS**:\n"
-            for idx, req in enumerate(nonfunctional_reqs[:15], 1):
+            fn_text_parts.append("\n**NON-FUNCTIONAL REQUIREMENTS**:\n")
+            for idx, req in enumerate(islice(nonfunctional_reqs, 15), 1):
                 if isinstance(req, dict):
                     req_text = req.get('requirement') or req.get('title') or str(req)
                 else:
                     req_text = str(req)
-                fn_text += f"  {idx}. {req_text}\n"
+                fn_text_parts.append(f"  {idx}. {req_text}\n")
             if len(nonfunctional_reqs) > 15:
-                fn_text += f"  ... and {len(nonfunctional_reqs) - 15} more\n"
+                fn_text_parts.append(f"  ... and {len(nonfunctional_reqs) - 15} more\n")
             
-            context_parts.append(fn_text)
+            context_sections.append(fn_text_parts)
         
         # 4. Risk Context
         if risks:
-            risks_text = "\n**IDENTIFIED RISKS**:\n"
-            for idx, risk in enumerate(risks[:10], 1):
-                risks_text += f"  {idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n"
+            risks_text_parts = ["\n**IDENTIFIED RISKS**:\n"]
+            for idx, risk in enumerate(islice(risks, 10), 1):
+                risks_text_parts.append(f"  {idx}. {risk.get('description', 'Risk')} (Severity: {risk.get('severity', 'Medium')})\n")
             if len(risks) > 10:
-                risks_text += f"  ... and {len(risks) - 10} more risks\n"
-            context_parts.append(risks_text)
+                risks_text_parts.append(f"  ... and {len(risks) - 10} more risks\n")
+            context_sections.append(risks_text_parts)
         
         # 5. API Context (if available)
         if api_spec:
-            api_text = f"\n**API SPECIFICATION**:\n"
-            api_text += f"- Title: {api_spec.get('info', {}).get('title', 'API')}\n"
-            api_text += f"- Endpoints: {len(api_spec.get('paths', {}))}\n"
-            
             api_endpoints = api_spec.get('paths', {})
+            api_text_parts = [
+                "\n**API SPECIFICATION**:\n",
+                f"- Title: {api_spec.get('info', {}).get('title', 'API')}\n",
+                f"- Endpoints: {len(api_endpoints)}\n",
+            ]
+            
             resource_groups = {}
             for path, methods in api_endpoints.items():
-                resource = path.split('/')[1] if '/' in path else 'general'
-                if resource not in resource_groups:
-                    resource_groups[resource] = []
+                # Only the first path segment matters, so stop splitting after it
+                parts = path.split('/', 2)
+                resource = parts[1] if len(parts) > 1 and parts[1] else 'general'
+                group = resource_groups.setdefault(resource, [])
                 for method, spec in methods.items():
                     summary = spec.get('summary', spec.get('description', 'Endpoint'))
-                    resource_groups[resource].append(f"{method.upper()} {path}: {summary}")
+                    group.append(f"{method.upper()} {path}: {summary}")
             
             for resource, endpoints in resource_groups.items():
-                api_text += f"\n{resource.capitalize()} Resource:\n"
-                for endpoint in endpoints[:5]:
-                    api_text += f"  • {endpoint}\n"
-                if len(endpoints) > 5:
-                    api_text += f"  • ... and {len(endpoints) - 5} more\n"
-            
-            context_parts.append(api_text)
-        
-        # Prepare generation context
-        full_context = "\n".join(context_parts)
+                api_text_parts.append(f"\n{resource.capitalize()} Resource:\n")
+                for endpoint in islice(endpoints, 5):
+                    api_text_parts.append(f"  • {endpoint}\n")
+                endpoint_count = len(endpoints)
+                if endpoint_count > 5:
+                    api_text_parts.append(f"  • ... and {endpoint_count - 5} more\n")
+            
+            context_sections.append(api_text_parts)
+        
+        # Prepare generation context: sections separated by newlines, joined in a single pass
+        context_chunks: List[str] = []
+        for section in context_sections:
+            if context_chunks:
+                context_chunks.append("\n")
+            context_chunks.extend(section)
+        full_context = "".join(context_chunks)
         
         # Build generation mode instructions
         generation_instructions = ""
+        existing_count = len(existing_epics)
+        next_epic_id = existing_count + 1
         
         if is_incremental and existing_epics:
             # Incremental mode: Show existing epics, ask for new ones only
-            generation_instructions = f"""
+            generation_instructions_parts = [f"""
 🔄 **INCREMENTAL GENERATION MODE**
 
 **EXISTING EPICS** (DO NOT REGENERATE OR MODIFY):
-{len(existing_epics)} existing epics already approved:
-"""
-            for idx, epic in enumerate(existing_epics[:10], 1):
-                generation_instructions += f"\n  {idx}. **{epic.get('title')}** (ID: {epic.get('id')})"
-                generation_instructions += f"\n     - {epic.get('description', '')[:100]}{'...' if len(epic.get('description', '')) > 100 else ''}"
+{existing_count} existing epics already approved:
+"""]
+            for idx, epic in enumerate(islice(existing_epics, 10), 1):
+                generation_instructions_parts.append(f"\n  {idx}. **{epic.get('title')}** (ID: {epic.get('id')})")
+                description = epic.get('description', '')
+                ellipsis = '...' if len(description) > 100 else ''
+                generation_instructions_parts.append(f"\n     - {description[:100]}{ellipsis}")
             
-            if len(existing_epics) > 10:
-                generation_instructions += f"\n  ... and {len(existing_epics) - 10} more existing epics\n"
+            if existing_count > 10:
+                generation_instructions_parts.append(f"\n  ... and {existing_count - 10} more existing epics\n")
             
-            generation_instructions += f"""
+            generation_instructions_parts.append(f"""
 
 **CRITICAL RULES**:
-- ❌ DO NOT return any of the {len(existing_epics)} existing epics above
+- ❌ DO NOT return any of the {existing_count} existing epics above
 - ❌ DO NOT modify or recreate existing user stories
 - ✅ ONLY create NEW epics for UNCOVERED functionality
-- ✅ Ensure new epic IDs start from {len(existing_epics) + 1}
+- ✅ Ensure new epic IDs start from {next_epic_id}
 - ✅ If no new functionality found, return empty: {{{{\"epics\": [], \"user_stories\": []}}}}
 
 **NEW CHANGES DETECTED**:
 {changes_summary_from_frontend}
 
-Generate ONLY NEW epics for the changes above, not covered by the {len(existing_epics)} existing epics.
-"""
+Generate ONLY NEW epics for the changes above, not covered by the {existing_count} existing epics.
+""")
+            generation_instructions = "".join(generation_instructions_parts)
         
         elif manual_changes_mode and existing_epics:
             # Gap analysis mode: Compare Phase 1 with existing epics
-            generation_instructions = f"""
+            generation_instructions_parts = [f"""
 🔍 **GAP ANALYSIS MODE**
 
-**EXISTING EPICS** ({len(existing_epics)} total, shown for reference):
-"""
-            for idx, epic in enumerate(existing_epics[:15], 1):
-                generation_instructions += f"\n  {idx}. **{epic.get('title')}** - {epic.get('description', '')[:80]}{'...' if len(epic.get('description', '')) > 80 else ''}"
+**EXISTING EPICS** ({existing_count} total, shown for reference):
+"""]
+            for idx, epic in enumerate(islice(existing_epics, 15), 1):
+                description = epic.get('description', '')
+                ellipsis = '...' if len(description) > 80 else ''
+                generation_instructions_parts.append(f"\n  {idx}. **{epic.get('title')}** - {description[:80]}{ellipsis}")
             
-            if len(existing_epics) > 15:
-                generation_instructions += f"\n  ... and {len(existing_epics) - 15} more"
+            if existing_count > 15:
+                generation_instructions_parts.append(f"\n  ... and {existing_count - 15} more")
             
-            generation_instructions += f"""
+            generation_instructions_parts.append(f"""
 
 **YOUR TASK**:
 1. Read ALL Phase 1 content (BRD + Requirements) above completely
-2. For EACH requirement, check if covered by ANY of the {len(existing_epics)} existing epics
+2. For EACH requirement, check if covered by ANY of the {existing_count} existing epics
 3. Identify TRULY NEW requirements not covered by any epic
-4. Create ONLY NEW epics for uncovered functionality (IDs from {len(existing_epics) + 1})
+4. Create ONLY NEW epics for uncovered functionality (IDs from {next_epic_id})
 5. If EVERYTHING is covered, return empty arrays
 
 **CRITICAL RULES**:
-- ❌ NEVER return existing epics (IDs 1-{{len(existing_epics)}})
+- ❌ NEVER return existing epics (IDs 1-{existing_count})
 - ❌ NEVER recreate or modify existing stories
 - ❌ NEVER create overlapping functionality
 - ✅ When in doubt about overlap, create the epic (better to split than miss)
-"""
+""")
+            generation_instructions = "".join(generation_instructions_parts)
         
         else:
             # Full generation mode: Create all epics from scratch with comprehensive microservice analysis
@@ -2477,7 +2883,10 @@ For each epic:
                     }
                 ],
                 temperature=0.3,  # Consistent, deterministic output
-                max_tokens=6000
+                max_tokens=6000,
+                # JSON mode: the reply is always a single parseable object, so a fenced or chatty
+                # answer no longer sends the whole batch down the fallback path
+                response_format={"type": "json_object"}
             )
             
             # Parse the response
@@ -2485,13 +2894,9 @@ For each epic:
             print(f"📥 Received response from OpenAI ({len(content)} chars)")
             
             # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
+            content = _strip_code_fence(content)
             
-            result = json.loads(content)
+            result = orjson.loads(content)
             
             # Validate structure
             if 'epics' not in result or 'user_stories' not in result:
@@ -2756,7 +3161,7 @@ For each epic:
                 'user_stories': user_stories
             }
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"❌ JSON Parse Error: {str(e)}")
             print(f"Content: {content[:200] if len(content) > 200 else content}")
             raise
@@ -3440,20 +3845,17 @@ Return a JSON object with:
         
         # Extract response
         try:
-            # Look for JSON in response
-            if "```json" in response_text:
-                json_match = response_text.split("```json")[1].split("```")[0]
-                arch_data = json.loads(json_match)
-            elif "{" in response_text:
-                # Find the first { and last }
+            # Look for JSON in response: the span from the first { to the last } also drops a
+            # surrounding ```json fence, without being misled by code fences inside string values
+            if "{" in response_text:
                 start_idx = response_text.find("{")
                 end_idx = response_text.rfind("}") + 1
                 json_str = response_text[start_idx:end_idx]
-                arch_data = json.loads(json_str)
+                arch_data = orjson.loads(json_str)
             else:
                 print("[ERROR] No JSON found in architecture response")
                 raise ValueError("Architecture generation failed: No JSON found in OpenAI response. This usually means the prompt failed to produce valid output.")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"[ERROR] Failed to parse architecture JSON: {e}")
             # NO FALLBACK - Raise error to user instead of silently returning empty dict
             raise ValueError(f"Architecture generation failed: Invalid JSON response from AI: {str(e)}")
@@ -3829,16 +4231,12 @@ IMPORTANT:
             print(f"\n[DEBUG] AI Response (first 800 chars):\n{content[:800]}\n")
             
             # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
+            content = _strip_code_fence(content)
             
             # Parse JSON
             try:
-                ai_output = json.loads(content)
-            except json.JSONDecodeError as je:
+                ai_output = orjson.loads(content)
+            except orjson.JSONDecodeError as je:
                 print(f"[ERROR] JSON parsing failed: {je}")
                 print(f"[DEBUG] Content to parse:\n{content[:1000]}")
                 raise ValueError(f"Invalid JSON from AI: {je}")
@@ -3901,7 +4299,7 @@ IMPORTANT:
                 }
             
             # SECTION 10: Risk Analysis
-            risks_categorized = ai_output.get("RiskAnalysis", {})
+            risks_categorized = normalize_risk_analysis(ai_output.get("RiskAnalysis", {}))
             
             # ==================================================================
             # BUILD FINAL OUTPUT FOR UI
@@ -4203,13 +4601,9 @@ Return ONLY the JSON array."""
             content = response.choices[0].message.content.strip()
             
             # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
+            content = _strip_code_fence(content)
             
-            risks = json.loads(content)
+            risks = orjson.loads(content)
             
             # Validate and ensure proper structure
             if isinstance(risks, list):
@@ -4468,13 +4862,9 @@ Return ONLY the JSON specification, no additional text or markdown."""
             content = response.choices[0].message.content.strip()
             
             # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
+            content = _strip_code_fence(content)
             
-            enhanced_spec = json.loads(content)
+            enhanced_spec = orjson.loads(content)
             
             # Ensure it has openapi version
             enhanced_spec['openapi'] = '3.0.0'
@@ -6090,7 +6480,6 @@ Generated with enhanced AI analysis for technical accuracy and implementation re
         """
         from datetime import datetime
         import time
-        import json
         
         start_time = time.time()
         print("[PHASE5] ========== AI-POWERED CODE GENERATION STARTED ==========")
@@ -6217,9 +6606,7 @@ Generated with enhanced AI analysis for technical accuracy and implementation re
         api_endpoints = []
         
         try:
-            # === GENERATE SERVICE CODE WITH AI (Language-Aware) ===
-            print(f"[PHASE5] 🤖 Generating service code via OpenAI ({lang_display})...")
-            
+            # === SERVICE CODE PROMPT (Language-Aware) ===
             service_prompt = f"""Generate a professional {lang_display} service implementation for the following user story:
 
 **User Story:** {story_title}
@@ -6241,31 +6628,8 @@ Requirements:
 
 Generate ONLY valid {lang_display} code. Start with proper module/package declarations."""
 
-            service_response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": f"You are an expert {lang_display} developer specializing in {framework}. Generate production-ready, idiomatic code."},
-                    {"role": "user", "content": service_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
-            
-            service_code = service_response.choices[0].message.content.strip()
-            
-            code_files.append({
-                "file": f"{snake_case_name}_service{service_ext}",
-                "language": lang_display,
-                "content": service_code
-            })
-            
-            elapsed = time.time() - start_time
-            print(f"[PHASE5] ✅ Service code generated ({elapsed:.2f}s)")
-            
-            # === GENERATE API CODE IF NEEDED (Language-Aware) ===
+            # === API ROUTER PROMPT IF NEEDED (Language-Aware) ===
             if has_api_component:
-                print(f"[PHASE5] 🤖 Generating API router code via OpenAI ({lang_display})...")
-                
                 api_framework = 'Express.js' if 'node' in lang_lower or 'javascript' in lang_lower else (
                     'Express.js with TypeScript' if 'typescript' in lang_lower else (
                     'FastAPI' if 'python' in lang_lower else (
@@ -6294,16 +6658,109 @@ Requirements:
 
 Generate ONLY valid {lang_display} code with all necessary imports."""
 
-                api_response = await self.client.chat.completions.create(
+            # === TEST CODE PROMPT (Language-Aware) ===
+            # Map test framework to language if needed
+            if 'node' in lang_lower or 'javascript' in lang_lower or 'typescript' in lang_lower:
+                if 'jest' not in test_framework.lower() and 'mocha' not in test_framework.lower():
+                    test_framework_display = 'Jest'
+                else:
+                    test_framework_display = test_framework
+            elif 'python' in lang_lower or 'fastapi' in lang_lower:
+                if 'pytest' not in test_framework.lower():
+                    test_framework_display = 'pytest'
+                else:
+                    test_framework_display = test_framework
+            elif 'java' in lang_lower:
+                test_framework_display = 'JUnit'
+            elif 'go' in lang_lower:
+                test_framework_display = 'Go testing package'
+            elif 'csharp' in lang_lower or 'dotnet' in lang_lower:
+                test_framework_display = 'xUnit'
+            else:
+                test_framework_display = test_framework
+            
+            test_prompt = f"""Generate comprehensive unit tests for the following in {test_framework_display}:
+
+**Story:** {story_title}
+**Language:** {lang_display}
+**Test Framework:** {test_framework_display}
+**Service Class:** {pascal_case_name}Service
+**Components:** {', '.join(component_names)}
+{f'**Include API Tests:** Yes (router in {snake_case_name}_router.py)' if has_api_component else '**Include API Tests:** No'}
+
+Requirements:
+1. Create a test class or suite for Test{pascal_case_name}Service
+2. Include setup/teardown methods if needed ({lang_display} specific)
+3. Test service initialization
+4. Test main service methods with various inputs
+5. Add assertions for expected behavior
+6. Include edge case tests
+7. Use {test_framework_display} features (fixtures, mocking, etc.)
+{f'8. Include API endpoint tests' if has_api_component else ''}
+9. Use {lang_display} conventions and idioms
+
+Generate ONLY valid {lang_display} test code using {test_framework_display}. Include all necessary imports and follow {lang_display} best practices."""
+
+            # === RUN THE INDEPENDENT GENERATIONS CONCURRENTLY ===
+            # Service, router and test prompts only depend on the story, so the OpenAI calls overlap
+            calls = [
+                self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": f"You are an expert {lang_display} developer specializing in {framework}. Generate production-ready, idiomatic code."},
+                        {"role": "user", "content": service_prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=1500
+                ),
+                self.client.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[
-                        {"role": "system", "content": f"You are an expert {lang_display} API developer using {api_framework}. Generate production-ready API code specific to this story."},
-                        {"role": "user", "content": api_prompt}
+                        {"role": "system", "content": f"You are an expert {lang_display} test developer using {test_framework_display}. Generate comprehensive, production-ready test code in {lang_display}."},
+                        {"role": "user", "content": test_prompt}
                     ],
                     temperature=0.7,
-                    max_tokens=2000
+                    max_tokens=1500
+                ),
+            ]
+            if has_api_component:
+                calls.append(
+                    self.client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[
+                            {"role": "system", "content": f"You are an expert {lang_display} API developer using {api_framework}. Generate production-ready API code specific to this story."},
+                            {"role": "user", "content": api_prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=2000
+                    )
                 )
-                
+            print(f"[PHASE5] 🤖 Generating {len(calls)} code artifact(s) concurrently via OpenAI ({lang_display})...")
+            # Plain gather leaves the sibling requests running when one fails, so cancel them before
+            # falling back
+            tasks = [asyncio.ensure_future(call) for call in calls]
+            try:
+                responses = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            service_response, test_response = responses[0], responses[1]
+            
+            service_code = service_response.choices[0].message.content.strip()
+            
+            code_files.append({
+                "file": f"{snake_case_name}_service{service_ext}",
+                "language": lang_display,
+                "content": service_code
+            })
+            
+            elapsed = time.time() - start_time
+            print(f"[PHASE5] ✅ Service code generated ({elapsed:.2f}s)")
+            
+            # === API CODE IF NEEDED ===
+            if has_api_component:
+                api_response = responses[2]
                 api_router_code = api_response.choices[0].message.content.strip()
                 
                 code_files.append({
@@ -6406,61 +6863,6 @@ Generate ONLY valid {lang_display} code with all necessary imports."""
                 print("[PHASE5] ⏭️  Skipping API code (no API component selected)")
                 api_endpoints = []
             
-            # === GENERATE TESTS WITH AI (Language-Aware) ===
-            print(f"[PHASE5] 🤖 Generating test code via OpenAI ({lang_display})...")
-            
-            # Map test framework to language if needed
-            if 'node' in lang_lower or 'javascript' in lang_lower or 'typescript' in lang_lower:
-                if 'jest' not in test_framework.lower() and 'mocha' not in test_framework.lower():
-                    test_framework_display = 'Jest'
-                else:
-                    test_framework_display = test_framework
-            elif 'python' in lang_lower or 'fastapi' in lang_lower:
-                if 'pytest' not in test_framework.lower():
-                    test_framework_display = 'pytest'
-                else:
-                    test_framework_display = test_framework
-            elif 'java' in lang_lower:
-                test_framework_display = 'JUnit'
-            elif 'go' in lang_lower:
-                test_framework_display = 'Go testing package'
-            elif 'csharp' in lang_lower or 'dotnet' in lang_lower:
-                test_framework_display = 'xUnit'
-            else:
-                test_framework_display = test_framework
-            
-            test_prompt = f"""Generate comprehensive unit tests for the following in {test_framework_display}:
-
-**Story:** {story_title}
-**Language:** {lang_display}
-**Test Framework:** {test_framework_display}
-**Service Class:** {pascal_case_name}Service
-**Components:** {', '.join(component_names)}
-{f'**Include API Tests:** Yes (router in {snake_case_name}_router.py)' if has_api_component else '**Include API Tests:** No'}
-
-Requirements:
-1. Create a test class or suite for Test{pascal_case_name}Service
-2. Include setup/teardown methods if needed ({lang_display} specific)
-3. Test service initialization
-4. Test main service methods with various inputs
-5. Add assertions for expected behavior
-6. Include edge case tests
-7. Use {test_framework_display} features (fixtures, mocking, etc.)
-{f'8. Include API endpoint tests' if has_api_component else ''}
-9. Use {lang_display} conventions and idioms
-
-Generate ONLY valid {lang_display} test code using {test_framework_display}. Include all necessary imports and follow {lang_display} best practices."""
-
-            test_response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": f"You are an expert {lang_display} test developer using {test_framework_display}. Generate comprehensive, production-ready test code in {lang_display}."},
-                    {"role": "user", "content": test_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
-            
             test_code = test_response.choices[0].message.content.strip()
             
             test_files.append({
@@ -6732,8 +7134,7 @@ Generation Method: {f'AI-Generated with {len(api_endpoints)} API endpoint(s)' if
     
     def _to_pascal_case(self, text: str) -> str:
         """Convert text to PascalCase"""
-        words = text.replace('-', ' ').replace('_', ' ').split()
-        return ''.join(word.capitalize() for word in words if word)
+        return ''.join(word.capitalize() for word in text.translate(_WORD_SEPARATOR_TRANS).split())
     
     def _to_camel_case(self, text: str) -> str:
         """Convert text to camelCase"""
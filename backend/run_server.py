@@ -30,5 +30,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=use_reload,
-        reload_dirs=["app"] if use_reload else None
+        reload_dirs=["app"] if use_reload else None,
+        log_level=os.getenv("LOG_LEVEL", "info")
     )
@@ -6,7 +6,7 @@ import json
 import sys
 sys.path.insert(0, 'c:\\Users\\raghavendra.thummala\\Desktop\\projects\\TAO SDLC\\TAO_SDLC_02_12\\backend')
 
-from app import models, schemas
+from app import models
 from app.services.ai_service import AIService
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
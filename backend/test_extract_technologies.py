@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Table-driven test for extract_technologies(); expected sets are the outputs of
+the original word-by-word implementation
+"""
+
+import os
+import sys
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.services.ai_service import extract_technologies
+
+CASES = [
+    ("The system must support 10,000 users", {"10,000"}),
+    ("Expose the API over HTTP/2 and gRPC", {"API", "HTTP/2"}),
+    ("NFR-02: p95 latency under 200ms", {"200ms", "NFR-02", "p95"}),
+    ("Backend built on .NET Core 8", {"NET"}),
+    ("Store files in s3 within 2s", {"Store"}),
+    ("Cache sessions using Redis", {"Cache", "Redis"}),
+    ("Tech: Kafka, based on PostgreSQL 15", {"PostgreSQL"}),
+    ("python3.11 services talk to MongoDB", {"MongoDB", "python3.11"}),
+    ("Launch in 2024 with AWS Lambda", {"AWS"}),
+    ("Use OAuth2 and JWT for AuthService", {"AuthService", "JWT", "OAuth2"}),
+    ("99.9% uptime for the Gateway", {"99.9%", "Gateway"}),
+    ("We deploy with Kubernetes on GCP", {"GCP", "Kubernetes"}),
+]
+
+
+def test_extract_technologies():
+    for text, expected in CASES:
+        assert extract_technologies(text) == expected, f"{text!r}: {sorted(extract_technologies(text))}"
+
+
+if __name__ == "__main__":
+    try:
+        test_extract_technologies()
+        print(f"✅ extract_technologies matches all {len(CASES)} cases")
+    except AssertionError as e:
+        print(f"❌ extract_technologies mismatch: {e}")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test partial updates: PUT /api/phases/{id} and PUT /api/approvals/{id} apply only the
+fields that were sent, and an explicit null is treated like an omitted field
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "partial_updates.db")
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def _first_phase():
+    client.post("/api/auth/signup", json={"email": "partial@example.com", "username": "partial", "full_name": "Partial", "password": "pw"})
+    token = client.post("/api/auth/login/json", json={"username": "partial", "password": "pw"}).json()["access_token"]
+    project = client.post("/api/projects/", json={"name": "Partial", "description": "d"}, headers={"Authorization": f"Bearer {token}"}).json()
+    return client.get(f"/api/phases/project/{project['id']}").json()[0]
+
+
+def test_phase_update_omitted_fields_are_kept():
+    phase_id = _first_phase()["id"]
+    client.put(f"/api/phases/{phase_id}", json={"status": "in_progress", "data": {"prd": "v1"}, "ai_confidence_score": 70})
+
+    response = client.put(f"/api/phases/{phase_id}", json={"data_patch": {"brd": "v1"}})
+    assert response.status_code == 200
+    phase = response.json()
+    assert phase["status"] == "in_progress"
+    assert phase["data"] == {"prd": "v1", "brd": "v1"}
+    assert phase["ai_confidence_score"] == 70
+
+    response = client.put(f"/api/phases/{phase_id}", json={"ai_confidence_score": 85})
+    assert response.status_code == 200
+    assert response.json()["data"] == {"prd": "v1", "brd": "v1"}
+    assert response.json()["ai_confidence_score"] == 85
+
+
+def test_phase_update_explicit_null_is_ignored():
+    phase_id = _first_phase()["id"]
+    client.put(f"/api/phases/{phase_id}", json={"status": "in_progress", "data": {"prd": "v1"}})
+
+    response = client.put(f"/api/phases/{phase_id}", json={"status": None, "data": None, "aiConfidenceScore": None})
+    assert response.status_code == 200
+    assert response.json()["status"] == "in_progress"
+    assert response.json()["data"] == {"prd": "v1"}
+
+
+def test_approval_update_keeps_comments_when_omitted():
+    phase_id = _first_phase()["id"]
+    approval_id = client.post("/api/approvals/", json={"phase_id": phase_id, "approver_id": 1}).json()["id"]
+    client.put(f"/api/approvals/{approval_id}", json={"status": "conditional", "comments": "Needs NFRs"})
+
+    for body in ({"status": "approved"}, {"status": "approved", "comments": None}):
+        response = client.put(f"/api/approvals/{approval_id}", json=body)
+        assert response.status_code == 200
+        assert response.json()["comments"] == "Needs NFRs"
+
+
+if __name__ == "__main__":
+    try:
+        test_phase_update_omitted_fields_are_kept()
+        print("✅ Omitted phase fields are kept")
+        test_phase_update_explicit_null_is_ignored()
+        print("✅ Explicit null phase fields are ignored")
+        test_approval_update_keeps_comments_when_omitted()
+        print("✅ Omitted approval comments are kept")
+    except AssertionError as e:
+        print(f"❌ Partial update test failed: {e}")
+        sys.exit(1)
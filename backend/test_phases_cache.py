@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test that the phases ETag/cache version changes on every write
+(two updates within the same second, and a project rename)
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "phases_cache.db")
+
+from fastapi.testclient import TestClient
+from app import models
+from app.database import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+
+def _create_project(name):
+    client.post("/api/auth/signup", json={"email": "cache@example.com", "username": "cache", "full_name": "Cache", "password": "pw"})
+    token = client.post("/api/auth/login/json", json={"username": "cache", "password": "pw"}).json()["access_token"]
+    response = client.post("/api/projects/", json={"name": name, "description": "d"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_back_to_back_updates_change_etag():
+    project_id = _create_project("Cache A")
+    response = client.get(f"/api/phases/project/{project_id}")
+    phase_id = response.json()[0]["id"]
+
+    client.put(f"/api/phases/{phase_id}", json={"data": {"version": 1}})
+    first_etag = client.get(f"/api/phases/project/{project_id}").headers["etag"]
+    client.put(f"/api/phases/{phase_id}", json={"data": {"version": 2}})
+
+    response = client.get(f"/api/phases/project/{project_id}", headers={"If-None-Match": first_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != first_etag
+    assert response.json()[0]["data"] == {"version": 2}
+
+
+def test_project_rename_changes_etag():
+    project_id = _create_project("Cache B")
+    etag = client.get(f"/api/phases/project/{project_id}").headers["etag"]
+
+    with SessionLocal() as db:
+        db.query(models.Project).filter(models.Project.id == project_id).update({"name": "Cache B renamed"})
+        db.commit()
+
+    response = client.get(f"/api/phases/project/{project_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["project_name"] == "Cache B renamed"
+
+
+if __name__ == "__main__":
+    try:
+        test_back_to_back_updates_change_etag()
+        print("✅ Back-to-back phase updates change the ETag")
+        test_project_rename_changes_etag()
+        print("✅ Project rename changes the ETag")
+    except AssertionError as e:
+        print(f"❌ Phases cache test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of GET /api/projects/: walking the X-Next-Cursor header visits every
+project exactly once, newest first, even when many share a created_at second
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "projects_pagination.db")
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def _auth_headers():
+    client.post("/api/auth/signup", json={"email": "pages@example.com", "username": "pages", "full_name": "Pages", "password": "pw"})
+    token = client.post("/api/auth/login/json", json={"username": "pages", "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_cursor_walk_visits_each_project_once():
+    headers = _auth_headers()
+    created = [client.post("/api/projects/", json={"name": f"P{i}", "description": "d"}, headers=headers).json()["id"] for i in range(7)]
+
+    seen = []
+    response = client.get("/api/projects/?limit=3", headers=headers)
+    while True:
+        assert response.status_code == 200, response.text
+        seen += [project["id"] for project in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        response = client.get(f"/api/projects/?limit=3&cursor={cursor}", headers=headers)
+
+    # Other test modules may share the database, so only the projects created here are compared
+    assert len(seen) == len(set(seen))
+    assert [project_id for project_id in seen if project_id in created] == sorted(created, reverse=True)
+
+
+def test_invalid_cursor_is_rejected():
+    response = client.get("/api/projects/?cursor=not-a-cursor", headers=_auth_headers())
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    try:
+        test_cursor_walk_visits_each_project_once()
+        print("✅ Cursor pagination visits each project once")
+        test_invalid_cursor_is_rejected()
+        print("✅ Invalid cursor is rejected")
+    except AssertionError as e:
+        print(f"❌ Pagination test failed: {e}")
+        sys.exit(1)
@@ -10,7 +10,7 @@ const PhaseNavigator = () => {
   
   useEffect(() => {
     if (projectId) {
-      getProjectPhases(Number(projectId)).then((res) => setPhases(res.data))
+      getProjectPhases(Number(projectId), false).then((res) => setPhases(res.data))
     }
   }, [projectId])
   
@@ -9,7 +9,7 @@ interface User {
   username: string
   full_name: string
   role: string
-  created_at: string
+  created_at: number  // epoch milliseconds
 }
 
 interface SignupData {
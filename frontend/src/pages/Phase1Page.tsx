@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import { FileText, Users, CheckCircle, Edit3, AlertTriangle, Target, Loader2, UserPlus, Download, Save, ArrowLeftRight, ListChecks, ChevronDown, ChevronUp } from 'lucide-react'
-import { getProjectPhases, generateContent, updatePhase, analyzeRisks, getProject, getFullApiUrl } from '../services/api'
+import { getProjectPhases, streamContent, updatePhase, analyzeRisks, getProject, getFullApiUrl } from '../services/api'
 import toast from 'react-hot-toast'
 import SelectStakeholderModal from '../components/modals/SelectStakeholderModal'
 import RequirementUploader from '../components/DocumentUpload/RequirementUploader'
@@ -558,8 +558,9 @@ export default function Phase1Page() {
         projectName: projectData.name
       })
       
-      // Pass requirements and project data for context-aware generation
-      const response = await generateContent(phaseId, 'prd', {
+      // Pass requirements and project data for context-aware generation; the editor fills in as the PRD streams
+      const generatedPrd = await streamContent(phaseId, 'prd', {
+        regenerate: Boolean(prdContent.trim()),  // Re-generating: skip the server's prompt cache for a fresh draft
         gherkinRequirements,
         functionalRequirements,
         nonFunctionalRequirements,
@@ -576,8 +577,8 @@ export default function Phase1Page() {
           name: projectData.name,
           description: projectData.description
         }
-      })
-      setPrdContent(response.data.content || response.data)
+      }, setPrdContent)
+      setPrdContent(generatedPrd)
       // Add version entry ONLY after successful generation
       const prdVersion: VersionEntry = {
         version: nextVersionNumber,
@@ -585,14 +586,14 @@ export default function Phase1Page() {
         editedBy: 'User',
         changeType: 'ai-generate',
         summary: 'PRD generated with AI',
-        content: response.data.content || response.data
+        content: generatedPrd
       }
       const updatedPrdHistory = [...(versionHistory.prd || []), prdVersion]
       const vhAfter = { ...versionHistory, prd: updatedPrdHistory }
       setVersionHistory(vhAfter)
       
       // Save confidence score and updated content with version history
-      const confidenceScore = response.data.confidence_score || 88
+      const confidenceScore = 85  // same fixed score the non-streaming generate endpoint returns
       await updatePhase(phaseId, {
         data: {
           gherkinRequirements,
@@ -606,7 +607,7 @@ export default function Phase1Page() {
           stakeholdersExtracted: extractedStakeholders,
           technologyAndTools: extractedTechStack,
           aiNotes,
-          prd: response.data.content || response.data,
+          prd: generatedPrd,
           brd: brdContent
         },
         ai_confidence_score: confidenceScore
@@ -682,8 +683,9 @@ export default function Phase1Page() {
         projectName: projectData.name
       })
       
-      // Pass requirements and project data for context-aware generation
-      const response = await generateContent(phaseId, 'brd', {
+      // Pass requirements and project data for context-aware generation; the editor fills in as the BRD streams
+      const generatedBrd = await streamContent(phaseId, 'brd', {
+        regenerate: Boolean(brdContent.trim()),  // Re-generating: skip the server's prompt cache for a fresh draft
         gherkinRequirements,
         functionalRequirements,
         nonFunctionalRequirements,
@@ -700,8 +702,8 @@ export default function Phase1Page() {
           name: projectData.name,
           description: projectData.description
         }
-      })
-      setBrdContent(response.data.content || response.data)
+      }, setBrdContent, true)
+      setBrdContent(generatedBrd)
       // Add version entry ONLY after successful generation
       const brdVersion: VersionEntry = {
         version: nextVersionNumber,
@@ -709,14 +711,14 @@ export default function Phase1Page() {
         editedBy: 'User',
         changeType: 'ai-generate',
         summary: 'BRD generated with AI',
-        content: response.data.content || response.data
+        content: generatedBrd
       }
       const updatedBrdHistory = [...(versionHistory.brd || []), brdVersion]
       const vhAfter = { ...versionHistory, brd: updatedBrdHistory }
       setVersionHistory(vhAfter)
       
       // Save confidence score and updated content with version history
-      const confidenceScore = response.data.confidence_score || 88
+      const confidenceScore = 85  // same fixed score the non-streaming generate endpoint returns
       await updatePhase(phaseId, {
         data: {
           gherkinRequirements,
@@ -731,7 +733,7 @@ export default function Phase1Page() {
           technologyAndTools: extractedTechStack,
           aiNotes,
           prd: prdContent,
-          brd: response.data.content || response.data
+          brd: generatedBrd
         },
         ai_confidence_score: confidenceScore
       })
@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import { useProjectStore } from '../store/projectStore'
-import { getProject, getProjectPhases } from '../services/api'
+import { getProjectWithPhases } from '../services/api'
 import { CheckCircle, Clock, XCircle, AlertCircle, Loader2 } from 'lucide-react'
 import toast from 'react-hot-toast'
 
@@ -30,15 +30,13 @@ const ProjectPage = () => {
       setLoading(true)
       setError(null)
       
-      Promise.all([
-        getProject(Number(projectId)),
-        getProjectPhases(Number(projectId))
-      ])
-        .then(([projectRes, phasesRes]) => {
-          console.log('✅ Project loaded:', projectRes.data)
-          console.log('✅ Phases loaded:', phasesRes.data)
-          setCurrentProject(projectRes.data)
-          setPhases(phasesRes.data)
+      getProjectWithPhases(Number(projectId))
+        .then((projectRes) => {
+          const { phases: projectPhases, ...project } = projectRes.data
+          console.log('✅ Project loaded:', project)
+          console.log('✅ Phases loaded:', projectPhases)
+          setCurrentProject(project)
+          setPhases(projectPhases)
           setLoading(false)
         })
         .catch((err) => {
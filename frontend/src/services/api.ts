@@ -115,13 +115,16 @@ api.interceptors.response.use(
 // Projects
 export const getProjects = () => api.get<Project[]>('/projects/')
 export const getProject = (id: number) => api.get<Project>(`/projects/${id}`)
+// Project plus phase metadata (no phase.data) in a single request
+export const getProjectWithPhases = (id: number) =>
+  api.get<Project & { phases: Phase[] }>(`/projects/${id}`, { params: { include_phases: true } })
 export const createProject = (data: { name: string; description: string }) => 
   api.post<Project>('/projects/', data)
 export const deleteProject = (id: number) => api.delete(`/projects/${id}`)
 
 // Phases
-export const getProjectPhases = (projectId: number) => 
-  api.get<Phase[]>(`/phases/project/${projectId}`)
+export const getProjectPhases = (projectId: number, includeData: boolean = true) => 
+  api.get<Phase[]>(`/phases/project/${projectId}`, { params: includeData ? undefined : { include_data: false } })
 export const getPhase = (phaseId: number) => api.get<Phase>(`/phases/${phaseId}`)
 export const updatePhase = (phaseId: number, data: Partial<Phase>) => 
   api.put<Phase>(`/phases/${phaseId}`, data)
@@ -144,7 +147,42 @@ export const generateContent = (phaseId: number, contentType: string, additional
   console.log('🔴 [API.TS] system_components count:', payload.system_components?.length || 0)
   return api.post(`/ai/generate/${phaseId}`, payload)
 }
-export const analyzeRisks = (phaseId: number) => 
+// Streams a PRD/BRD as plain text; onText receives the accumulated document after each chunk
+// (after each completed section when bySection is set)
+export const streamContent = async (
+  phaseId: number,
+  contentType: 'prd' | 'brd',
+  additionalData: any,
+  onText: (text: string) => void,
+  bySection: boolean = false
+): Promise<string> => {
+  const token = localStorage.getItem('token')
+  const query = bySection ? '?by_section=true' : ''
+  const response = await fetch(`${api.defaults.baseURL}/ai/generate/${phaseId}/stream${query}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'ngrok-skip-browser-warning': 'true',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify({ content_type: contentType, ...additionalData }),
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Streaming ${contentType} failed with status ${response.status}`)
+  }
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let text = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    if (done) break
+    text += decoder.decode(value, { stream: true })
+    onText(text)
+  }
+  text += decoder.decode()
+  return text.trim()
+}
+export const analyzeRisks = (phaseId: number) =>
   api.post(`/ai/analyze-risks/${phaseId}`)
 export const chatWithAI = (data: {
   query: string
@@ -7,7 +7,7 @@ export interface User {
   username: string
   full_name: string
   role: string
-  created_at: string
+  created_at: number  // epoch milliseconds
 }
 
 export interface Project {
@@ -16,7 +16,7 @@ export interface Project {
   description: string
   current_phase: number
   status: string
-  created_at: string
+  created_at: number  // epoch milliseconds
   completed_phases?: number
   total_phases?: number
 }
@@ -29,7 +29,7 @@ export interface Phase {
   status: PhaseStatus
   data: Record<string, any>
   ai_confidence_score: number
-  created_at: string
+  created_at: number  // epoch milliseconds
 }
 
 export interface Approval {
@@ -38,7 +38,7 @@ export interface Approval {
   approver_id: number
   status: ApprovalStatus
   comments?: string
-  created_at: string
+  created_at: number  // epoch milliseconds
   approved_at?: string
 }
 